@@ -20,7 +20,6 @@ import logging
 import sys
 import cv2
 import numpy as np
-from picamera2 import Picamera2
 
 # Configure logging
 logging.basicConfig(
@@ -45,7 +44,13 @@ try:
     from shared.config import (
         LOCAL_CONTROL_PORT, LOCAL_VIDEO_PORT, LOCAL_STILL_PORT,
         LOCAL_HEARTBEAT_PORT, LOCAL_IMAGE_DIR, IMAGE_DIR,
-        VIDEO_PORT, STILL_PORT, HEARTBEAT_PORT, MASTER_IP as MASTER_IP_FROM_CONFIG
+        VIDEO_PORT, STILL_PORT, HEARTBEAT_PORT, MASTER_IP as MASTER_IP_FROM_CONFIG,
+        VIDEO_PIPELINE_THREADED, VIDEO_ENCODER_WORKERS, VIDEO_MAX_FRAME_AGE,
+        VIDEO_FRAGMENT_PAYLOAD, VIDEO_FRAME_BYTES_TARGET, VIDEO_QUALITY_MIN,
+        VIDEO_SKIP_UNCHANGED, VIDEO_CHANGE_THRESHOLD, VIDEO_KEEPALIVE_FPS,
+        VIDEO_CODEC, VIDEO_JPEG_SUBSAMPLING, STILL_WARM_IDLE_TIMEOUT, LOCAL_CLOCK_SYNC_PORT,
+        LOCAL_STILL_KEEP_COPY, STILL_UPLOAD_QUEUE, CAPTURE_QUEUE_SIZE, CAPTURE_COALESCE_WINDOW,
+        CONTROL_GROUP_ENABLED, CONTROL_GROUP_ADDRESS, CONTROL_GROUP_PORT
     )
     logging.info("✓ Loaded local camera configuration")
 except ImportError as e:
@@ -61,8 +66,43 @@ except ImportError as e:
     STILL_PORT = 6000
     HEARTBEAT_PORT = 5003
     MASTER_IP_FROM_CONFIG = "127.0.0.1"
+    VIDEO_PIPELINE_THREADED = True
+    VIDEO_ENCODER_WORKERS = 2
+    VIDEO_MAX_FRAME_AGE = 0.2
+    VIDEO_FRAGMENT_PAYLOAD = 1400
+    VIDEO_FRAME_BYTES_TARGET = 16000
+    VIDEO_QUALITY_MIN = 20
+    VIDEO_SKIP_UNCHANGED = True
+    VIDEO_CHANGE_THRESHOLD = 3.0
+    VIDEO_KEEPALIVE_FPS = 1.0
+    VIDEO_CODEC = 'jpeg'
+    VIDEO_JPEG_SUBSAMPLING = '420'
+    STILL_WARM_IDLE_TIMEOUT = 30.0
+    LOCAL_CLOCK_SYNC_PORT = 5015
+    LOCAL_STILL_KEEP_COPY = False
+    STILL_UPLOAD_QUEUE = 4
+    CAPTURE_QUEUE_SIZE = 4
+    CAPTURE_COALESCE_WINDOW = 1.0
+    CONTROL_GROUP_ENABLED = True
+    CONTROL_GROUP_ADDRESS = "239.255.42.1"
+    CONTROL_GROUP_PORT = 5006
     logging.info("Using fallback configuration")
 
+# Camera access (Picamera2 on the Pi; synthetic/replay sources for off-Pi profiling)
+from shared.camera_owner import CameraOwner
+from shared.capture_sync import COMMAND_PREFIX as CAPTURE_AT_PREFIX, parse_capture_at_command, capture_info_parts
+from shared.clock_sync import ClockSyncResponder
+from shared.still_protocol import metadata_from_info, save_parts, send_still_parts, settings_hash
+from shared.upload_queue import UploadQueue
+from shared.capture_queue import CaptureQueue, format_status_message
+from shared.control_group import ControlGroupReceiver
+from shared.video_pipeline import VideoPipeline
+from shared.video_framing import FrameSender, camera_id_from_name
+from shared.rate_control import JpegRateController
+from shared.preview_codecs import create_preview_codec
+from shared.preview_demand import PreviewDemand, frame_budget
+from shared.change_detect import ChangeDetector
+
 # FIXED: Master IP resolution for local camera
 def resolve_master_ip():
     """For local camera (rep8), always use localhost"""
@@ -75,15 +115,17 @@ logging.info(f"Final Master IP: {MASTER_IP}")
 streaming = False
 streaming_lock = threading.Lock()
 video_thread = None
-jpeg_quality = 80
+jpeg_quality = 80  # Quality ceiling for the preview rate controller
+preview_demand = PreviewDemand()  # Rate/size the master displays (SET_PREVIEW_DEMAND_)
+# Static scene: skip encode/send, with a keepalive frame at VIDEO_KEEPALIVE_FPS
+change_detector = ChangeDetector(VIDEO_CHANGE_THRESHOLD, VIDEO_KEEPALIVE_FPS) if VIDEO_SKIP_UNCHANGED else None
 last_heartbeat = 0
 HEARTBEAT_INTERVAL = 1.0
 HEARTBEAT_TIMEOUT = 5.0
 
-# ARCHITECTURAL FIX: Thread synchronization for Picamera2 instance management
-# Prevents "camera is already open" errors by ensuring proper cleanup sequencing
-stream_stopped_event = threading.Event()  # Signals streaming thread has fully stopped & closed picam2
-capture_complete_event = threading.Event()  # Signals capture is done & picam2 closed, safe to restart stream
+# One Picamera2 instance for the life of the service: the stream and stills share it,
+# so a still no longer stops the stream and reopens the camera
+camera_owner = CameraOwner(still_idle_timeout=STILL_WARM_IDLE_TIMEOUT)
 
 # Camera settings (matching working version)
 camera_settings = {
@@ -147,9 +189,11 @@ def apply_safe_transforms(image_array):
         from shared.transforms import apply_unified_transforms
         
         # Use unified transform function for consistency
-        processed_image = apply_unified_transforms(image_array, "rep8")
+        # Buffers are reused: the frame is encoded before the next one is transformed.
+        # Grayscale comes out single-channel so the encoder sends one channel, not three.
+        processed_image = apply_unified_transforms(image_array, "rep8", reuse_buffers=True,
+                                                   output_format='RGB_OR_GRAY')
         
-        logging.info(f"[LOCAL] ✅ Applied unified transforms for rep8")
         return processed_image
         
     except Exception as e:
@@ -226,37 +270,27 @@ def start_local_video_stream():
             return
         streaming = True
     
-    # ARCHITECTURAL FIX: Clear stop event at stream start (will be set on cleanup)
-    stream_stopped_event.clear()
-    logging.info(f"[EVENT] stream_stopped_event CLEARED at {time.time():.3f} - starting stream")
-
     logging.info(f"🚀 Starting LOCAL video stream to {MASTER_IP}:{VIDEO_PORT}")
 
-    picam2 = None
+    session = None
     sock = None
-    frame_count = 0
-    last_log_time = time.time()
-    error_count = 0
+    pipeline = None
     max_errors = 10
 
     try:
         # Initialize camera (same as working version)
         logging.info("Initializing camera...")
-        picam2 = Picamera2()
         
         # WYSIWYG FIX: Use raw (sensor) config to force full sensor usage
         # Matches remote slaves (video_stream.py) - prevents center crop
-        video_config = picam2.create_video_configuration(
+        session = camera_owner.start_preview(
             main={"size": (640, 480), "format": "RGB888"},
             raw={"size": (4608, 2592)},  # Force full HQ sensor - prevents center crop
             controls={"FrameRate": 15}
         )
         logging.info("[LOCAL] WYSIWYG: Using full sensor (4608x2592) → scaled to (640, 480)")
-        picam2.configure(video_config)
-        picam2.start()
         
         logging.info("✓ Local camera initialized")
-        time.sleep(2.0)
 
         # Create UDP socket
         sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
@@ -266,86 +300,118 @@ def start_local_video_stream():
         
         logging.info(f"✓ Socket created, streaming to {MASTER_IP}:{VIDEO_PORT}")
         
-        start_time = time.time()
-        
-        while True:
-            with streaming_lock:
-                if not streaming:
-                    logging.info("Stream stop requested, breaking loop")
-                    break
-            
+        # Pipeline stages: capture | transform+encode (worker pool) | send
+        # Capture is paced to the rate the master displays (native FPS until it says otherwise)
+        logging.info(f"[LOCAL] Preview demand: {preview_demand.describe()}")
+        if change_detector:
+            change_detector.reset()
+        loop_stats = {'frames': 0, 'errors': 0, 'start_time': time.time(), 'last_log_time': time.time()}
+        
+        def count_error(message):
+            # Consecutive-error budget shared by all stages, as in the old single loop
+            loop_stats['errors'] += 1
+            if loop_stats['errors'] <= 3:
+                logging.error(f"{message} #{loop_stats['errors']}")
+            if loop_stats['errors'] >= max_errors:
+                raise RuntimeError("Too many video loop errors, stopping")
+        
+        # Replaces encode-at-70 / re-encode-at-50-if-over-60000: one encode per frame
+        codec = create_preview_codec(VIDEO_CODEC, VIDEO_JPEG_SUBSAMPLING)
+        logging.info(f"[LOCAL] Preview codec: {codec.describe()}")
+        rate_controller = JpegRateController(VIDEO_FRAME_BYTES_TARGET, VIDEO_QUALITY_MIN, jpeg_quality,
+                                             codec=codec)
+        
+        def capture_frame():
+            if not preview_demand.pace(pipeline.is_running):
+                return None
+            return camera_owner.capture_preview()
+        
+        def encode_frame(frame_rgb):
             try:
-                # Capture frame (RGB888 format from Picamera2)
-                frame_rgb = picam2.capture_array()
+                # Apply transforms keeping RGB format for correct colors (WORKING METHOD),
+                # then shrink to the size the master displays
+                frame_rgb_transformed = preview_demand.fit(apply_safe_transforms(frame_rgb))
                 
-                # Apply transforms keeping RGB format for correct colors (WORKING METHOD)
-                frame_rgb_transformed = apply_safe_transforms(frame_rgb)
+                # Nothing new on screen - don't spend an encode and a send on it
+                change = change_detector.check(frame_rgb_transformed) if change_detector else None
+                if change_detector and change is None:
+                    return None
                 
                 # CRITICAL: Keep RGB format for GUI display (same as working version)
                 # GUI expects RGB format, so red objects appear red (not blue)
                 
-                # Encode as JPEG in RGB format (working version method)
-                encode_params = [cv2.IMWRITE_JPEG_QUALITY, 70]
-                success, encoded = cv2.imencode(".jpg", frame_rgb_transformed, encode_params)
+                # Encode as JPEG in RGB format at the predicted quality
+                rate_controller.max_quality = jpeg_quality
+                rate_controller.target_bytes = frame_budget(VIDEO_FRAME_BYTES_TARGET, frame_rgb_transformed)
+                frame_data = rate_controller.encode(frame_rgb_transformed)
                 
-                if not success:
+                if frame_data is None:
                     logging.warning("Failed to encode frame")
-                    continue
-                
-                frame_data = encoded.tobytes()
-                
-                # Check frame size and reduce quality if needed
-                if len(frame_data) > 60000:
-                    encode_params = [cv2.IMWRITE_JPEG_QUALITY, 50]
-                    success, encoded = cv2.imencode(".jpg", frame_rgb_transformed, encode_params)
-                    if success:
-                        frame_data = encoded.tobytes()
-                
-                # Send to master GUI
-                try:
-                    sock.sendto(frame_data, (MASTER_IP, VIDEO_PORT))
-                    error_count = 0
-                except socket.timeout:
-                    pass
-                except socket.error as e:
-                    error_count += 1
-                    if error_count <= 3:
-                        logging.error(f"Socket error #{error_count}: {e}")
-                    if error_count >= max_errors:
-                        logging.error("Too many socket errors, stopping stream")
-                        break
-                
-                frame_count += 1
-                
-                # Log stats every 5 seconds
-                current_time = time.time()
-                if current_time - last_log_time >= 5.0:
-                    elapsed = current_time - start_time
-                    fps = frame_count / elapsed if elapsed > 0 else 0
-                    logging.info(f"📊 LOCAL: {fps:.1f} fps, {len(frame_data)} bytes/frame, {frame_count} total frames")
-                    last_log_time = current_time
-                
-                # Frame rate control removed - allow native 30 FPS
-                
+                    return None
+                return frame_data, change
             except Exception as e:
-                error_count += 1
-                if error_count <= 3:
-                    logging.error(f"Error in video loop #{error_count}: {e}")
-                if error_count >= max_errors:
-                    logging.error("Too many video loop errors, stopping")
+                count_error(f"Error in video loop: {e}")
+                return None
+        
+        # Fragmented, sequenced datagrams (see shared/video_framing.py)
+        sender = FrameSender(sock, (MASTER_IP, VIDEO_PORT), camera_id_from_name("rep8"),
+                             VIDEO_FRAGMENT_PAYLOAD)
+        
+        def send_frame(encoded, capture_time):
+            frame_data, change = encoded
+            # Send to master GUI
+            try:
+                sender.send(frame_data, capture_time)
+                if change:
+                    change_detector.sent(change)  # Only now is this what the GUI shows
+                loop_stats['errors'] = 0
+            except socket.timeout:
+                pass
+            except socket.error as e:
+                count_error(f"Socket error: {e}")
+            
+            loop_stats['frames'] += 1
+            
+            # Log stats every 5 seconds
+            current_time = time.time()
+            if current_time - loop_stats['last_log_time'] >= 5.0:
+                elapsed = current_time - loop_stats['start_time']
+                fps = loop_stats['frames'] / elapsed if elapsed > 0 else 0
+                logging.info(f"📊 LOCAL: {fps:.1f} fps, {len(frame_data)} bytes/frame (q{rate_controller.last_quality}), {loop_stats['frames']} total frames")
+                logging.info(f"[PERF] rep8 pipeline: {pipeline.format_stats()}")
+                if change_detector:
+                    logging.info(f"[PERF] rep8 {change_detector.format_stats()}")
+                loop_stats['last_log_time'] = current_time
+        
+        pipeline = VideoPipeline(capture_frame, encode_frame, send_frame,
+                                 name="rep8", threaded=VIDEO_PIPELINE_THREADED,
+                                 encoder_workers=VIDEO_ENCODER_WORKERS,
+                                 max_frame_age=VIDEO_MAX_FRAME_AGE)
+        pipeline.start()
+        
+        while pipeline.is_running():
+            with streaming_lock:
+                if not streaming:
+                    logging.info("Stream stop requested, breaking loop")
                     break
-                time.sleep(0.1)
+            time.sleep(0.1)
+        
+        if pipeline.error is not None:
+            logging.error(f"Local video stream stopped: {pipeline.error}")
                 
     except Exception as e:
         logging.error(f"Critical error in local video streaming: {e}")
         
     finally:
-        # Cleanup
-        if picam2:
+        # Cleanup - stop the pipeline threads before releasing the camera
+        if pipeline:
+            pipeline.stop()
+            logging.info(f"[PERF] rep8 pipeline final: {pipeline.format_stats()}")
+        
+        if session is not None:
             try:
-                picam2.stop()
-                picam2.close()
-                logging.info("✓ Local camera stopped and closed")
+                camera_owner.stop_preview(session)  # Camera stays open for stills and the next stream
+                logging.info("✓ Local camera stopped")
             except Exception as e:
                 logging.error(f"Error stopping camera: {e}")
 
@@ -358,12 +424,6 @@ def start_local_video_stream():
 
         with streaming_lock:
             streaming = False
-        
-        # ARCHITECTURAL FIX: Signal that Picamera2 cleanup is complete
-        # This allows capture_local_still() to safely create new Picamera2 instance
-        stream_stopped_event.set()
-        logging.info(f"[EVENT] stream_stopped_event SET at {time.time():.3f} - Picamera2 fully closed")
-        logging.info("✓ Stream cleanup complete - Picamera2 closed and event signaled")
             
         logging.info("🛑 Local video stream stopped")
 
@@ -378,118 +438,48 @@ def stop_local_video_stream():
     time.sleep(1.0)
     logging.info("[LOCAL] ✅ Local video stream stopped")
 
-def capture_local_still():
-    """ARCHITECTURAL FIX: Proper thread synchronization for Picamera2 instance management"""
-    global streaming
-    
-    logging.info("[LOCAL] Starting proper still capture protocol with thread synchronization...")
+def capture_local_still(capture_id=None, fire_time=None):
+    """Capture a high-resolution still and upload it; the video stream keeps running"""
+    logging.info("[LOCAL] Starting still capture (stream keeps running)...")
+    capture_start_time = time.time()
     
-    was_streaming = False
-    
-    # Step 1: Stop video stream to free the camera
-    with streaming_lock:
-        was_streaming = streaming
-        if streaming:
-            logging.info("[LOCAL] Step 1: Stopping video stream for dedicated still capture...")
-            streaming = False
-            # Clear the event before waiting - will be set by streaming thread cleanup
-            stream_stopped_event.clear()
-            logging.info(f"[EVENT] stream_stopped_event CLEARED at {time.time():.3f}")
-    
-    if was_streaming:
-        # ARCHITECTURAL FIX: Wait for Event instead of blind sleep
-        # This ensures streaming thread has ACTUALLY stopped and closed Picamera2
-        wait_start = time.time()
-        logging.info(f"[EVENT-WAIT] Waiting for stream_stopped_event (timeout=10s) at {wait_start:.3f}...")
-        event_received = stream_stopped_event.wait(timeout=10.0)  # 10s max wait
-        wait_elapsed = time.time() - wait_start
-        
-        if event_received:
-            logging.info(f"[EVENT-RESULT] stream_stopped_event RECEIVED in {wait_elapsed:.3f}s - SUCCESS")
-            logging.info("[LOCAL] ✓ Stream cleanup confirmed via Event - camera freed for high-res capture")
-        else:
-            logging.warning(f"[EVENT-RESULT] stream_stopped_event TIMEOUT after {wait_elapsed:.3f}s - FAILED")
-            logging.warning("[LOCAL] ⚠️ Timeout waiting for stream cleanup - proceeding anyway")
-            time.sleep(2.0)  # Fallback safety delay
-
     try:
-        # Step 2: Clear capture complete event before starting capture
-        capture_complete_event.clear()
-        logging.info(f"[EVENT] capture_complete_event CLEARED at {time.time():.3f}")
-        capture_start_time = time.time()
-        logging.info(f"[TIMING] Capture cycle START at {capture_start_time:.3f}")
-        
-        # Step 3: Capture dedicated high-resolution still
-        filename = capture_local_image_high_resolution()
-        if filename:
-            # Step 4: Upload to master
-            success = send_local_image(filename)
-            if success:
-                logging.info("[LOCAL] Still capture protocol completed successfully")
-                result = True
-            else:
-                logging.error("[LOCAL] Failed to upload image to master")
-                result = False
+        still = capture_local_image_high_resolution(capture_id, fire_time)
+        if still:
+            # Upload in the background: the camera is free for the next exposure straight away
+            depth = local_uploader.submit(still, f"capture {capture_id or 'manual'}")
+            logging.info(f"[LOCAL] Still captured, queued for upload (depth {depth})")
+            result = True
         else:
             logging.error("[LOCAL] Failed to capture high-resolution image")
             result = False
     except Exception as e:
         logging.error(f"[LOCAL] Error during still capture protocol: {e}")
         result = False
-
-    # Step 5: Restart video stream if it was running before
-    if was_streaming:
-        logging.info("[LOCAL] Step 5: Preparing to restart video stream...")
-        
-        # ARCHITECTURAL FIX: Wait for capture Picamera2 to be fully closed
-        # This ensures no instance conflict when new streaming thread creates Picamera2
-        wait_start = time.time()
-        logging.info(f"[EVENT-WAIT] Waiting for capture_complete_event (timeout=5s) at {wait_start:.3f}...")
-        event_received = capture_complete_event.wait(timeout=5.0)  # 5s max wait
-        wait_elapsed = time.time() - wait_start
-        
-        if event_received:
-            logging.info(f"[EVENT-RESULT] capture_complete_event RECEIVED in {wait_elapsed:.3f}s - SUCCESS")
-            logging.info("[LOCAL] ✓ Capture cleanup confirmed via Event - safe to restart stream")
-        else:
-            logging.warning(f"[EVENT-RESULT] capture_complete_event TIMEOUT after {wait_elapsed:.3f}s - FAILED")
-            logging.warning("[LOCAL] ⚠️ Timeout waiting for capture cleanup - proceeding with caution")
-            time.sleep(1.0)  # Extra safety delay
-        
-        logging.info("[LOCAL] Starting new streaming thread...")
-        # BUGFIX: Don't set streaming=True here - let the thread set its own flag
-        # This prevents race condition where thread exits immediately due to guard check
-        threading.Thread(target=start_local_video_stream, daemon=True).start()
-        capture_cycle_time = time.time() - capture_start_time
-        logging.info(f"[TIMING] Capture cycle COMPLETE in {capture_cycle_time:.3f}s")
-        logging.info("[LOCAL] ✓ Video stream restarted - protocol complete with proper synchronization")
     
+    logging.info(f"[TIMING] Capture cycle COMPLETE in {time.time() - capture_start_time:.3f}s")
     return result
 
-def capture_local_image_high_resolution():
-    """FIXED: Capture HIGH RESOLUTION still image (4608, 2592) with working transforms"""
-    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"/tmp/local_capture_{timestamp}.jpg"
-    
+def capture_local_image_high_resolution(capture_id=None, fire_time=None):
+    """
+    FIXED: Capture HIGH RESOLUTION still image (4608, 2592) with working transforms.
+    Returns (parts, info): the tagged JPEG as buffers over the encode output (see
+    capture_sync.capture_info_parts) and its capture info - nothing touches the disk.
+    """
     try:
         logging.info("[LOCAL] Starting HIGH-RESOLUTION still capture (4608x2592)...")
         
-        picam2 = Picamera2()
-        
-        # HIGH RESOLUTION configuration (FIXED from working version)
-        still_config = picam2.create_still_configuration(
-            main={"size": (4608, 2592)}  # ✅ FULL SENSOR RESOLUTION
-        )
-        
-        picam2.configure(still_config)
-        picam2.start()
-        
-        # Allow camera to settle (same as working version)
-        time.sleep(1)
-        
-        # Capture image (RGB format from Picamera2)
+        # Capture image (RGB format from Picamera2) - mode switch if the stream is
+        # running, otherwise the warm still session; CAPTURE_AT arms now and fires on time
         logging.info("[LOCAL] Capturing HIGH-RESOLUTION image...")
-        image_rgb = picam2.capture_array()
+        if fire_time is None:
+            image_rgb = camera_owner.capture_still()
+        else:
+            image_rgb = camera_owner.capture_still_at(fire_time)
+            logging.info(f"[SYNC] rep8: capture {capture_id} armed {camera_owner.last_arm_margin * 1000:.0f}ms "
+                         f"before fire time")
+        logging.info(f"[LOCAL] Still captured (stream {'running' if camera_owner.previewing else 'stopped'})")
+        logging.info(f"[PERF] rep8 {camera_owner.format_stats()}")
         
         # Apply unified transforms for still capture (proper BGR format for saving)
         logging.info("[LOCAL] Applying unified still transforms...")
@@ -508,54 +498,62 @@ def capture_local_image_high_resolution():
         
         logging.info("[LOCAL] ✅ Transforms applied - still should match video preview")
         
-        # Save image with high quality (FIXED)
+        # Encode with high quality (FIXED)
         encode_params = [cv2.IMWRITE_JPEG_QUALITY, 95]
-        success = cv2.imwrite(filename, image_bgr_transformed, encode_params)
-        
-        # Clean up camera
-        picam2.stop()
-        picam2.close()
-        
-        # ARCHITECTURAL FIX: Signal that capture Picamera2 is closed
-        # This allows streaming to safely restart without instance conflict
-        capture_complete_event.set()
-        logging.info(f"[EVENT] capture_complete_event SET at {time.time():.3f} - Picamera2 closed")
-        logging.info("[LOCAL] ✓ Capture Picamera2 closed - signaled completion")
+        success, encoded = cv2.imencode(".jpg", image_bgr_transformed, encode_params)
+        if not success:
+            logging.error("[LOCAL] ❌ Failed to encode captured image")
+            return None
         
-        if success and os.path.exists(filename):
-            file_size = os.path.getsize(filename)
-            logging.info(f"[LOCAL] ✅ HIGH-RES CAPTURED: {filename} ({file_size} bytes, resolution: 4608x2592)")
-            
-            # Verify this is actually high resolution
-            if file_size > 1000000:  # Should be >1MB for high-res
-                logging.info(f"[LOCAL] ✅ Confirmed high-resolution capture (>1MB)")
-            else:
-                logging.warning(f"[LOCAL] ⚠️ File size seems small for high-res: {file_size} bytes")
-            
-            return filename
+        info = None
+        if camera_owner.last_still_time is not None:
+            # The sensor timestamp travels inside the JPEG (COM segment) for skew reporting
+            info = {'device': 'rep8', 'capture_id': capture_id, 'fire_time': fire_time,
+                    'sensor_time': camera_owner.last_still_time, 'settings_hash': settings_hash(camera_settings)}
+        parts = capture_info_parts(encoded, info)
+        file_size = sum(memoryview(part).nbytes for part in parts)
+        logging.info(f"[LOCAL] ✅ HIGH-RES CAPTURED: {file_size} bytes in memory (resolution: 4608x2592)")
+        
+        # Verify this is actually high resolution
+        if file_size > 1000000:  # Should be >1MB for high-res
+            logging.info(f"[LOCAL] ✅ Confirmed high-resolution capture (>1MB)")
         else:
-            logging.error("[LOCAL] ❌ Failed to save captured image")
-            return None
+            logging.warning(f"[LOCAL] ⚠️ File size seems small for high-res: {file_size} bytes")
+        
+        return parts, info
             
     except Exception as e:
         logging.error(f"[LOCAL] ❌ Error in high-resolution still capture: {e}")
         logging.error(f"[LOCAL] Exception details: {str(e)}")
-        try:
-            if 'picam2' in locals():
-                picam2.stop()
-                picam2.close()
-                # ARCHITECTURAL FIX: Signal completion even on error
-                capture_complete_event.set()
-                logging.info(f"[EVENT] capture_complete_event SET (ERROR PATH) at {time.time():.3f}")
-                logging.info("[LOCAL] ✓ Error cleanup complete - signaled completion")
-        except:
-            # If even cleanup fails, still signal to prevent deadlock
-            capture_complete_event.set()
-            logging.info(f"[EVENT] capture_complete_event SET (FALLBACK) at {time.time():.3f}")
         return None
 
-def send_local_image(filename):
-    """Send local image to master GUI via TCP (same as working version)"""
+def save_local_copy(parts):
+    """Write a still to /tmp in the background (kept copy, or the only copy if the upload failed)"""
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    filename = f"/tmp/local_capture_{timestamp}.jpg"
+    
+    def write():
+        try:
+            save_parts(filename, parts)
+            logging.info(f"[LOCAL] Saved local copy: {filename}")
+        except Exception as e:
+            logging.error(f"[LOCAL] Failed to save local copy {filename}: {e}")
+    
+    threading.Thread(target=write, name="local-still-copy", daemon=True).start()
+
+def upload_local_still(still):
+    """Upload worker: send one captured still, keeping a copy if configured or if the upload failed"""
+    parts, info = still
+    success = send_local_image(parts, info)
+    if not success:
+        logging.error("[LOCAL] Failed to upload image to master")
+    if LOCAL_STILL_KEEP_COPY or not success:
+        save_local_copy(parts)
+    return success
+
+def send_local_image(parts, info=None):
+    """Upload a still to master GUI via TCP straight from its encode buffer (no file, no copy)"""
+    metadata = metadata_from_info(info, "rep8", camera_settings)
     for attempt in range(3):
         try:
             logging.info(f"[LOCAL] Uploading image to {MASTER_IP}:{STILL_PORT}... (attempt {attempt + 1}/3)")
@@ -564,22 +562,11 @@ def send_local_image(filename):
                 s.settimeout(10.0)
                 s.connect((MASTER_IP, STILL_PORT))
                 
-                with open(filename, 'rb') as f:
-                    data = f.read()
-                    s.sendall(data)
-                    logging.info(f"[LOCAL] Uploaded {len(data)} bytes to master")
-                    
-                try:
-                    os.remove(filename)
-                    logging.info(f"[LOCAL] Cleaned up temp file: {filename}")
-                except:
-                    pass
-                    
+                start = time.time()
+                size = send_still_parts(s, parts, **metadata)
+                logging.info(f"[LOCAL] Uploaded {size} bytes to master in {(time.time() - start) * 1000:.0f}ms")
                 return True
                     
-        except FileNotFoundError:
-            logging.error(f"[LOCAL] File not found: {filename}")
-            return False
         except (ConnectionRefusedError, socket.timeout, OSError) as e:
             logging.error(f"[LOCAL] Connection issue: {e}. Attempt {attempt + 1}/3")
             if attempt < 2:
@@ -591,6 +578,18 @@ def send_local_image(filename):
     logging.error("[LOCAL] Failed to upload image after 3 attempts")
     return False
 
+# Captured stills upload on this thread, in capture order
+local_uploader = UploadQueue(upload_local_still, STILL_UPLOAD_QUEUE)
+
+def report_local_capture_status(request_id, status, depth):
+    """Tell the master what happened to a capture request (heartbeat port)"""
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.sendto(format_status_message(request_id, status, depth).encode(), (MASTER_IP, HEARTBEAT_PORT))
+
+# Capture requests run one at a time on a single worker (duplicates coalesced)
+local_capture_queue = CaptureQueue(capture_local_still, CAPTURE_QUEUE_SIZE, CAPTURE_COALESCE_WINDOW,
+                                   report=report_local_capture_status)
+
 def handle_local_commands():
     """Enhanced command handler (same as working version)"""
     global streaming, jpeg_quality, camera_settings, video_thread
@@ -612,13 +611,17 @@ def handle_local_commands():
         logging.error(f"✗ Failed to bind to port {LOCAL_CONTROL_PORT}: {e}")
         return
 
+    # Capture-all and start/stop-all arrive as one multicast datagram for every camera
+    group = ControlGroupReceiver("rep8", CONTROL_GROUP_ADDRESS, CONTROL_GROUP_PORT)
+    if CONTROL_GROUP_ENABLED:
+        group.open()
+
     command_count = 0
     
     while True:
         try:
             sock.settimeout(5.0)
-            data, addr = sock.recvfrom(1024)
-            command = data.decode().strip()
+            command, addr = group.receive(sock)
             command_count += 1
             
             logging.info(f"[LOCAL] Command #{command_count} from {addr}: {command}")
@@ -640,7 +643,13 @@ def handle_local_commands():
                 
             elif command == "CAPTURE_STILL":
                 logging.info("Processing CAPTURE_STILL command - using proper protocol")
-                threading.Thread(target=capture_local_still, daemon=True).start()
+                local_capture_queue.submit()
+            
+            elif command.startswith(CAPTURE_AT_PREFIX):
+                parsed = parse_capture_at_command(command)
+                if parsed:
+                    logging.info(f"Processing {command} - synchronized capture")
+                    local_capture_queue.submit(parsed[0], parsed)
                 
             elif command == "RESTART_STREAM_WITH_SETTINGS":
                 restart_local_stream()
@@ -655,10 +664,19 @@ def handle_local_commands():
                     if 20 <= quality <= 100:
                         jpeg_quality = quality
                         camera_settings['jpeg_quality'] = quality
+                        if change_detector:
+                            change_detector.reset()  # Show the new quality even on a static scene
                         logging.info(f"JPEG quality set to {quality}")
                 except Exception as e:
                     logging.error(f"Invalid quality command: {command}, error: {e}")
             
+            elif command.startswith("SET_PREVIEW_DEMAND_"):
+                try:
+                    if preview_demand.apply_command(command):
+                        logging.info(f"[LOCAL] Preview demand: {preview_demand.describe()}")
+                except ValueError as e:
+                    logging.error(f"[LOCAL] {e}")
+            
             # TRANSFORM COMMANDS
             elif command.startswith("SET_CAMERA_CROP_"):
                 handle_local_crop_setting(command)
@@ -968,7 +986,7 @@ def main():
     logging.info(f"[LOCAL] ✅ HIGH RESOLUTION: 4608x2592 still captures")
     logging.info(f"[LOCAL] ✅ WORKING TRANSFORMS: Using shared.transforms system")
     logging.info(f"[LOCAL] ✅ CORRECT COLORS: RGB format for GUI")
-    logging.info(f"[LOCAL] ✅ PROPER PROTOCOL: Stop→Capture→Upload→Restart")
+    logging.info(f"[LOCAL] ✅ PROPER PROTOCOL: Capture→Upload, stream keeps running")
     logging.info(f"[LOCAL] Configuration: Master={MASTER_IP}")
     logging.info(f"[LOCAL] Control Port={LOCAL_CONTROL_PORT}, Video Port={VIDEO_PORT}, Heartbeat Port={HEARTBEAT_PORT}")
     
@@ -989,6 +1007,12 @@ def main():
     heartbeat_thread.start()
     logging.info("✓ Heartbeat service started")
     
+    # Clock offset responder (same protocol as the remote slaves)
+    try:
+        ClockSyncResponder(LOCAL_CLOCK_SYNC_PORT).start()
+    except OSError as e:
+        logging.warning(f"[CLOCK] Clock sync responder unavailable: {e}")
+    
     time.sleep(2.0)
     
     logging.info("[LOCAL] All services started. Monitoring...")
@@ -1011,6 +1035,7 @@ def main():
         with streaming_lock:
             if streaming:
                 stop_local_video_stream()
+        camera_owner.close()
     except Exception as e:
         logging.error(f"[LOCAL] Unexpected error in main: {e}")
     finally:
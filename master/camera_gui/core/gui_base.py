@@ -5,7 +5,6 @@ Main GUI class - modular and clean - FIXED VERSION
 import tkinter as tk
 from tkinter import ttk
 import logging
-import threading
 import time
 
 from config.settings import config
@@ -16,6 +15,14 @@ from menu.system_menu import SystemMenuManager
 from core.network_manager import NetworkManager
 from utils import audio_feedback
 
+# Cadence mode: capture sets on a period or pedal trigger, uploads overlapping the next exposure
+try:
+    from shared.cadence import CadenceController
+    from shared.config import CADENCE_INTERVAL, CADENCE_MAX_IN_FLIGHT, CADENCE_TRIGGER_KEY
+except ImportError as e:
+    logging.warning(f"Cadence mode unavailable: {e}")
+    CadenceController = None
+
 
 class MasterVideoGUI:
     """Main GUI application class"""
@@ -33,6 +40,11 @@ class MasterVideoGUI:
         
         # Camera state tracking
         self.camera_states = {}  # Track state per camera IP
+        self.steady_states = {}  # Last IDLE/STREAMING per camera, shown again once its captures finish
+        
+        # Cadence mode (continuous capture sets); delivered stills are reported by the network manager
+        self.cadence = CadenceController(CADENCE_INTERVAL, CADENCE_MAX_IN_FLIGHT) if CadenceController else None
+        self.cadence_label = None
         
         self.setup_window()
         self.setup_styles()
@@ -162,10 +174,21 @@ class MasterVideoGUI:
                                             command=self.stop_all_video_streams, style="Dark.TButton")
         self.stop_streams_button.grid(row=1, column=1, padx=5, pady=5, sticky="ew")
         
+        # Cadence mode toggle and its live status (sets/minute, queue depth per camera)
+        if self.cadence:
+            control_frame.grid_rowconfigure(3, weight=1)
+            self.cadence_button = ttk.Button(control_frame, text="Start Cadence [C]",
+                                             command=self.toggle_cadence, style="Dark.TButton")
+            self.cadence_button.grid(row=2, column=0, padx=5, pady=5, sticky="ew")
+            self.cadence_label = ttk.Label(control_frame, text="Cadence stopped", style="TLabel", font=('Arial', 9))
+            self.cadence_label.grid(row=2, column=1, padx=5, pady=5, sticky="ew")
+        
         # Add keyboard shortcuts help text
         shortcuts_text = "Shortcuts: [Space] Capture All | [1-8] Focus Camera | [Esc] Show All | [S] Settings | [G] Gallery | [R] Restart | [Ctrl+Q] Quit"
+        if self.cadence:
+            shortcuts_text += f" | [C] Cadence | {CADENCE_TRIGGER_KEY.strip('<>')} Trigger Set"
         shortcuts_label = ttk.Label(control_frame, text=shortcuts_text, style="TLabel", font=('Arial', 9))
-        shortcuts_label.grid(row=2, column=0, columnspan=2, padx=5, pady=2, sticky="ew")
+        shortcuts_label.grid(row=3, column=0, columnspan=2, padx=5, pady=2, sticky="ew")
 
     def setup_progress_indicator(self):
         """Setup progress indicator frame (initially hidden)"""
@@ -199,42 +222,90 @@ class MasterVideoGUI:
         self.expected_images = total
         self.received_images = 0
         
-        # Store previous states before capturing
-        previous_states = {}
-        for ip in camera_ips:
-            previous_states[ip] = self.camera_states.get(ip, "IDLE")
-        
         # Show progress bar
         self.show_progress(total)
         
-        # Send all capture commands in parallel using threading
-        def send_capture_command(ip, index):
-            """Send capture command to single camera"""
-            # Update state to CAPTURING - direct call since we're in thread
-            self.update_camera_state(ip, "CAPTURING")
-            
-            # Update progress - direct call for immediate feedback
-            self.update_progress(index, total, f"Capturing {index}/{total}...")
-            
-            # Play capture sound and capture
-            self.audio.play_capture_sound()
-            self.network_manager.send_command(ip, "CAPTURE_STILL")
-            
-            # Return to previous state after capture
-            prev_state = previous_states[ip]
-            self.root.after(1000, lambda: self.update_camera_state(ip, prev_state))
-        
-        # Launch all capture commands in parallel threads
-        threads = []
-        for i, ip in enumerate(camera_ips, 1):
-            thread = threading.Thread(target=send_capture_command, args=(ip, i), daemon=True)
-            thread.start()
-            threads.append(thread)
+        self.send_capture_set(camera_ips)
         
         # Update status to waiting for images (commands sent in parallel)
         self.update_progress(total, total, f"Waiting for images... (0/{total} received)")
         # Don't hide progress bar - wait for images to arrive
 
+    def send_capture_set(self, camera_ips, show_progress=True):
+        """Send one capture set (every camera fires at the same instant) without waiting for delivery"""
+        total = len(camera_ips)
+        
+        # One CAPTURE_AT per camera: each arms now and fires at the same instant
+        capture_commands = self.network_manager.start_capture_set(camera_ips)
+        
+        # One datagram reaches every camera (unicast only to cameras that don't acknowledge)
+        for ip in camera_ips:
+            self.update_camera_state(ip, "CAPTURING")
+        if show_progress:
+            self.update_progress(total, total, f"Capturing {total}/{total}...")
+        self.audio.play_capture_sound()
+        self.network_manager.send_to_all(capture_commands)
+        
+        # Slaves with a capture worker restore their label through CAPTURE_STATUS reports;
+        # cameras that haven't reported since this set return to their previous state after 1s
+        sent = time.time()
+        for ip in camera_ips:
+            self.root.after(1000, lambda ip=ip: self._restore_unreported_capture(ip, sent))
+        
+        if self.cadence:
+            self.cadence.sent(camera_ips)
+
+    def toggle_cadence(self):
+        """Start/stop continuous capture sets every CADENCE_INTERVAL seconds"""
+        if not self.cadence:
+            return
+        if self.cadence.running:
+            self.cadence.stop()
+            self.cadence_button.config(text="Start Cadence [C]")
+            logging.info(f"[CADENCE] Stopped: {self.cadence.format_status(self.get_camera_ips())}")
+        else:
+            self.cadence.start()
+            self.cadence_button.config(text="Stop Cadence [C]")
+            logging.info(f"[CADENCE] Started: a set every {CADENCE_INTERVAL:.1f}s, "
+                         f"up to {CADENCE_MAX_IN_FLIGHT} undelivered sets per camera")
+            self._cadence_tick()
+
+    def trigger_capture_set(self):
+        """Pedal/key trigger: one capture set now, unless a camera is still CADENCE_MAX_IN_FLIGHT sets behind"""
+        if not self.cadence:
+            self.capture_all_stills()
+            return
+        camera_ips = self.get_camera_ips()
+        self.cadence.expire()
+        busy = self.cadence.blocked(camera_ips)
+        if busy:
+            logging.warning(f"[CADENCE] Trigger ignored: {', '.join(self.find_slave_name(ip) for ip in busy)} still uploading")
+        else:
+            self.send_capture_set(camera_ips, show_progress=False)
+        self._update_cadence_status()
+
+    def _cadence_tick(self):
+        """Cadence timer (Tk thread): fire due sets once no camera is too far behind"""
+        if not self.cadence or not self.cadence.running:
+            self._update_cadence_status()
+            return
+        camera_ips = self.get_camera_ips()
+        missing = self.cadence.expire()
+        if missing:
+            logging.warning(f"[CADENCE] Gave up waiting for {', '.join(self.find_slave_name(ip) for ip in missing)}")
+        if self.cadence.due():
+            if self.cadence.blocked(camera_ips):
+                self.cadence.stall()
+            else:
+                self.send_capture_set(camera_ips, show_progress=False)
+        self._update_cadence_status()
+        self.root.after(100, self._cadence_tick)
+
+    def _update_cadence_status(self):
+        if self.cadence_label:
+            names = {ip: self.find_slave_name(ip) for ip in self.get_camera_ips()}
+            self.cadence_label.config(text=self.cadence.format_status(list(names), names))
+
     def show_progress(self, total):
         """Show progress bar for operations"""
         self.progress_frame.grid(row=3, column=0, columnspan=4, 
@@ -275,6 +346,8 @@ class MasterVideoGUI:
     def update_camera_state(self, ip, state):
         """Update visual state indicator for a camera"""
         self.camera_states[ip] = state
+        if state in ("IDLE", "STREAMING"):
+            self.steady_states[ip] = state
         
         # Update state label if camera frame exists
         if hasattr(self.camera_manager, 'camera_frames') and ip in self.camera_manager.camera_frames:
@@ -284,12 +357,22 @@ class MasterVideoGUI:
                 colors = {
                     "IDLE": ("gray40", "white"),
                     "STREAMING": ("green4", "white"),
+                    "QUEUED": ("DarkOrange3", "white"),
                     "CAPTURING": ("goldenrod3", "white"),
                     "ERROR": ("red3", "white")
                 }
                 bg, fg = colors.get(state, ("gray40", "white"))
                 camera_frame.state_label.config(text=state, bg=bg, fg=fg)
 
+    def capture_finished(self, ip):
+        """A camera's capture queue drained: show its pre-capture state again"""
+        self.update_camera_state(ip, self.steady_states.get(ip, "IDLE"))
+
+    def _restore_unreported_capture(self, ip, sent):
+        status = self.network_manager.capture_status.get(ip)
+        if status is None or status[3] < sent:
+            self.capture_finished(ip)
+
     def sync_time_all_devices(self):
         """Sync time on all devices"""
         from tkinter import messagebox
@@ -321,7 +404,8 @@ class MasterVideoGUI:
             # Show immediate feedback, actual sends happen in background
             self.root.after(1000, lambda: messagebox.showinfo(
                 "Time Sync", 
-                f"Time synchronization sent to {success_count}/{len(self.get_camera_ips())} devices."
+                f"Time synchronization sent to {success_count}/{len(self.get_camera_ips())} devices.\n\n"
+                f"Measured clock offsets:\n{self.network_manager.format_clock_offsets(self.get_camera_ips())}"
             ))
 
     def start_all_video_streams(self):
@@ -335,8 +419,9 @@ class MasterVideoGUI:
     def stop_all_video_streams(self):
         """Stop all video streams"""
         logging.info("User-triggered: Stopping all video streams...")
-        for ip in self.get_camera_ips():
-            self.network_manager.send_command(ip, "STOP_STREAM")
+        camera_ips = self.get_camera_ips()
+        self.network_manager.send_to_all({ip: "STOP_STREAM" for ip in camera_ips})
+        for ip in camera_ips:
             self.update_camera_state(ip, "IDLE")
 
     def get_camera_ips(self):
@@ -379,6 +464,12 @@ class MasterVideoGUI:
         self.root.bind('<r>', lambda e: self.restart_all_streams())
         self.root.bind('<R>', lambda e: self.restart_all_streams())
         
+        # C key - Start/stop cadence mode; trigger key (foot pedal) - one capture set now
+        if self.cadence:
+            self.root.bind('<c>', lambda e: self.toggle_cadence())
+            self.root.bind('<C>', lambda e: self.toggle_cadence())
+            self.root.bind(CADENCE_TRIGGER_KEY, lambda e: self.trigger_capture_set())
+        
         # Ctrl+Q - Quit application
         self.root.bind('<Control-q>', lambda e: self.root.quit())
         
@@ -406,6 +497,15 @@ class MasterVideoGUI:
             self.exclusive_camera = camera_name
             self.exclusive_ip = config.SLAVES[camera_name]['ip']
             
+            # Ask the enlarged camera for more frames and the hidden ones for fewer
+            if hasattr(self, 'network_manager') and self.network_manager:
+                self.network_manager.announce_preview_demands()
+            
+            if self.camera_manager.preview_wall:
+                self.camera_manager.preview_wall.show_exclusive(self.exclusive_ip)
+                logging.info(f"Showing exclusive preview: {camera_name}")
+                return
+            
             # First hide all cameras
             for name, frame in self.slave_frames.items():
                 frame.grid_remove()
@@ -426,6 +526,14 @@ class MasterVideoGUI:
         self.exclusive_camera = None
         self.exclusive_ip = None
         
+        # Every camera back to the grid rate and size
+        if hasattr(self, 'network_manager') and self.network_manager:
+            self.network_manager.announce_preview_demands()
+        
+        if self.camera_manager.preview_wall:
+            self.camera_manager.preview_wall.show_all()
+            return
+        
         for name in self.slave_frames:
             frame = self.slave_frames[name]
             # Restore original grid position
@@ -2,6 +2,8 @@
 Network operations manager - FIXED VERSION with proper port handling
 """
 
+import io
+import atexit
 import socket
 import threading
 import logging
@@ -27,6 +29,106 @@ except ImportError:
         }
     }
 
+# Fragmented preview frames (config.settings puts the project root on sys.path)
+try:
+    from shared.video_framing import FrameReassembler
+    from shared.config import VIDEO_REASSEMBLY_TIMEOUT
+except ImportError as e:
+    logging.warning(f"Video framing unavailable, expecting single-datagram frames: {e}")
+    FrameReassembler = None
+
+# Per-camera preview decode workers fed by latest-wins mailboxes
+try:
+    from shared.frame_mailbox import MailboxWorkers
+    from shared.config import VIDEO_DECODE_WORKERS
+except ImportError as e:
+    logging.warning(f"Decode workers unavailable, decoding on the display timer: {e}")
+    MailboxWorkers = None
+
+# Optional child process for video receive/decode, handing tiles over in shared memory
+try:
+    from shared.preview_process import PreviewProcess
+    from shared.config import VIDEO_PREVIEW_PROCESS
+except ImportError as e:
+    logging.warning(f"Preview process unavailable, decoding previews in the GUI process: {e}")
+    PreviewProcess = None
+    VIDEO_PREVIEW_PROCESS = False
+
+# Preview codec detection (slaves may send JPEG or WebP, see shared/preview_codecs.py)
+try:
+    from shared.preview_codecs import sniff_codec
+except ImportError as e:
+    logging.warning(f"Preview codec detection unavailable, assuming JPEG: {e}")
+    sniff_codec = None
+
+# Preview demand: tell slaves the rate and size each GUI mode displays
+try:
+    from shared.preview_demand import format_demand_command
+    from shared.config import PREVIEW_DEMAND_GRID, PREVIEW_DEMAND_EXCLUSIVE, PREVIEW_DEMAND_HIDDEN
+except ImportError as e:
+    logging.warning(f"Preview demand unavailable, slaves stream at native rate: {e}")
+    format_demand_command = None
+
+# Synchronized "capture all": one fire time for every camera, skew reported per capture set
+try:
+    from shared.capture_sync import (CaptureSetTracker, format_capture_at_command, format_report,
+                                     new_capture_id, read_capture_info)
+    from shared.config import STILL_SYNC_CAPTURE, STILL_SYNC_LEAD_TIME
+except ImportError as e:
+    logging.warning(f"Capture sync unavailable, cameras capture independently: {e}")
+    CaptureSetTracker = None
+    STILL_SYNC_CAPTURE = False
+
+# Per-slave clock offset/drift estimation (NTP-style exchange, no external server)
+try:
+    from shared.clock_sync import ClockSyncClient, format_estimate
+    from shared.config import CLOCK_SYNC_INTERVAL
+except ImportError as e:
+    logging.warning(f"Clock sync unavailable, slave clocks assumed equal to ours: {e}")
+    ClockSyncClient = None
+
+# Capture worker status from the slaves (CAPTURE_STATUS on the heartbeat port)
+try:
+    from shared.capture_queue import parse_status_message as parse_capture_status
+except ImportError as e:
+    logging.warning(f"Capture status reports unavailable: {e}")
+    parse_capture_status = None
+
+# Framed still uploads (header with device/capture id/CRC, streamed to disk)
+try:
+    from shared.still_protocol import (StillTransferError, read_header as read_still_header,
+                                       receive_to_file as receive_still_to_file)
+except ImportError as e:
+    logging.warning(f"Still protocol unavailable, buffering uploads in memory: {e}")
+    read_still_header = None
+    StillTransferError = ValueError
+
+# Still uploads served by one asyncio loop with bounded concurrency and a disk-writer thread
+try:
+    from shared.still_ingest import StillIngestServer
+    from shared.config import STILL_INGEST_MAX_UPLOADS, STILL_INGEST_QUEUE_CHUNKS
+except ImportError as e:
+    logging.warning(f"Still ingest server unavailable, using a thread per upload: {e}")
+    StillIngestServer = None
+
+# One multicast datagram for capture-all / start-stop-all, acknowledged per slave
+try:
+    from shared.control_group import ALL_DEVICES, ControlGroupSender
+    from shared.config import (CONTROL_GROUP_ENABLED, CONTROL_GROUP_ADDRESS, CONTROL_GROUP_PORT,
+                               CONTROL_GROUP_ACK_TIMEOUT)
+except ImportError as e:
+    logging.warning(f"Control group unavailable, commands sent to each camera separately: {e}")
+    ControlGroupSender = None
+
+
+def _pil_supports(feature):
+    """True if this Pillow build can decode the given format"""
+    try:
+        from PIL import features
+        return bool(features.check(feature))
+    except Exception:
+        return False
+
 
 class NetworkManager:
     """Manages all network operations with proper port handling"""
@@ -35,11 +137,20 @@ class NetworkManager:
         self.gui = gui
         self.video_socket = None
         self.still_server = None
+        self.control_group = None
+        self.preview_process = None  # Child process publishing decoded tiles (VIDEO_PREVIEW_PROCESS)
+        self.device_ports = {}  # ip -> port map (get_device_ports)
         self.active_heartbeats = {}
         
         # CRITICAL FIX: Fixed-interval timer architecture for smooth GUI
         # Replace after_idle() with scheduled timers to prevent event saturation
-        self.latest_frames = {}  # Buffer latest frame per camera
+        self.latest_frames = {}  # Latest frame per camera: decoded by a worker, or still compressed
+        self.decodes_avoided = {}  # Frames replaced in latest_frames before they were decoded
+        self.frames_unshown = {}  # Decoded frames replaced before a display tick took them
+        
+        # Complete frames go from the receive thread to one decode worker per camera
+        self.decode_workers = (MailboxWorkers(self._decode_worker, name="preview-decode")
+                               if MailboxWorkers and VIDEO_DECODE_WORKERS else None)
         self.frame_timers = {}  # Active timer IDs per camera
         self.photo_images = {}  # Reusable PhotoImage objects per camera
         
@@ -52,10 +163,49 @@ class NetworkManager:
         self.frame_interval_grid = 0.25  # Accept 4 fps from network in grid mode
         self.frame_interval_exclusive = 0.067  # Accept 15 fps in exclusive mode
         
+        # Demand sent to each slave (ip -> command); slaves pace themselves to it, so the
+        # limits above only guard against slaves that ignore it - keep them slightly under
+        # the demanded interval so pacing jitter doesn't drop frames the slave paid for
+        self.preview_demands = {}
+        if format_demand_command:
+            self.frame_interval_grid = 0.8 / PREVIEW_DEMAND_GRID[0]
+            self.frame_interval_exclusive = 0.8 / PREVIEW_DEMAND_EXCLUSIVE[0]
+        
         # INSTRUMENTATION: Performance metrics
         self.frames_received = {}  # Total frames received per camera
         self.frames_displayed = {}  # Total frames actually displayed
         self.frames_dropped = {}  # Frames dropped by rate limiting
+        
+        # Preview decoders by codec name - the codec is sniffed from each frame's magic bytes
+        self.decoders = {}
+        self.frame_codecs = {}  # Last codec seen per camera (for the perf log)
+        self.decode_stats = {}  # ip -> [frames decoded, seconds spent decoding]
+        self.register_decoder('jpeg', self._decode_with_pil)
+        self.register_decoder('webp', self._decode_with_pil if _pil_supports('webp') else self._decode_with_cv2)
+        
+        # Clock offset of every slave relative to ours (keyed by IP)
+        self.clock_sync = None
+        if ClockSyncClient:
+            self.clock_sync = ClockSyncClient(interval=CLOCK_SYNC_INTERVAL)
+            for slave in config.SLAVES.values():
+                ports = self.get_device_ports(slave["ip"])
+                if 'clock_sync' in ports:
+                    self.clock_sync.add_peer(slave["ip"], (slave["ip"], ports['clock_sync']))
+        
+        # Last capture worker report per camera: (request_id, status, queue depth, time)
+        self.capture_status = {}
+        
+        # Camera labels from capture status reports, waiting for the Tk thread (ip -> state)
+        self._capture_state_queue = {}
+        self._capture_state_pending = False
+        self._capture_state_lock = threading.Lock()
+        
+        # Capture sets in flight (capture_id -> expected cameras and their sensor times)
+        self.capture_sets = CaptureSetTracker() if CaptureSetTracker and STILL_SYNC_CAPTURE else None
+        
+        # Reassembles fragmented frames and tracks per-camera network loss
+        self.reassembler = (FrameReassembler(VIDEO_REASSEMBLY_TIMEOUT, clock_offset=self.clock_offset)
+                            if FrameReassembler else None)
         self.perf_start_time = time.time()
         self.last_perf_log = time.time()
         
@@ -64,18 +214,70 @@ class NetworkManager:
         self.heartbeat_count = 0
         self.last_heartbeat = time.time()
         self.heartbeat_stalls = 0
+        self.heartbeat_worst = 0.0
         self._start_heartbeat_monitor()
 
     def start_all_services(self):
         """Start all network services"""
         logging.info("Starting network services...")
-        threading.Thread(target=self.video_receiver, daemon=True).start()
+        if PreviewProcess and VIDEO_PREVIEW_PROCESS:
+            # Started first: the child is forked before the GUI process has any other threads
+            self.start_preview_process()
+        else:
+            threading.Thread(target=self.video_receiver, daemon=True).start()
         threading.Thread(target=self.still_receiver, daemon=True).start()
         threading.Thread(target=self.heartbeat_listener, daemon=True).start()
         threading.Thread(target=self.heartbeat_monitor, daemon=True).start()
+        if self.clock_sync:
+            self.clock_sync.start()
+        if ControlGroupSender and CONTROL_GROUP_ENABLED:
+            try:
+                self.control_group = ControlGroupSender(CONTROL_GROUP_ADDRESS, CONTROL_GROUP_PORT,
+                                                        CONTROL_GROUP_ACK_TIMEOUT)
+            except OSError as e:
+                logging.warning(f"[GROUP] Control group unavailable, sending to each camera: {e}")
+        # Composite preview: one timer draws every camera (no per-camera labels or timers)
+        if getattr(self.gui.camera_manager, 'preview_wall', None):
+            self.gui.root.after(self.grid_update_interval, self._timer_update_wall)
+        # Slaves already running get the grid demand now, the rest when their heartbeat appears
+        self.announce_preview_demands(force=True)
+
+    def start_preview_process(self):
+        """Receive and decode previews in a child process; the GUI only copies tiles out of shared memory"""
+        try:
+            self.preview_process = PreviewProcess([slave["ip"] for slave in config.SLAVES.values()],
+                                                  config.VIDEO_PORT, VIDEO_REASSEMBLY_TIMEOUT)
+            self.preview_process.start()
+            atexit.register(self.preview_process.stop)
+        except Exception as e:
+            logging.error(f"[PREVIEW] Preview process failed to start, receiving in the GUI process: {e}")
+            self.preview_process = None
+            threading.Thread(target=self.video_receiver, daemon=True).start()
+            return
+        self.gui.root.after(self.grid_update_interval, self._watch_preview_process)
+
+    def _watch_preview_process(self):
+        """Keep a display timer running per camera (nothing else starts them in this mode)"""
+        if not self.preview_process:
+            return
+        if not self.preview_process.alive():
+            logging.error("[PREVIEW] Preview process exited, receiving in the GUI process")
+            self.preview_process = None
+            threading.Thread(target=self.video_receiver, daemon=True).start()
+            return
+        for ip in self.gui.video_labels:
+            if ip not in self.frame_timers:
+                self._start_frame_timer(ip)
+        self.gui.root.after(self.grid_update_interval, self._watch_preview_process)
 
     def get_device_ports(self, ip):
-        """Get correct ports for device based on IP"""
+        """Get correct ports for device based on IP (looked up once per device)"""
+        ports = self.device_ports.get(ip)
+        if ports is None:
+            ports = self.device_ports[ip] = self._lookup_device_ports(ip)
+        return ports
+
+    def _lookup_device_ports(self, ip):
         try:
             # Import the shared config function
             import sys
@@ -92,7 +294,8 @@ class NetworkManager:
                     'video': 5012,
                     'video_control': 5014,
                     'still': 6010,
-                    'heartbeat': 5013
+                    'heartbeat': 5013,
+                    'clock_sync': 5015
                 }
             else:  # Remote cameras
                 return {
@@ -100,7 +303,8 @@ class NetworkManager:
                     'video': 5002,
                     'video_control': 5004,
                     'still': 6000,
-                    'heartbeat': 5003
+                    'heartbeat': 5003,
+                    'clock_sync': 5005
                 }
 
     def send_command(self, ip, command):
@@ -116,7 +320,7 @@ class NetworkManager:
                 ports = self.get_device_ports(ip)
                 
                 # Determine which port to use based on command type
-                if command in ("START_STREAM", "STOP_STREAM", "RESTART_STREAM"):
+                if command in ("START_STREAM", "STOP_STREAM", "RESTART_STREAM") or command.startswith("SET_PREVIEW_DEMAND_"):
                     # Video control commands
                     # Local camera slave listens for START/STOP on control port (5011),
                     # not the video_control port. Special-case localhost.
@@ -128,8 +332,10 @@ class NetworkManager:
                     # System commands - use control port
                     port = ports['control']
                 elif command.startswith("SET_TIME"):
-                    # Time sync commands
+                    # Time sync commands - the slave's clock steps, so its offset is measured afresh
                     port = ports['control']
+                    if self.clock_sync:
+                        self.clock_sync.reset(ip)
                 else:
                     # Default commands
                     port = ports['control']
@@ -161,6 +367,70 @@ class NetworkManager:
         cmd_thread = threading.Thread(target=_send_thread, daemon=True)
         cmd_thread.start()
 
+    def send_to_all(self, commands):
+        """
+        Send {ip: command} to every camera at once: one datagram to the control group,
+        then a unicast copy to any camera that hasn't acknowledged within the timeout
+        """
+        if not self.control_group:
+            for ip, command in commands.items():
+                self.send_command(ip, command)
+            return
+        names = {ip: self.find_device_name(ip) for ip in commands}
+        all_ips = {slave["ip"] for slave in config.SLAVES.values()}
+        if set(commands) == all_ips and len(set(commands.values())) == 1:
+            group_commands = {ALL_DEVICES: next(iter(commands.values()))}
+        else:
+            group_commands = {names[ip]: command for ip, command in commands.items()}
+        try:
+            seq = self.control_group.send(group_commands)
+        except OSError as e:
+            logging.warning(f"[GROUP] Multicast send failed, sending to each camera: {e}")
+            for ip, command in commands.items():
+                self.send_command(ip, command)
+            return
+        threading.Thread(target=self._await_group_acks, args=(seq, commands, names),
+                         name="control-group-wait", daemon=True).start()
+
+    def _await_group_acks(self, seq, commands, names):
+        missing = self.control_group.wait_acks(seq, list(names.values()))
+        first = next(iter(commands.values()))
+        label = first if len(set(commands.values())) == 1 else f"{first.rsplit('_', 2)[0]} set"
+        if not missing:
+            logging.info(f"[GROUP] {label} acknowledged by all {len(names)} cameras "
+                         f"in {self.control_group.last_fanout * 1000:.1f}ms")
+            return
+        logging.warning(f"[GROUP] {label}: no ack from {', '.join(missing)}, sending directly")
+        for ip, command in commands.items():
+            if names[ip] in missing:
+                self.send_command(ip, command)
+
+    def find_device_name(self, ip):
+        """Slave name (config.SLAVES key) for an IP"""
+        for name, slave in config.SLAVES.items():
+            if slave["ip"] == ip:
+                return name
+        return ip
+
+    def preview_demand_for(self, ip):
+        """(fps, size) the GUI currently displays for this camera"""
+        exclusive_ip = getattr(self.gui, 'exclusive_ip', None)
+        if exclusive_ip is None:
+            return PREVIEW_DEMAND_GRID
+        return PREVIEW_DEMAND_EXCLUSIVE if ip == exclusive_ip else PREVIEW_DEMAND_HIDDEN
+
+    def announce_preview_demands(self, ips=None, force=False):
+        """Send each slave the rate/size it is displayed at (only changes unless force)"""
+        if not format_demand_command:
+            return
+        if ips is None:
+            ips = [slave["ip"] for slave in config.SLAVES.values()]
+        for ip in ips:
+            command = format_demand_command(*self.preview_demand_for(ip))
+            if force or self.preview_demands.get(ip) != command:
+                self.preview_demands[ip] = command
+                self.send_command(ip, command)
+
     def video_receiver(self):
         """Receive video frames with proper port handling"""
         try:
@@ -178,11 +448,19 @@ class NetworkManager:
                     
                     # Accept frames from configured slaves
                     slave_ips = [slave["ip"] for slave in config.SLAVES.values()]
-                    if ip in slave_ips:
-                        self.process_video_frame(ip, data)
-                    elif ip in ("127.0.0.1", "localhost"):
+                    if ip in ("127.0.0.1", "localhost"):
                         # Also accept from localhost variants
-                        self.process_video_frame("127.0.0.1", data)
+                        ip = "127.0.0.1"
+                    elif ip not in slave_ips:
+                        continue
+                    
+                    # Datagrams are fragments; only complete frames reach processing
+                    if self.reassembler:
+                        result = self.reassembler.add(ip, data)
+                        if result is None:
+                            continue
+                        data = result[1]
+                    self.process_video_frame(ip, data)
                         
                 except socket.timeout:
                     continue
@@ -193,11 +471,56 @@ class NetworkManager:
         except Exception as e:
             logging.error(f"Video receiver setup error: {e}")
 
+    def register_decoder(self, codec, decoder):
+        """
+        Use decoder(data, size) -> RGB PIL image for frames of this codec; size is the
+        display size, which the decoder may use to decode at a reduced scale (the result
+        is resized to size afterwards if it doesn't match exactly)
+        """
+        self.decoders[codec] = decoder
+
+    def decode_frame(self, ip, data, size=None):
+        """Decode one preview frame with the decoder registered for its codec"""
+        codec = (sniff_codec(data) if sniff_codec else None) or 'jpeg'
+        self.frame_codecs[ip] = codec
+        decoder = self.decoders.get(codec)
+        if decoder is None:
+            raise ValueError(f"no decoder registered for preview codec '{codec}'")
+        start = time.perf_counter()
+        image = decoder(data, size)
+        stats = self.decode_stats.setdefault(ip, [0, 0.0])
+        stats[0] += 1
+        stats[1] += time.perf_counter() - start
+        return image
+
+    @staticmethod
+    def _decode_with_pil(data, size=None):
+        image = Image.open(io.BytesIO(data))
+        if size and image.format == "JPEG":
+            # DCT-domain downscale: libjpeg decodes at the smallest of 1/2, 1/4, 1/8
+            # that still covers size, so a 640x480 frame for a 320x240 tile costs
+            # a 320x240 decode and no resize
+            image.draft("RGB", size)
+        # Grayscale previews arrive single-channel ('L'); the GUI always gets RGB
+        return image.convert("RGB")
+
+    @staticmethod
+    def _decode_with_cv2(data, size=None):
+        # Only used for WebP, which has no reduced-scale decode: size is ignored
+        # cv2 returns colour frames in BGR order; swap to RGB so WebP previews
+        # match the PIL-decoded JPEG ones
+        import cv2
+        import numpy as np
+        frame = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_UNCHANGED)
+        if frame is None:
+            raise ValueError("cv2 could not decode preview frame")
+        if frame.ndim == 3 and frame.shape[2] == 3:
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        return Image.fromarray(frame).convert("RGB")
+
     def process_video_frame(self, ip, data):
-        """Process incoming video frame with frame buffering instead of queuing"""
+        """Hand an incoming (still compressed) video frame to its decoder, rate limited"""
         try:
-            import io
-            
             # INSTRUMENTATION: Track frames received
             if ip not in self.frames_received:
                 self.frames_received[ip] = 0
@@ -223,19 +546,11 @@ class NetworkManager:
             # Update last frame time
             self.last_frame_time[ip] = current_time
             
-            # Decode image (only if frame passed rate limit)
-            image = Image.open(io.BytesIO(data)).convert("RGB")
-            
-            # Pre-resize based on display mode
-            if is_exclusive:
-                # Exclusive mode: Larger preview (960x720)
-                display_image = image.resize((960, 720), Image.Resampling.BILINEAR)
+            if self.decode_workers:
+                # This camera's worker decodes it; a newer frame replaces it if the worker is busy
+                self.decode_workers.submit(ip, data)
             else:
-                # Grid mode: Standard preview size (320x240)
-                display_image = image.resize((320, 240), Image.Resampling.BILINEAR)
-            
-            # NEW: Buffer frame instead of queuing GUI update
-            self.latest_frames[ip] = display_image
+                self.buffer_frame(ip, data)
             
             # NEW: Start timer if not already running for this camera
             if ip not in self.frame_timers and ip in self.gui.video_labels:
@@ -244,6 +559,35 @@ class NetworkManager:
         except Exception as e:
             logging.error(f"Error processing video frame from {ip}: {e}")
 
+    def buffer_frame(self, ip, data):
+        """Buffer the compressed frame (latest wins); it is decoded only if a display tick takes it"""
+        if self.latest_frames.get(ip) is not None:
+            self.decodes_avoided[ip] = self.decodes_avoided.get(ip, 0) + 1
+        self.latest_frames[ip] = data
+
+    def _decode_worker(self, ip, data):
+        """Decode worker thread for one camera: the display timer only pastes the result"""
+        image = self.decode_for_display(ip, data)
+        if self.latest_frames.get(ip) is not None:
+            self.frames_unshown[ip] = self.frames_unshown.get(ip, 0) + 1
+        self.latest_frames[ip] = image
+
+    def display_size(self, ip):
+        """Size this camera is currently displayed at"""
+        # Exclusive mode: Larger preview (960x720); Grid mode: Standard preview size (320x240)
+        return (960, 720) if getattr(self.gui, 'exclusive_ip', None) == ip else (320, 240)
+
+    def decode_for_display(self, ip, data):
+        """Decode a buffered frame at the size this camera is currently displayed at"""
+        display_size = self.display_size(ip)
+        
+        # Decoded at a reduced scale when the tile is smaller than the frame
+        image = self.decode_frame(ip, data, display_size)
+        if image.size == display_size:
+            # Slave sent (or the decoder scaled to) exactly the demanded size
+            return image
+        return image.resize(display_size, Image.Resampling.BILINEAR)
+
     def _start_frame_timer(self, ip):
         """Start a fixed-interval timer for this camera's updates"""
         is_exclusive = (hasattr(self.gui, 'exclusive_ip') and 
@@ -254,6 +598,37 @@ class NetworkManager:
         timer_id = self.gui.root.after(interval, lambda: self._timer_update_display(ip))
         self.frame_timers[ip] = timer_id
 
+    def take_display_frame(self, ip):
+        """Newest frame for ip as a display-sized RGB image, or None if nothing new arrived"""
+        if self.preview_process:
+            # Decoded by the child process: only copy the tile out of shared memory
+            self.preview_process.set_size(ip, self.display_size(ip))
+            return self.preview_process.read(ip)
+        # Compressed frames are decoded now that they will be shown
+        frame = self.latest_frames.pop(ip, None)
+        return self.decode_for_display(ip, frame) if isinstance(frame, bytes) else frame
+
+    def _timer_update_wall(self):
+        """Composite renderer tick: new frames of all visible cameras, pasted into their tiles only"""
+        wall = self.gui.camera_manager.preview_wall
+        try:
+            for ip in wall.visible():
+                image = self.take_display_frame(ip)
+                if image is not None:
+                    wall.update_tile(ip, image)
+                    self.frames_displayed[ip] = self.frames_displayed.get(ip, 0) + 1
+            wall.render()
+            
+            # Log performance periodically
+            current_time = time.time()
+            if current_time - self.last_perf_log >= 10.0:
+                self._log_performance_metrics()
+                self.last_perf_log = current_time
+        except Exception as e:
+            logging.error(f"Error in composite preview update: {e}")
+        interval = self.exclusive_update_interval if getattr(self.gui, 'exclusive_ip', None) else self.grid_update_interval
+        self.gui.root.after(interval, self._timer_update_wall)
+
     def _timer_update_display(self, ip):
         """Timer-driven display update - runs at fixed interval, not event-driven"""
         try:
@@ -264,9 +639,8 @@ class NetworkManager:
                     del self.frame_timers[ip]
                 return
             
-            # Check if we have a buffered frame
-            if ip in self.latest_frames:
-                pil_image = self.latest_frames[ip]
+            pil_image = self.take_display_frame(ip)
+            if pil_image is not None:
                 
                 # OPTIMIZED: Better PhotoImage reuse to reduce object churn
                 try:
@@ -288,9 +662,7 @@ class NetworkManager:
                     label.config(image=self.photo_images[ip], text="")
                     label.image = self.photo_images[ip]  # Keep reference
                 
-                # Clear the buffer
-                del self.latest_frames[ip]
-                self.frames_displayed[ip] += 1
+                self.frames_displayed[ip] = self.frames_displayed.get(ip, 0) + 1
                 
                 # Log performance periodically
                 current_time = time.time()
@@ -339,14 +711,26 @@ class NetworkManager:
             logging.info(f"[PERF] GUI Performance Metrics (after {elapsed:.1f}s)")
             logging.info("=" * 60)
             
+            if self.preview_process:
+                # Received and decoded in the child: frames it superseded before decoding count as dropped
+                for ip in self.preview_process.ips:
+                    stats = self.preview_process.stats(ip)
+                    if stats['received']:
+                        self.frames_received[ip] = stats['received']
+                        self.frames_dropped[ip] = stats['received'] - stats['decoded']
+                        self.frames_displayed.setdefault(ip, 0)
+            
             total_received = sum(self.frames_received.values())
             total_displayed = sum(self.frames_displayed.values())
             total_dropped = sum(self.frames_dropped.values())
+            total_avoided = sum(self.decodes_avoided.values())
+            if self.decode_workers:
+                total_avoided += sum(self.decode_workers.replaced(ip) for ip in self.frames_received)
             
             if total_received > 0:
                 drop_rate = (total_dropped / total_received) * 100
                 display_rate = (total_displayed / total_received) * 100
-                logging.info(f"[PERF] OVERALL: Received={total_received}, Dropped={total_dropped} ({drop_rate:.1f}%), Displayed={total_displayed} ({display_rate:.1f}%)")
+                logging.info(f"[PERF] OVERALL: Received={total_received}, Dropped={total_dropped} ({drop_rate:.1f}%), Displayed={total_displayed} ({display_rate:.1f}%), Decodes avoided={total_avoided}")
             
             for ip in sorted(self.frames_received.keys()):
                 received = self.frames_received[ip]
@@ -365,15 +749,98 @@ class NetworkManager:
                         last_octet = int(ip.split(".")[-1])
                         device_name = f"rep{last_octet - 200}"
                     
-                    logging.info(f"[PERF] {device_name:5s} ({ip}): {fps:4.1f} FPS | Recv={received:4d} | Dropped={dropped:4d} ({drop_rate:5.1f}%) | Queued={queued:3d} | Skipped={skipped:3d}")
+                    if self.preview_process:
+                        network = self.preview_process.stats(ip)  # No latency: the clock offsets live here
+                    else:
+                        network = self.reassembler.stats(ip) if self.reassembler else {}
+                    lost = network.get('lost', 0)
+                    loss_rate = network.get('loss_rate', 0.0)
+                    late = network.get('late', 0)
+                    
+                    latency = network.get('latency_ms', 0.0)
+                    codec = self.frame_codecs.get(ip, '-')
+                    decoded, decode_seconds = self.decode_stats.get(ip, (0, 0.0))
+                    decode_ms = decode_seconds / decoded * 1000 if decoded else 0.0
+                    avoided = self.decodes_avoided.get(ip, 0)
+                    if self.decode_workers:
+                        avoided += self.decode_workers.replaced(ip)
+                    
+                    logging.info(f"[PERF] {device_name:5s} ({ip}): {fps:4.1f} FPS | Recv={received:4d} | Dropped={dropped:4d} ({drop_rate:5.1f}%) | Lost={lost:4d} ({loss_rate:4.1f}%) | Late={late:3d} | Latency={latency:5.1f}ms | Codec={codec} | Decode={decode_ms:4.1f}ms | Avoided={avoided:4d} | Unshown={self.frames_unshown.get(ip, 0):4d}")
+                    if self.clock_sync:
+                        logging.info(f"[CLOCK] {device_name:5s} ({ip}): {format_estimate(self.clock_estimate(ip))}")
+            
+            wall = getattr(self.gui.camera_manager, 'preview_wall', None)
+            if wall:
+                logging.info(f"[PERF] {wall.format_stats()}")
+            
+            if StillIngestServer and isinstance(self.still_server, StillIngestServer):
+                logging.info(f"[PERF] {self.still_server.format_stats()}")
             
             logging.info("=" * 60)
             
         except Exception as e:
             logging.error(f"Error logging performance metrics: {e}")
 
+    def clock_offset(self, ip):
+        """Seconds the device's clock is ahead of ours (0.0 until measured)"""
+        return self.clock_sync.offset(ip) if self.clock_sync else 0.0
+
+    def clock_estimate(self, ip):
+        """{'offset', 'drift_ppm', 'delay', 'samples', 'age'} for a device, None until it answers"""
+        return self.clock_sync.estimate(ip) if self.clock_sync else None
+
+    def to_master_time(self, ip, device_time):
+        return self.clock_sync.to_master_time(ip, device_time) if self.clock_sync else device_time
+
+    def to_device_time(self, ip, master_time):
+        return self.clock_sync.to_device_time(ip, master_time) if self.clock_sync else master_time
+
+    def format_clock_offsets(self, ips):
+        """One line per device: measured offset from our clock"""
+        if not self.clock_sync:
+            return "Clock offsets not measured"
+        from config.settings import device_names
+        return "\n".join(f"{device_names.get(ip, ip)}: {format_estimate(self.clock_estimate(ip))}" for ip in ips)
+
+    def start_capture_set(self, ips):
+        """
+        Per-camera commands (ip -> command) that fire every camera at the same instant;
+        each fire time is translated to that camera's clock. CAPTURE_STILL if sync is off.
+        """
+        if not self.capture_sets:
+            return {ip: "CAPTURE_STILL" for ip in ips}
+        from config.settings import device_names
+        for report in self.capture_sets.expire():
+            logging.warning(f"[SYNC] {format_report(report)}")
+        capture_id = new_capture_id()
+        fire_time = time.time() + STILL_SYNC_LEAD_TIME
+        self.capture_sets.start(capture_id, fire_time, [device_names.get(ip, ip) for ip in ips])
+        logging.info(f"[SYNC] Capture {capture_id}: {len(ips)} cameras fire in {STILL_SYNC_LEAD_TIME:.1f}s")
+        return {ip: format_capture_at_command(capture_id, self.to_device_time(ip, fire_time)) for ip in ips}
+
+    def _record_capture(self, ip, device_name, info):
+        """Log the inter-camera skew once every camera of a capture set has delivered"""
+        if not info or not info.get('capture_id'):
+            return
+        sensor_time = info.get('sensor_time')
+        if sensor_time is not None:
+            sensor_time = self.to_master_time(ip, sensor_time)  # Compare on one clock
+        report = self.capture_sets.record(info['capture_id'], device_name, sensor_time)
+        if report:
+            logging.info(f"[SYNC] {format_report(report)}")
+
     def still_receiver(self):
         """Receive still images"""
+        if StillIngestServer and read_still_header:
+            try:
+                self.still_server = StillIngestServer(config.STILL_PORT, self.still_destination, self._still_ingested,
+                                                      max_uploads=STILL_INGEST_MAX_UPLOADS,
+                                                      queue_chunks=STILL_INGEST_QUEUE_CHUNKS)
+                self.still_server.serve_forever()
+            except Exception as e:
+                logging.error(f"Still receiver setup error: {e}")
+            return
+        
         try:
             self.still_server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             self.still_server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
@@ -393,96 +860,147 @@ class NetworkManager:
         except Exception as e:
             logging.error(f"Still receiver setup error: {e}")
 
+    def still_destination(self, ip, header):
+        """(filename, (device_name, timestamp)) for an upload, filed by the GUI's name for ip and sensor time"""
+        from config.settings import device_names
+        device_name = device_names.get(ip, ip)  # User-editable names; capture sets track by these too
+        reported = (header or {}).get('device')
+        if reported and reported != device_name:
+            logging.debug(f"Still from {ip} (slave reports {reported}) filed as {device_name}")
+        sensor_time = (header or {}).get('sensor_time')
+        when = self.to_master_time(ip, sensor_time) if sensor_time else time.time()
+        filename, timestamp = self.still_path(device_name, when)
+        return filename, (device_name, timestamp)
+
+    def _still_ingested(self, upload):
+        """Still ingest callback (disk-writer thread): the upload is verified and on disk"""
+        device_name, timestamp = upload['context']
+        info = upload['header']
+        if info is None and self.capture_sets:
+            with open(upload['path'], "rb") as f:
+                info = read_capture_info(f.read(65536))  # Legacy upload: COM segment only
+        self.still_saved(upload['ip'], device_name, upload['path'], timestamp, info)
+
     def handle_still_connection(self, conn, addr):
-        """Handle still image connection"""
+        """Handle still image connection: framed uploads stream straight to disk"""
+        ip = addr[0]
         try:
-            ip = addr[0]
-            data = b""
             conn.settimeout(30.0)
+            if read_still_header is None:
+                data = bytearray()
+                while True:
+                    chunk = conn.recv(65536)
+                    if not chunk:
+                        break
+                    data += chunk
+                if data and self.gui.gallery_panel:
+                    self.save_and_display_still(ip, bytes(data))
+                return
             
-            while True:
-                chunk = conn.recv(8192)
-                if not chunk:
-                    break
-                data += chunk
-                
-            conn.close()
+            header, initial = read_still_header(conn)
+            if not initial and header is None:
+                return  # Connected and closed without sending anything
+            filename, (device_name, timestamp) = self.still_destination(ip, header)
             
-            if data and self.gui.gallery_panel:
-                self.save_and_display_still(ip, data)
-                
+            start = time.time()
+            size = receive_still_to_file(conn, filename, header, initial)
+            elapsed = max(time.time() - start, 1e-6)
+            
+            info = header
+            if info is None and self.capture_sets:
+                with open(filename, "rb") as f:
+                    info = read_capture_info(f.read(65536))  # Legacy upload: COM segment only
+            logging.info(f"Received still from {device_name}: {size / 1e6:.1f}MB in {elapsed * 1000:.0f}ms"
+                         f"{' (legacy, unchecked)' if header is None else ''}")
+            self.still_saved(ip, device_name, filename, timestamp, info)
+        except StillTransferError as e:
+            logging.error(f"Rejected still from {ip}: {e}")
+        except Exception as e:
+            logging.error(f"Error handling still from {ip}: {e}")
+        finally:
+            conn.close()
+
+    def still_path(self, device_name, when=None):
+        """(filename, timestamp) for a still taken at 'when', in the dated capture directory"""
+        import os
+        import platform
+        now = datetime.fromtimestamp(when) if when else datetime.now()
+        timestamp = now.strftime("%Y%m%d_%H%M%S")
+        date_str = now.strftime("%Y-%m-%d")
+        
+        # Create dated directory structure for Pi environment  
+        # Check if we're on a Pi (Linux) or development machine (macOS)
+        if platform.system() == "Darwin":  # macOS development
+            base_path = os.path.expanduser("~/Desktop/captured_images")
+        else:  # Linux Pi environment
+            base_path = "/home/andrc1/Desktop/captured_images"
+            # Ensure base directory exists on Pi
+            os.makedirs(base_path, exist_ok=True)
+        
+        daily_capture_dir = os.path.join(base_path, date_str, device_name)
+        
+        # Enhanced directory creation with verification
+        try:
+            os.makedirs(daily_capture_dir, exist_ok=True)
+            # Verify directory is writable
+            if not os.access(daily_capture_dir, os.W_OK):
+                raise OSError(f"Directory not writable: {daily_capture_dir}")
+            logging.info(f"Directory ready: {daily_capture_dir}")
         except Exception as e:
-            logging.error(f"Error handling still from {addr[0]}: {e}")
+            logging.error(f"Directory creation failed: {e}")
+            # Use fallback
+            fallback_dir = os.path.join("/tmp", "camera_fallback", device_name)
+            os.makedirs(fallback_dir, exist_ok=True)
+            daily_capture_dir = fallback_dir
+            logging.warning(f"Using fallback directory: {fallback_dir}")
+        
+        # Milliseconds keep a second still from one camera in the same second from replacing the first
+        return os.path.join(daily_capture_dir, f"{timestamp}_{now.microsecond // 1000:03d}.jpg"), timestamp
 
     def save_and_display_still(self, ip, data):
-        """Save still image to Desktop with dated directories"""
+        """Save still image bytes to Desktop with dated directories"""
         try:
             from config.settings import device_names
-            import os
-            from datetime import datetime
-            
-            # Get device name
             device_name = device_names.get(ip, ip)
-            now = datetime.now()
-            timestamp = now.strftime("%Y%m%d_%H%M%S")
-            date_str = now.strftime("%Y-%m-%d")
-            
-            # Create dated directory structure for Pi environment  
-            # Check if we're on a Pi (Linux) or development machine (macOS)
-            import platform
-            if platform.system() == "Darwin":  # macOS development
-                base_path = os.path.expanduser("~/Desktop/captured_images")
-            else:  # Linux Pi environment
-                base_path = "/home/andrc1/Desktop/captured_images"
-                # Ensure base directory exists on Pi
-                os.makedirs(base_path, exist_ok=True)
-            
-            daily_capture_dir = os.path.join(base_path, date_str, device_name)
-            
-            # Enhanced directory creation with verification
-            try:
-                os.makedirs(daily_capture_dir, exist_ok=True)
-                # Verify directory is writable
-                if not os.access(daily_capture_dir, os.W_OK):
-                    raise OSError(f"Directory not writable: {daily_capture_dir}")
-                logging.info(f"Directory ready: {daily_capture_dir}")
-            except Exception as e:
-                logging.error(f"Directory creation failed: {e}")
-                # Use fallback
-                fallback_dir = os.path.join("/tmp", "camera_fallback", device_name)
-                os.makedirs(fallback_dir, exist_ok=True)
-                daily_capture_dir = fallback_dir
-                logging.warning(f"Using fallback directory: {fallback_dir}")
-            
-            filename = os.path.join(daily_capture_dir, f"{timestamp}.jpg")
+            filename, timestamp = self.still_path(device_name)
             
             with open(filename, "wb") as f:
                 f.write(data)
             
-            # Add to gallery using scheduled timer to avoid blocking
-            if self.gui.gallery_panel:
-                # OPTIMIZED: Batch gallery updates to prevent event queue saturation
-                if not hasattr(self, '_gallery_update_queue'):
-                    self._gallery_update_queue = []
-                    self._gallery_update_pending = False
-                
-                # Queue the update
-                self._gallery_update_queue.append((filename, device_name, timestamp))
-                
-                # Schedule batch update if not already pending
-                if not self._gallery_update_pending:
-                    self._gallery_update_pending = True
-                    # Process gallery updates in batches every 250ms
-                    self.gui.root.after(250, self._process_gallery_batch)
-                
-                # Notify GUI with minimal delay
-                self.gui.root.after(10, self.gui.on_image_received)
-            
-            logging.info(f"Saved image from {device_name}: {filename}")
+            info = read_capture_info(data) if self.capture_sets else None
+            self.still_saved(ip, device_name, filename, timestamp, info)
             
         except Exception as e:
             logging.error(f"Error saving still image: {e}")
 
+    def still_saved(self, ip, device_name, filename, timestamp, info=None):
+        """A still is complete on disk: record it in its capture set and show it in the gallery"""
+        if self.capture_sets:
+            self._record_capture(ip, device_name, info)
+        if getattr(self.gui, 'cadence', None):
+            self.gui.cadence.delivered(ip)  # Frees a slot in this camera's cadence queue
+        
+        # Add to gallery using scheduled timer to avoid blocking
+        if self.gui.gallery_panel:
+            # OPTIMIZED: Batch gallery updates to prevent event queue saturation
+            if not hasattr(self, '_gallery_update_queue'):
+                self._gallery_update_queue = []
+                self._gallery_update_pending = False
+            
+            # Queue the update
+            self._gallery_update_queue.append((filename, device_name, timestamp))
+            
+            # Schedule batch update if not already pending
+            if not self._gallery_update_pending:
+                self._gallery_update_pending = True
+                # Process gallery updates in batches every 250ms
+                self.gui.root.after(250, self._process_gallery_batch)
+            
+            # Notify GUI with minimal delay
+            self.gui.root.after(10, self.gui.on_image_received)
+        
+        logging.info(f"Saved image from {device_name}: {filename}")
+
     def _process_gallery_batch(self):
         """Process batched gallery updates to prevent event queue saturation"""
         try:
@@ -519,15 +1037,73 @@ class NetworkManager:
                 try:
                     data, addr = sock.recvfrom(1024)
                     ip = addr[0]
-                    if data.decode().strip() == "HEARTBEAT":
-                        self.active_heartbeats[ip] = time.time()
+                    message = data.decode().strip()
+                    if message.startswith("CAPTURE_STATUS"):
+                        self._on_capture_status(self._device_ip(ip), message)
+                    elif message == "HEARTBEAT":
+                        now = time.time()
+                        was_alive = (now - self.active_heartbeats.get(ip, 0)) < 10
+                        self.active_heartbeats[ip] = now
                         logging.debug(f"Heartbeat from {ip}")
+                        if not was_alive:
+                            # Slave (re)started - it has forgotten its preview demand
+                            self._announce_to_heartbeat_source(ip)
                 except Exception as e:
                     logging.error(f"Heartbeat listener error: {e}")
                     
         except Exception as e:
             logging.error(f"Heartbeat listener setup error: {e}")
 
+    def _device_ip(self, ip):
+        """Configured IP of the device a slave-to-master datagram came from"""
+        if ip in ("localhost", getattr(config, 'MASTER_IP', None)):
+            return "127.0.0.1"  # rep8 sends from the master's own address
+        return ip
+
+    def _announce_to_heartbeat_source(self, ip):
+        """Re-send the preview demand to a slave whose heartbeat just (re)appeared"""
+        ip = self._device_ip(ip)
+        if ip in [slave["ip"] for slave in config.SLAVES.values()]:
+            self.announce_preview_demands([ip], force=True)
+
+    def _on_capture_status(self, ip, message):
+        """A slave's capture worker reported queued/coalesced/rejected/running/done/failed"""
+        parsed = parse_capture_status(message) if parse_capture_status else None
+        if not parsed:
+            return
+        request_id, status, depth = parsed
+        self.capture_status[ip] = (request_id, status, depth, time.time())
+        from config.settings import device_names
+        log = logging.warning if status in ('rejected', 'failed') else logging.info
+        log(f"[CAPTURE] {device_names.get(ip, ip)}: {request_id} {status} (queue depth {depth})")
+        if status in ('done', 'coalesced', 'rejected'):
+            if depth and status != 'done':
+                return  # The worker is still busy with an earlier request
+            state = "QUEUED" if depth else None  # None: show the pre-capture state
+        else:
+            state = {'queued': "QUEUED", 'running': "CAPTURING", 'failed': "ERROR"}.get(status)
+            if not state:
+                return
+        
+        # Batch label updates for the Tk thread (newest per camera wins), as the gallery does
+        with self._capture_state_lock:
+            self._capture_state_queue[ip] = state
+            schedule = not self._capture_state_pending
+            self._capture_state_pending = True
+        if schedule:
+            self.gui.root.after(10, self._process_capture_states)
+
+    def _process_capture_states(self):
+        """Tk thread: apply the camera labels queued by capture status reports"""
+        with self._capture_state_lock:
+            self._capture_state_pending = False
+            updates, self._capture_state_queue = self._capture_state_queue, {}
+        for ip, state in updates.items():
+            if state is None:
+                self.gui.capture_finished(ip)
+            else:
+                self.gui.update_camera_state(ip, state)
+
     def heartbeat_monitor(self):
         """Monitor heartbeat status and update GUI"""
         while True:
@@ -571,14 +1147,20 @@ class NetworkManager:
                 # Detect stall if heartbeat delayed > 300ms (expected 200ms)
                 if elapsed > 0.3:
                     self.heartbeat_stalls += 1
+                    self.heartbeat_worst = max(self.heartbeat_worst, elapsed)
                     logging.warning(f"GUI heartbeat stall detected: {elapsed:.3f}s delay (stalls: {self.heartbeat_stalls})")
                 
                 self.heartbeat_count += 1
                 self.last_heartbeat = current_time
                 
-                # Log heartbeat health every 30 seconds
+                # Log heartbeat health every 30 seconds, with the preview mode so runs with and
+                # without VIDEO_PREVIEW_PROCESS can be compared
                 if self.heartbeat_count % 150 == 0:
-                    logging.info(f"GUI heartbeat: {self.heartbeat_count} ticks, {self.heartbeat_stalls} stalls")
+                    minutes = self.heartbeat_count * self.heartbeat_interval / 60000
+                    mode = "child process" if self.preview_process else "GUI process"
+                    logging.info(f"GUI heartbeat: {self.heartbeat_count} ticks, {self.heartbeat_stalls} stalls "
+                                 f"({self.heartbeat_stalls / minutes:.1f}/min, worst {self.heartbeat_worst:.3f}s), "
+                                 f"previews decoded in the {mode}")
                 
                 # Schedule next heartbeat
                 self.gui.root.after(self.heartbeat_interval, heartbeat_tick)
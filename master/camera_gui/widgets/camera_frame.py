@@ -9,6 +9,12 @@ import time
 
 from config.settings import config, device_names
 
+# Composite renderer: all previews on one canvas, one display timer (widgets/preview_wall.py)
+try:
+    from shared.config import VIDEO_COMPOSITE_PREVIEW
+except ImportError:
+    VIDEO_COMPOSITE_PREVIEW = False
+
 
 class CameraFrame:
     """Individual camera display frame"""
@@ -139,9 +145,22 @@ class CameraFrameManager:
     def __init__(self, gui):
         self.gui = gui
         self.camera_frames = {}
+        self.preview_wall = None  # Set when previews are composited onto one canvas
 
     def setup_camera_grid(self, parent_frame):
         """Setup grid of camera frames"""
+        if VIDEO_COMPOSITE_PREVIEW:
+            try:
+                self.setup_preview_wall(parent_frame)
+                return
+            except Exception as e:
+                logging.error(f"Composite preview unavailable, using one label per camera: {e}")
+                if self.preview_wall:
+                    self.preview_wall.canvas.destroy()
+                self.preview_wall = None
+                self.camera_frames.clear()
+                self.gui.slave_frames.clear()
+        
         logging.info("Setting up camera grid for 8 cameras (2x4)")
         
         # Configure grid weights for proper sizing
@@ -163,14 +182,24 @@ class CameraFrameManager:
             # Also store by name in gui.slave_frames for keyboard shortcuts
             self.gui.slave_frames[name] = camera_frame.frame
 
+    def setup_preview_wall(self, parent_frame):
+        """All cameras on one canvas: a strip and a preview tile per camera"""
+        from widgets.preview_wall import PreviewWall, WallCameraFrame
+        logging.info(f"Setting up composite preview for {len(config.SLAVES)} cameras")
+        self.preview_wall = PreviewWall(self.gui, parent_frame)
+        for name, slave_info in config.SLAVES.items():
+            ip = slave_info["ip"]
+            camera_frame = WallCameraFrame(self.gui, ip, name, self.preview_wall)
+            self.camera_frames[ip] = camera_frame
+            self.gui.slave_frames[name] = camera_frame.frame
+        self.preview_wall.show_all()
+
     def start_all_streams(self):
         """Start all camera streams"""
         logging.info("Starting all camera streams")
-        for ip in self.camera_frames.keys():
-            self.gui.network_manager.send_command(ip, "START_STREAM")
-            # Send START_STREAM twice for rep8 to ensure it starts
-            if ip == "127.0.0.1":
-                self.gui.network_manager.send_command(ip, "START_STREAM")
+        # One datagram for every camera; cameras that don't acknowledge get it by unicast,
+        # which replaces sending rep8 a second START_STREAM "to ensure it starts"
+        self.gui.network_manager.send_to_all({ip: "START_STREAM" for ip in self.camera_frames})
             
     def get_camera_frame(self, ip):
         """Get camera frame by IP"""
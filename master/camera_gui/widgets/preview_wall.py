@@ -0,0 +1,113 @@
+"""
+Composite preview renderer - every camera on one canvas, only changed tiles pushed to Tk
+"""
+
+import tkinter as tk
+from tkinter import ttk
+import time
+
+from PIL import ImageTk
+
+from config.settings import config
+from shared.tile_compositor import TileCompositor
+from widgets.camera_frame import CameraFrame
+
+STRIP_HEIGHT = 58           # Name/state/heartbeat row plus the Capture/Options buttons
+GRID_TILE_SIZE = (320, 240)
+EXCLUSIVE_TILE_SIZE = (960, 720)
+
+
+class WallCameraFrame(CameraFrame):
+    """Camera header and buttons as a strip on the wall; the video is the camera's tile on the same canvas"""
+
+    def __init__(self, parent_gui, ip, name, wall):
+        self.wall = wall
+        super().__init__(parent_gui, ip, name, wall.canvas, 0, 0)
+
+    def create_frame(self, canvas, row, col):
+        """Create the header/controls strip (placed by the wall, not gridded)"""
+        self.frame = ttk.Frame(canvas, style="Slave.TFrame")
+        self.frame.grid_columnconfigure(0, weight=1)
+        self.create_header()
+        self.create_controls()
+        self.wall.add_camera(self.ip, self.frame)
+
+
+class PreviewWall:
+    """One canvas for all cameras, a tile-sized image item per camera; only tiles with a new frame are pasted"""
+
+    def __init__(self, gui, parent_frame):
+        self.gui = gui
+        self.canvas = tk.Canvas(parent_frame, bg="gray20", highlightthickness=0)
+        self.canvas.grid(row=0, column=0, rowspan=config.NUM_ROWS, columnspan=config.NUM_COLS, sticky="nsew")
+        self.compositor = TileCompositor(GRID_TILE_SIZE, config.NUM_COLS, header=STRIP_HEIGHT)
+        self.strips = {}            # ip -> canvas window item of the camera's strip
+        self.tiles = {}             # ip -> canvas image item of the camera's preview
+        self.photos = {}            # ip -> PhotoImage of the current tile size
+        self.order = []
+
+        # Metrics (Tk side: PhotoImage pastes only)
+        self.pastes = 0
+        self.paste_seconds = 0.0
+        self.paste_pixels = 0
+        self.started = time.perf_counter()
+
+    def add_camera(self, ip, strip):
+        self.order.append(ip)
+        self.strips[ip] = self.canvas.create_window(0, 0, window=strip, anchor="nw", state="hidden")
+        self.tiles[ip] = self.canvas.create_image(0, 0, anchor="nw", state="hidden")
+
+    def show_all(self):
+        """Grid of every camera"""
+        self._layout(self.order, GRID_TILE_SIZE, config.NUM_COLS)
+
+    def show_exclusive(self, ip):
+        """One camera, enlarged"""
+        self._layout([ip], EXCLUSIVE_TILE_SIZE, 1)
+
+    def visible(self):
+        return list(self.compositor.positions)
+
+    def _layout(self, ips, tile_size, columns):
+        self.compositor.layout(ips, tile_size, columns)
+        for ip in self.order:
+            strip, tile = self.strips[ip], self.tiles[ip]
+            if ip in self.compositor.positions:
+                x, y = self.compositor.positions[ip]
+                self.canvas.coords(strip, x, y - STRIP_HEIGHT)
+                self.canvas.itemconfigure(strip, width=tile_size[0], height=STRIP_HEIGHT, state="normal")
+                self.canvas.coords(tile, x, y)
+                photo = self.photos.get(ip)
+                if photo is None or (photo.width(), photo.height()) != tuple(tile_size):
+                    # Blank (transparent) until the camera's next frame arrives
+                    photo = self.photos[ip] = ImageTk.PhotoImage("RGB", tile_size)
+                self.canvas.itemconfigure(tile, image=photo, state="normal")
+            else:
+                self.canvas.itemconfigure(strip, state="hidden")
+                self.canvas.itemconfigure(tile, state="hidden")
+
+    def update_tile(self, ip, image):
+        self.compositor.update(ip, image)
+
+    def render(self):
+        """Paste the tiles with a new frame into their PhotoImages; returns the number of tiles pushed"""
+        changed = self.compositor.compose()
+        if not changed:
+            return 0
+        start = time.perf_counter()
+        for ip, image in changed.items():
+            self.photos[ip].paste(image)
+        self.pastes += len(changed)
+        self.paste_seconds += time.perf_counter() - start
+        self.paste_pixels += len(changed) * self.compositor.tile_size[0] * self.compositor.tile_size[1]
+        return len(changed)
+
+    def format_stats(self):
+        """Compositor counters plus the Tk paste cost since the last call (ms and pixels per second)"""
+        now = time.perf_counter()
+        elapsed = max(now - self.started, 1e-6)
+        paste_ms = self.paste_seconds / self.pastes * 1000 if self.pastes else 0.0
+        text = (f"{self.compositor.format_stats()}, Tk {self.paste_seconds * 1000 / elapsed:.1f}ms/s "
+                f"({self.paste_pixels / elapsed / 1e6:.2f}M px/s, {paste_ms:.2f}ms per tile)")
+        self.pastes, self.paste_seconds, self.paste_pixels, self.started = 0, 0.0, 0, now
+        return text
@@ -15,11 +15,11 @@ from PIL import Image
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 try:
-    from picamera2 import Picamera2
+    from shared.camera_backend import create_camera_backend
     from shared.transforms import apply_unified_transforms, get_device_name_from_ip
 except ImportError as e:
     print(f"Error: Missing dependencies: {e}")
-    print("This script requires picamera2 and the shared transforms module")
+    print("This script requires the shared camera backend and transforms modules")
     sys.exit(1)
 
 def capture_preview_frame(output_path):
@@ -29,7 +29,7 @@ def capture_preview_frame(output_path):
         print(f"Capturing preview frame for device: {device_name}")
         
         # Initialize camera for preview (lower resolution like video stream)
-        picam2 = Picamera2()
+        picam2 = create_camera_backend()
         
         # Use preview configuration similar to video stream
         preview_config = picam2.create_preview_configuration(
@@ -39,8 +39,7 @@ def capture_preview_frame(output_path):
         picam2.start()
         
         # Let camera settle
-        import time
-        time.sleep(1)
+        picam2.settle(1.0)
         
         # Capture frame
         frame = picam2.capture_array()
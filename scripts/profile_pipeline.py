@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Profile Preview Pipeline Script
+Runs the slave preview pipeline (capture → transform → JPEG encode → UDP send)
+against any camera backend and reports per-stage timings.
+Works without a camera: --backend synthetic or --backend replay --replay-dir DIR
+"""
+
+import argparse
+import sys
+import os
+import time
+import socket
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shared.camera_backend import create_camera_backend
+from shared.transforms import get_transform_plan, load_device_settings
+from shared.video_pipeline import VideoPipeline
+from shared.video_framing import FrameSender, camera_id_from_name
+from shared.rate_control import JpegRateController
+from shared.preview_demand import PreviewDemand, parse_demand_command, frame_budget
+from shared.change_detect import ChangeDetector
+from shared.preview_codecs import create_preview_codec
+
+def profile_pipeline(backend, device_name, frames, size, fps, quality, target, replay_dir=None,
+                     threaded=True, encoder_workers=1, max_frame_age=None, target_bytes=0, demand=None,
+                     skip_unchanged=False, codec='jpeg', subsampling='420'):
+    """Run the slave preview pipeline until `frames` frames are sent; return its stats"""
+    options = {'fps': fps}
+    if backend == 'replay':
+        options['directory'] = replay_dir
+    camera = create_camera_backend(backend, **options)
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    settings = load_device_settings(device_name)
+    pipeline = None
+    bytes_sent = [0]
+
+    encoder = create_preview_codec(codec, subsampling)
+    rate_controller = JpegRateController(target_bytes, max_quality=quality, codec=encoder) if target_bytes else None
+    preview_demand = PreviewDemand(*demand) if demand else PreviewDemand()
+    change_detector = ChangeDetector() if skip_unchanged else None
+
+    def capture_frame():
+        if not preview_demand.pace(pipeline.is_running):
+            return None
+        return camera.capture_array()
+
+    def encode_frame(frame):
+        plan = get_transform_plan(device_name, settings, frame.shape, 'RGB_OR_GRAY')
+        frame = preview_demand.fit(plan.apply(frame, reuse_buffers=True))
+        if change_detector and not change_detector.should_send(frame):
+            return None
+        if rate_controller:
+            rate_controller.target_bytes = frame_budget(target_bytes, frame)
+            return rate_controller.encode(frame)
+        return encoder.encode(frame, quality)
+
+    sender = FrameSender(sock, target, camera_id_from_name(device_name))
+
+    def send_frame(data, capture_time):
+        try:
+            sender.send(data, capture_time)
+        except socket.error:
+            pass  # Oversized or unreachable - still counts the attempt
+        bytes_sent[0] += len(data)
+
+    try:
+        config = camera.create_video_configuration(
+            main={"size": size, "format": "RGB888"},
+            controls={"FrameRate": fps}
+        )
+        camera.configure(config)
+        camera.start()
+        camera.settle(2.0)
+
+        pipeline = VideoPipeline(capture_frame, encode_frame, send_frame,
+                                 name=device_name, threaded=threaded,
+                                 encoder_workers=encoder_workers, max_frame_age=max_frame_age)
+        start_cpu, start_wall = time.process_time(), time.perf_counter()
+        pipeline.start()
+        while pipeline.is_running() and pipeline.timers['send'].count < frames:
+            time.sleep(0.01)
+        stats = pipeline.stats()
+        stats['cpu_load'] = (time.process_time() - start_cpu) / (time.perf_counter() - start_wall)
+        stats['unchanged'] = change_detector.format_stats() if change_detector else None
+    finally:
+        if pipeline:
+            pipeline.stop()
+        camera.stop()
+        camera.close()
+        sock.close()
+
+    sent = stats['send']['count']
+    stats['bytes_per_frame'] = bytes_sent[0] / sent if sent else 0
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile the slave preview pipeline")
+    parser.add_argument("--backend", default="synthetic", help="picamera2, synthetic or replay")
+    parser.add_argument("--replay-dir", default="", help="Directory of frames for --backend replay")
+    parser.add_argument("--device", default="rep1", help="Device whose settings/transforms to use")
+    parser.add_argument("--frames", type=int, default=300, help="Frames to process")
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--fps", type=float, default=0, help="Source frame rate (0 = as fast as possible)")
+    parser.add_argument("--quality", type=int, default=35, help="JPEG quality (ceiling with --target-bytes)")
+    parser.add_argument("--target-bytes", type=int, default=0, help="Rate-control frames to this size (0 = fixed quality)")
+    parser.add_argument("--serial", action="store_true", help="Run stages in one thread (old loop)")
+    parser.add_argument("--workers", default="1", help="Encoder worker counts to compare, e.g. 1,2,4")
+    parser.add_argument("--max-age", type=float, default=None, help="Drop frames older than this (s)")
+    parser.add_argument("--target", default="127.0.0.1:5999", help="UDP host:port to send frames to")
+    parser.add_argument("--codec", default="jpeg", help="Preview codec: jpeg, turbojpeg or webp")
+    parser.add_argument("--subsampling", default="420", help="JPEG chroma subsampling: 420, 422 or 444")
+    parser.add_argument("--skip-unchanged", action="store_true", help="Skip encoding frames that did not change")
+    parser.add_argument("--demand", default="", help="Preview demand as FPS_WxH, e.g. 4_320x240 (grid view)")
+    args = parser.parse_args()
+
+    demand = None
+    if args.demand:
+        demand = parse_demand_command("SET_PREVIEW_DEMAND_" + args.demand)
+        if demand is None:
+            parser.error(f"Invalid --demand: {args.demand}")
+
+    host, port = args.target.rsplit(":", 1)
+    mode = "serial" if args.serial else "threaded"
+    print(f"Backend: {args.backend}  mode: {mode}  frames: {args.frames}  size: {args.width}x{args.height}")
+
+    for workers in [int(n) for n in args.workers.split(",")]:
+        stats = profile_pipeline(args.backend, args.device, args.frames, (args.width, args.height),
+                                 args.fps, args.quality, (host, int(port)), args.replay_dir,
+                                 threaded=not args.serial, encoder_workers=workers,
+                                 max_frame_age=args.max_age, target_bytes=args.target_bytes,
+                                 demand=demand, skip_unchanged=args.skip_unchanged,
+                                 codec=args.codec, subsampling=args.subsampling)
+
+        print(f"Encoder workers: {stats['encoder_workers']}")
+        for name in ('capture', 'process', 'send', 'latency'):
+            print(f"  {name:<10} avg {stats[name]['avg_ms']:7.3f} ms  max {stats[name]['max_ms']:7.3f} ms")
+        print(f"  Throughput: {stats['fps']:.1f} fps, {stats['bytes_per_frame']:.0f} bytes/frame, "
+              f"dropped {stats['dropped']}, stale {stats['stale']}, per worker {stats['worker_frames']}")
+        print(f"  CPU: {stats['cpu_load'] * 100:.0f}% of one core")
+        if stats['unchanged']:
+            print(f"  Change detection: {stats['unchanged']}")
+
+if __name__ == "__main__":
+    main()
@@ -9,17 +9,16 @@ import sys
 import os
 import cv2
 import numpy as np
-import time
 
 # Add project root to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 try:
-    from picamera2 import Picamera2
+    from shared.camera_backend import create_camera_backend
     from shared.transforms import apply_unified_transforms_for_still, get_device_name_from_ip, load_device_settings
 except ImportError as e:
     print(f"Error: Missing dependencies: {e}")
-    print("This script requires picamera2 and the shared transforms module")
+    print("This script requires the shared camera backend and transforms modules")
     sys.exit(1)
 
 def build_camera_controls(settings):
@@ -53,7 +52,7 @@ def trigger_capture(output_path):
         print(f"Capturing still image for device: {device_name}")
         
         # Initialize camera for high resolution still capture
-        picam2 = Picamera2()
+        picam2 = create_camera_backend()
         
         # Configure for maximum resolution still
         still_config = picam2.create_still_configuration(
@@ -64,7 +63,7 @@ def trigger_capture(output_path):
         picam2.start()
         
         # Let camera settle
-        time.sleep(1)
+        picam2.settle(1.0)
         
         # Capture full resolution image
         image_array = picam2.capture_array()
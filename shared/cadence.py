@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Cadence - continuous capture-all on a fixed period (or a pedal/key trigger)
+Digitization sessions are hundreds of capture sets; instead of waiting for
+each set to be fully delivered, the master fires the next one on schedule
+while the previous set is still uploading (slaves upload in the background,
+see upload_queue.py). A camera may have at most max_in_flight sets captured
+but not yet delivered - one exposing, one uploading by default - and the
+cadence waits rather than piling more onto a camera that is behind.
+
+The controller is plain bookkeeping driven by the GUI's timer: due() says
+when a set is scheduled, blocked() which cameras are still busy, sent() and
+delivered() track every set until all of its stills have arrived.
+"""
+
+import time
+import threading
+from collections import deque
+
+DEFAULT_INTERVAL = 5.0          # Seconds between capture sets (0: trigger only)
+DEFAULT_MAX_IN_FLIGHT = 2       # Sets per camera captured but not yet delivered
+DEFAULT_SET_TIMEOUT = 60.0      # Sets still incomplete after this are given up
+RATE_WINDOW = 60.0              # Seconds of completed sets behind sets/minute
+
+
+class CadenceController:
+    """Schedules capture sets and tracks each camera's undelivered sets"""
+
+    def __init__(self, interval=DEFAULT_INTERVAL, max_in_flight=DEFAULT_MAX_IN_FLIGHT,
+                 set_timeout=DEFAULT_SET_TIMEOUT):
+        self.interval = interval
+        self.max_in_flight = max_in_flight
+        self.set_timeout = set_timeout
+        self.running = False
+        self.next_fire = None
+        self.started = None
+        self._in_flight = deque()       # {'ips': set of cameras still owed, 'sent': time}
+        self._completed = deque()       # Completion times within RATE_WINDOW
+        self._lock = threading.Lock()
+        self._stalled_slot = False
+
+        # Counters for the whole session
+        self.sets_sent = 0
+        self.sets_completed = 0
+        self.sets_expired = 0
+        self.stalls = 0                 # Scheduled sets delayed by a camera at max_in_flight
+
+    # --- Schedule ---
+
+    def start(self, now=None):
+        now = time.time() if now is None else now
+        self.running = True
+        self.started = now
+        self.next_fire = now
+        self._completed.clear()
+
+    def stop(self):
+        self.running = False
+        self.next_fire = None
+
+    def due(self, now=None):
+        """True when the periodic schedule wants a set (never in trigger-only mode)"""
+        now = time.time() if now is None else now
+        return self.running and bool(self.interval) and now >= self.next_fire
+
+    def blocked(self, ips):
+        """Cameras that already have max_in_flight undelivered sets"""
+        with self._lock:
+            return [ip for ip in ips if self._depth(ip) >= self.max_in_flight]
+
+    def stall(self):
+        """A due set is waiting on a busy camera (counted once per scheduled slot)"""
+        if not self._stalled_slot:
+            self._stalled_slot = True
+            self.stalls += 1
+
+    def sent(self, ips, now=None):
+        """A capture set went out to these cameras"""
+        now = time.time() if now is None else now
+        with self._lock:
+            self._in_flight.append({'ips': set(ips), 'sent': now})
+        self.sets_sent += 1
+        self._stalled_slot = False
+        if self.started is None:
+            self.started = now  # Trigger-only sessions are timed from their first set
+        if self.running and self.interval:
+            # Keep the period; slots missed while stalled are dropped, not fired in a burst
+            self.next_fire += self.interval
+            if self.next_fire <= now:
+                self.next_fire = now + self.interval
+
+    # --- Delivery ---
+
+    def delivered(self, ip, now=None):
+        """A still arrived from ip: it belongs to that camera's oldest undelivered set"""
+        now = time.time() if now is None else now
+        with self._lock:
+            for capture_set in self._in_flight:
+                if ip in capture_set['ips']:
+                    capture_set['ips'].discard(ip)
+                    break
+            self._pop_finished(now)
+
+    def expire(self, now=None):
+        """Give up on sets older than set_timeout; returns the cameras they were still waiting for"""
+        now = time.time() if now is None else now
+        missing = []
+        with self._lock:
+            while self._in_flight and now - self._in_flight[0]['sent'] >= self.set_timeout:
+                capture_set = self._in_flight.popleft()
+                missing.extend(sorted(capture_set['ips']))
+                self.sets_expired += 1
+            self._pop_finished(now)
+        return missing
+
+    def _pop_finished(self, now):
+        # Sets complete in order per camera, but not necessarily across cameras
+        for capture_set in [s for s in self._in_flight if not s['ips']]:
+            self._in_flight.remove(capture_set)
+            self.sets_completed += 1
+            self._completed.append(now)
+
+    def _depth(self, ip):
+        return sum(1 for capture_set in self._in_flight if ip in capture_set['ips'])
+
+    # --- Status ---
+
+    def queue_depth(self, ip):
+        """Sets sent to ip whose still hasn't arrived yet"""
+        with self._lock:
+            return self._depth(ip)
+
+    def sets_per_minute(self, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            while self._completed and now - self._completed[0] > RATE_WINDOW:
+                self._completed.popleft()
+            count = len(self._completed)
+        span = min(RATE_WINDOW, now - self.started) if self.started is not None else 0
+        return count / span * 60 if span > 0 else 0.0
+
+    def format_status(self, ips, names=None, now=None):
+        """One line for the GUI: mode, achieved rate, per-camera queue depth"""
+        names = names or {}
+        mode = f"every {self.interval:.1f}s" if self.interval else "on trigger"
+        text = (f"Cadence {mode}{'' if self.running else ' (stopped)'}: "
+                f"{self.sets_per_minute(now):.1f} sets/min, {self.sets_completed}/{self.sets_sent} sets complete")
+        if self.sets_expired:
+            text += f", {self.sets_expired} incomplete"
+        if self.stalls:
+            text += f", {self.stalls} delayed"
+        depths = ", ".join(f"{names.get(ip, ip)} {self.queue_depth(ip)}" for ip in ips)
+        return f"{text} | queue {depths}"
@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+Camera Backend Abstraction
+Every capture path talks to a CameraBackend instead of instantiating Picamera2
+directly, so the capture→transform→encode→send loop can run (and be profiled)
+on any Linux box:
+  - Picamera2Backend: the real HQ camera (picamera2 imported lazily)
+  - SyntheticBackend: moving test pattern, no files or hardware needed
+  - ReplayBackend:    loops over a directory of .jpg/.png/.npy frames
+
+The methods mirror the subset of Picamera2 the slaves use
+(create_*_configuration, configure, start, capture_array, capture_metadata,
+switch_mode_and_capture_array, set_controls, stop, close) plus settle(),
+which replaces the fixed sleeps after start(), and
+capture_array_with_metadata(), which returns a frame with its own metadata.
+
+Select the backend with GERTIE_CAMERA_BACKEND=picamera2|synthetic|replay
+(replay reads frames from GERTIE_CAMERA_REPLAY_DIR).
+"""
+
+import os
+import time
+import glob
+import logging
+
+import cv2
+import numpy as np
+
+BACKEND_ENV = "GERTIE_CAMERA_BACKEND"
+REPLAY_DIR_ENV = "GERTIE_CAMERA_REPLAY_DIR"
+DEFAULT_BACKEND = "picamera2"
+
+REPLAY_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.npy')
+
+
+class CameraBackend:
+    """Picamera2-shaped camera interface; subclasses provide frames"""
+
+    name = "base"
+
+    def __init__(self, fps=None, settle_time=None, metadata=None):
+        self.fps = fps                      # None = use FrameRate from the configuration
+        self.settle_time = settle_time      # None = honour the caller's settle time
+        self.static_metadata = dict(metadata or {})
+        self.config = None
+        self.size = (640, 480)
+        self.controls = {}
+        self.started = False
+        self.frame_count = 0
+
+    # --- Configuration (same call shapes as Picamera2) ---
+
+    def create_video_configuration(self, main=None, raw=None, controls=None):
+        return self._make_configuration("video", main, raw, controls)
+
+    def create_still_configuration(self, main=None, raw=None, controls=None):
+        return self._make_configuration("still", main, raw, controls)
+
+    def create_preview_configuration(self, main=None, raw=None, controls=None):
+        return self._make_configuration("preview", main, raw, controls)
+
+    def _make_configuration(self, mode, main, raw, controls):
+        return {
+            'mode': mode,
+            'main': dict(main or {}),
+            'raw': dict(raw or {}),
+            'controls': dict(controls or {}),
+        }
+
+    def configure(self, config):
+        self.config = config
+        self.size = tuple(config['main'].get('size', self.size))
+        self.controls = dict(config.get('controls', {}))
+
+    def set_controls(self, controls):
+        self.controls.update(controls)
+
+    # --- Lifecycle ---
+
+    def start(self):
+        self.started = True
+        self._next_frame_time = time.monotonic()
+
+    def settle(self, seconds):
+        """Wait for AE/AWB to settle; backends without a sensor can skip it"""
+        delay = seconds if self.settle_time is None else self.settle_time
+        if delay > 0:
+            time.sleep(delay)
+
+    def stop(self):
+        self.started = False
+
+    def close(self):
+        self.started = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self.stop()
+        finally:
+            self.close()
+        return False
+
+    # --- Frames ---
+
+    def frame_rate(self):
+        """Target frames per second (0 = unpaced)"""
+        if self.fps is not None:
+            return self.fps
+        return self.controls.get('FrameRate', 0)
+
+    def _pace(self):
+        """Sleep until the next frame is due, like a real sensor would"""
+        fps = self.frame_rate()
+        if not fps:
+            return
+        now = time.monotonic()
+        if self._next_frame_time > now:
+            time.sleep(self._next_frame_time - now)
+            now = self._next_frame_time
+        # Never try to "catch up" with a burst after a slow consumer
+        self._next_frame_time = max(self._next_frame_time + 1.0 / fps, now)
+
+    def capture_array(self):
+        if not self.started:
+            raise RuntimeError(f"{self.name} camera not started")
+        self._pace()
+        frame = self._next_frame()
+        self.frame_count += 1
+        self._last_timestamp_ns = time.monotonic_ns()
+        return frame
+
+    def _next_frame(self):
+        raise NotImplementedError
+
+    def capture_array_with_metadata(self, name="main"):
+        """(frame, metadata) for the same frame"""
+        frame = self.capture_array()
+        return frame, self.capture_metadata()
+
+    def switch_mode_and_capture_array(self, config, name="main"):
+        """Capture one frame in another configuration, then return to the running one"""
+        previous = self.config
+        self.stop()
+        self.configure(config)
+        self.start()
+        try:
+            return self.capture_array()
+        finally:
+            self.stop()
+            if previous is not None:
+                self.configure(previous)
+            self.start()
+
+    def capture_metadata(self):
+        fps = self.frame_rate()
+        metadata = {
+            'SensorTimestamp': getattr(self, '_last_timestamp_ns', time.monotonic_ns()),
+            'FrameDuration': int(1e6 / fps) if fps else 0,
+            'ExposureTime': self.controls.get('ExposureTime', 10000),
+            'AnalogueGain': self.controls.get('AnalogueGain', 1.0),
+            'FrameNumber': self.frame_count,
+        }
+        metadata.update(self.static_metadata)
+        return metadata
+
+
+class Picamera2Backend(CameraBackend):
+    """The real camera - a thin pass-through to Picamera2"""
+
+    name = "picamera2"
+
+    def __init__(self, fps=None, settle_time=None, metadata=None):
+        super().__init__(fps, settle_time, metadata)
+        from picamera2 import Picamera2  # Only importable on the Pi
+        self.picam2 = Picamera2()
+
+    def _configuration_kwargs(self, main, raw, controls):
+        kwargs = {'main': main}
+        if raw:
+            kwargs['raw'] = raw
+        if controls:
+            kwargs['controls'] = controls
+        return kwargs
+
+    def create_video_configuration(self, main=None, raw=None, controls=None):
+        return self.picam2.create_video_configuration(**self._configuration_kwargs(main, raw, controls))
+
+    def create_still_configuration(self, main=None, raw=None, controls=None):
+        return self.picam2.create_still_configuration(**self._configuration_kwargs(main, raw, controls))
+
+    def create_preview_configuration(self, main=None, raw=None, controls=None):
+        return self.picam2.create_preview_configuration(**self._configuration_kwargs(main, raw, controls))
+
+    def configure(self, config):
+        self.config = config
+        self.picam2.configure(config)
+
+    def set_controls(self, controls):
+        self.picam2.set_controls(controls)
+
+    def start(self):
+        self.picam2.start()
+        self.started = True
+
+    def stop(self):
+        self.picam2.stop()
+        self.started = False
+
+    def close(self):
+        self.picam2.close()
+        self.started = False
+
+    def capture_array(self):
+        frame = self.picam2.capture_array()
+        self.frame_count += 1
+        return frame
+
+    def capture_array_with_metadata(self, name="main"):
+        # One request, so the metadata (SensorTimestamp) belongs to this exact frame
+        request = self.picam2.capture_request()
+        try:
+            frame = request.make_array(name)
+            metadata = dict(request.get_metadata())
+        finally:
+            request.release()
+        self.frame_count += 1
+        metadata.update(self.static_metadata)
+        return frame, metadata
+
+    def switch_mode_and_capture_array(self, config, name="main"):
+        frame = self.picam2.switch_mode_and_capture_array(config, name)
+        self.frame_count += 1
+        return frame
+
+    def capture_metadata(self):
+        metadata = dict(self.picam2.capture_metadata())
+        metadata.update(self.static_metadata)
+        return metadata
+
+
+class SyntheticBackend(CameraBackend):
+    """Moving colour test pattern - deterministic, cheap, hardware-free"""
+
+    name = "synthetic"
+
+    def __init__(self, fps=None, settle_time=0.0, metadata=None):
+        super().__init__(fps, settle_time, metadata)
+        self._base = None
+
+    def configure(self, config):
+        super().configure(config)
+        width, height = self.size
+        # Static RGB gradient; a bright bar moves across it every frame
+        x = np.linspace(0, 255, width, dtype=np.float32)
+        y = np.linspace(0, 255, height, dtype=np.float32)
+        base = np.empty((height, width, 3), dtype=np.uint8)
+        base[:, :, 0] = x[np.newaxis, :]
+        base[:, :, 1] = y[:, np.newaxis]
+        base[:, :, 2] = 128
+        self._base = base
+
+    def _next_frame(self):
+        if self._base is None:
+            self.configure(self.create_video_configuration(main={'size': self.size}))
+        frame = self._base.copy()
+        width = frame.shape[1]
+        bar = max(1, width // 16)
+        x = (self.frame_count * 8) % width
+        frame[:, x:x + bar] = 255
+        cv2.putText(frame, str(self.frame_count), (10, 40), cv2.FONT_HERSHEY_SIMPLEX,
+                    1.0, (255, 0, 0), 2)
+        return frame
+
+
+class ReplayBackend(CameraBackend):
+    """Replays recorded frames (.jpg/.png as RGB, .npy as-is) from a directory in a loop"""
+
+    name = "replay"
+
+    def __init__(self, directory=None, fps=None, settle_time=0.0, metadata=None,
+                 loop=True, resize=True):
+        super().__init__(fps, settle_time, metadata)
+        self.directory = directory or os.environ.get(REPLAY_DIR_ENV, "")
+        self.loop = loop
+        self.resize = resize
+        self.files = sorted(
+            path for path in glob.glob(os.path.join(self.directory, "*"))
+            if path.lower().endswith(REPLAY_EXTENSIONS)
+        )
+        if not self.files:
+            raise FileNotFoundError(f"No replay frames found in '{self.directory}'")
+        self._frames = {}  # index -> decoded frame (decoded once, then served from memory)
+
+    def _load(self, index):
+        frame = self._frames.get(index)
+        if frame is None:
+            path = self.files[index]
+            if path.lower().endswith('.npy'):
+                frame = np.load(path)
+            else:
+                frame = cv2.imread(path, cv2.IMREAD_COLOR)
+                if frame is None:
+                    raise IOError(f"Cannot decode replay frame {path}")
+                # Slaves treat capture_array() output as RGB
+                frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            if self.resize and (frame.shape[1], frame.shape[0]) != tuple(self.size):
+                frame = cv2.resize(frame, tuple(self.size), interpolation=cv2.INTER_AREA)
+            self._frames[index] = frame
+        return frame
+
+    def configure(self, config):
+        super().configure(config)
+        self._frames.clear()
+
+    def _next_frame(self):
+        index = self.frame_count
+        if index >= len(self.files):
+            if not self.loop:
+                raise EOFError("Replay finished")
+            index %= len(self.files)
+        # Copy so callers can modify the frame like a freshly captured buffer
+        return self._load(index).copy()
+
+
+BACKENDS = {
+    'picamera2': Picamera2Backend,
+    'synthetic': SyntheticBackend,
+    'replay': ReplayBackend,
+}
+
+
+def create_camera_backend(kind=None, **options):
+    """Create the configured camera backend (default: the real Picamera2)"""
+    kind = (kind or os.environ.get(BACKEND_ENV) or DEFAULT_BACKEND).lower()
+    backend_class = BACKENDS.get(kind)
+    if backend_class is None:
+        raise ValueError(f"Unknown camera backend '{kind}' (expected one of {sorted(BACKENDS)})")
+    if kind != DEFAULT_BACKEND:
+        logging.info(f"[CAMERA] Using {kind} camera backend")
+    return backend_class(**options)
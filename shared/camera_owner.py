@@ -0,0 +1,377 @@
+#!/usr/bin/env python3
+"""
+Camera Owner - one long-lived owner of the camera per Pi
+The camera is opened once and never closed while the service runs. Preview
+frames and full-resolution stills both come from it:
+
+    preview running:  still = switch_mode_and_capture_array(still config),
+                      the sensor drops back into video mode on its own
+    preview stopped:  warm still session - the still config stays allocated
+                      and the sensor keeps running between captures, so
+                      back-to-back stills skip configure/start/settle; it is
+                      released after still_idle_timeout seconds without a
+                      capture, or as soon as a preview starts
+
+so a still no longer means STOP_STREAM, sleep, open a second Picamera2,
+sleep, close, sleep, START_STREAM.
+
+Synchronized stills (CAPTURE_AT, see shared/capture_sync.py) arm the warm
+still session as soon as the request arrives - pausing the preview if it is
+running - and keep the first frame exposed at or after the fire time.
+
+The video service (slave/video_stream.py) hosts the owner; still_capture.py,
+a separate process, asks it for stills over a Unix socket:
+
+    request:  CAPTURE_STILL <filename>\n
+              CAPTURE_AT <capture_id> <fire_time> <filename>\n
+    reply:    OK <filename> [crc32=<crc>]\n   |   ERROR <reason>\n
+
+The CRC-32 is computed while the file is written, so the upload doesn't
+read the still back from the SD card just to checksum it.
+
+The owner process captures, applies the still transforms and writes the file
+itself, so the 36 MB frame never crosses a process boundary.
+"""
+
+import os
+import time
+import socket
+import logging
+import threading
+
+from shared.camera_backend import create_camera_backend
+from shared.capture_sync import sensor_wall_time, wait_until
+
+STILL_SIZE = (4608, 2592)           # Full HQ sensor
+STILL_IDLE_TIMEOUT = 30.0           # Seconds a warm still session survives without a capture
+MAX_SYNC_FRAMES = 10                # Frames read past the fire time before giving up on an exact one
+DEFAULT_SOCKET_PATH = "/tmp/gertie_camera_owner.sock"
+DEFAULT_REQUEST_TIMEOUT = 15.0
+PREVIEW_WAIT = 0.1                  # Seconds capture_preview() waits for a paused preview to resume
+
+
+class CameraOwner:
+    """Serves preview frames and stills from one camera that stays open"""
+
+    def __init__(self, backend_factory=None, still_size=STILL_SIZE, still_idle_timeout=STILL_IDLE_TIMEOUT):
+        self._factory = backend_factory or create_camera_backend
+        self.still_size = still_size
+        self.still_idle_timeout = still_idle_timeout
+        self.camera = None
+        self._lock = threading.RLock()
+        self._preview_resumed = threading.Condition(self._lock)
+        self._still_config = None
+        self._preview_key = None        # (main, raw, controls) the sensor is configured with
+        self._preview_config = None
+        self._session = 0               # Bumped per start_preview(); stale stop_preview() calls are ignored
+        self.previewing = False
+        self.still_warm = False         # Sensor running in the still configuration
+        self._still_last_used = 0.0
+        self._idle_timer = None
+
+        # Instrumentation
+        self.opens = 0
+        self.stills = 0
+        self.mode_switches = 0
+        self.warm_hits = 0              # Stills served by an already-running still session
+        self.warm_misses = 0            # Stills that had to configure, start and settle
+        self.last_still_ms = 0.0
+        self.last_still_kind = None     # 'switch', 'warm' or 'cold'
+        self.last_still_time = None     # Sensor time of the last still (epoch seconds), if known
+        self.last_arm_margin = None     # Seconds to spare between arming and the fire time
+
+    def _open(self):
+        if self.camera is None:
+            self.camera = self._factory()
+            self._still_config = self.camera.create_still_configuration(main={"size": self.still_size})
+            self.opens += 1
+            logging.info(f"[OWNER] Camera opened ({self.camera.name})")
+        return self.camera
+
+    # --- Preview ---
+
+    def start_preview(self, main, raw=None, controls=None, settle=2.0):
+        """Run the sensor in video mode; returns a session id for stop_preview()"""
+        with self._lock:
+            camera = self._open()
+            self._release_still()
+            key = (repr(main), repr(raw), repr(controls))
+            if not self.previewing:
+                if key != self._preview_key:
+                    # (Re)configure in place - the device itself stays open
+                    self._preview_config = camera.create_video_configuration(main=main, raw=raw, controls=controls)
+                    camera.configure(self._preview_config)
+                    self._preview_key = key
+                camera.start()
+                camera.settle(settle)
+                self.previewing = True
+            elif key != self._preview_key:
+                camera.stop()
+                self._preview_config = camera.create_video_configuration(main=main, raw=raw, controls=controls)
+                camera.configure(self._preview_config)
+                camera.start()
+                camera.settle(settle)
+                self._preview_key = key
+            self._session += 1
+            self._preview_resumed.notify_all()
+            return self._session
+
+    def stop_preview(self, session=None):
+        """Stop the sensor (camera stays open); ignored if a newer preview session started"""
+        with self._lock:
+            if session is not None and session != self._session:
+                return
+            if self.previewing and self.camera.started:
+                self.camera.stop()
+            self.previewing = False
+
+    def capture_preview(self, wait=PREVIEW_WAIT):
+        """Next preview frame; None if the preview isn't running (after waiting up to wait seconds,
+        so a capture loop doesn't spin while a still pauses it)"""
+        with self._lock:
+            if not self.previewing:
+                self._preview_resumed.wait_for(lambda: self.previewing, wait)
+                if not self.previewing:
+                    return None
+            return self.camera.capture_array()
+
+    # --- Stills ---
+
+    def capture_still(self, settle=1.0):
+        """Full-resolution frame; preview (if running) resumes without a restart"""
+        with self._lock:
+            camera = self._open()
+            start_time = time.perf_counter()
+            if self.previewing:
+                image = camera.switch_mode_and_capture_array(self._still_config)
+                self.mode_switches += 1
+                self.last_still_kind = 'switch'
+                self.last_still_time = None  # Mode switch returns no metadata
+            else:
+                self._arm_still(settle)
+                try:
+                    image, metadata = camera.capture_array_with_metadata()
+                except Exception:
+                    self._release_still()
+                    raise
+                self.last_still_time = sensor_wall_time(metadata)
+                self._still_last_used = time.monotonic()
+                self._arm_idle_timer()
+            self.stills += 1
+            self.last_still_ms = (time.perf_counter() - start_time) * 1000
+            return image
+
+    def capture_still_at(self, fire_time, settle=1.0, clock=time.time):
+        """
+        Full-resolution frame exposed at (or just after) fire_time on this Pi's clock.
+        The still session is armed now - a running preview pauses until the capture is done -
+        and settling is cut short if it would run past the fire time.
+        """
+        with self._lock:
+            camera = self._open()
+            resume_preview = self.previewing
+            preview_key = self._preview_key
+            if resume_preview:
+                camera.stop()
+                self.previewing = False
+            try:
+                self._arm_still(min(settle, max(0.0, fire_time - clock() - 0.05)))
+                self.last_arm_margin = fire_time - clock()
+                wait_until(fire_time, clock)
+                start_time = time.perf_counter()
+                for _ in range(MAX_SYNC_FRAMES):
+                    image, metadata = camera.capture_array_with_metadata()
+                    sensor_time = sensor_wall_time(metadata)
+                    # Frames already queued before the fire time are skipped
+                    frame_duration = metadata.get('FrameDuration', 0) / 1e6
+                    if sensor_time is None or sensor_time >= fire_time - frame_duration / 2:
+                        break
+                self.last_still_time = sensor_time
+                self.stills += 1
+                self.last_still_ms = (time.perf_counter() - start_time) * 1000
+                self._still_last_used = time.monotonic()
+            finally:
+                if resume_preview:
+                    self._release_still()
+                    camera.configure(self._preview_config)
+                    camera.start()
+                    self._preview_key = preview_key
+                    self.previewing = True
+                    self._preview_resumed.notify_all()
+                else:
+                    self._arm_idle_timer()
+            return image
+
+    def _arm_still(self, settle):
+        """Make sure the warm still session is running (caller holds the lock, preview stopped)"""
+        if self.still_warm:
+            self.warm_hits += 1
+            self.last_still_kind = 'warm'
+            return
+        camera = self.camera
+        camera.configure(self._still_config)
+        self._preview_key = None  # Sensor no longer holds the video configuration
+        camera.start()
+        camera.settle(settle)
+        self.still_warm = True
+        self.warm_misses += 1
+        self.last_still_kind = 'cold'
+
+    def _arm_idle_timer(self):
+        if self._idle_timer is not None:
+            self._idle_timer.cancel()
+        if self.still_idle_timeout is None:
+            return
+        self._idle_timer = threading.Timer(self.still_idle_timeout, self._release_if_idle)
+        self._idle_timer.daemon = True
+        self._idle_timer.start()
+
+    def _release_if_idle(self):
+        with self._lock:
+            if self.still_warm and time.monotonic() - self._still_last_used >= self.still_idle_timeout:
+                logging.info(f"[OWNER] Warm still session idle for {self.still_idle_timeout:.0f}s - released")
+                self._release_still()
+
+    def _release_still(self):
+        """Stop a warm still session (caller holds the lock)"""
+        if self._idle_timer is not None:
+            self._idle_timer.cancel()
+            self._idle_timer = None
+        if self.still_warm:
+            self.still_warm = False
+            if self.camera is not None and self.camera.started:
+                self.camera.stop()
+
+    def warm_hit_rate(self):
+        """Percent of stills (taken without a preview) served by the warm session"""
+        total = self.warm_hits + self.warm_misses
+        return 100.0 * self.warm_hits / total if total else 0.0
+
+    def format_stats(self):
+        return (f"Stills: {self.stills} (warm {self.warm_hits}, cold {self.warm_misses}, "
+                f"mode switch {self.mode_switches}), warm hit rate {self.warm_hit_rate():.0f}%, "
+                f"last {self.last_still_kind} {self.last_still_ms:.0f}ms")
+
+    def close(self):
+        """Release the camera (service shutdown only)"""
+        with self._lock:
+            self._release_still()
+            if self.camera is not None:
+                try:
+                    if self.camera.started:
+                        self.camera.stop()
+                finally:
+                    self.camera.close()
+                    self.camera = None
+                    self.previewing = False
+                    self._preview_key = None
+
+    def stats(self):
+        return {
+            'opens': self.opens,
+            'stills': self.stills,
+            'mode_switches': self.mode_switches,
+            'warm_hits': self.warm_hits,
+            'warm_misses': self.warm_misses,
+            'warm_hit_rate': self.warm_hit_rate(),
+            'last_still_ms': self.last_still_ms,
+            'previewing': self.previewing,
+            'still_warm': self.still_warm,
+        }
+
+
+class CameraOwnerServer:
+    """Unix-socket front end: lets another process ask the owner's process for stills"""
+
+    def __init__(self, save_still, path=DEFAULT_SOCKET_PATH):
+        # save_still(filename, capture_id=None, fire_time=None) -> filename, (filename, crc32) or None
+        self.save_still = save_still
+        self.path = path
+        self._sock = None
+        self._thread = None
+        self._running = False
+
+    def start(self):
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.bind(self.path)
+        self._sock.listen(4)
+        self._sock.settimeout(0.5)
+        self._running = True
+        self._thread = threading.Thread(target=self._serve, name="camera-owner", daemon=True)
+        self._thread.start()
+        logging.info(f"[OWNER] Still requests served on {self.path}")
+
+    def stop(self):
+        self._running = False
+        if self._thread:
+            self._thread.join(2.0)
+        if self._sock:
+            self._sock.close()
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+    def _serve(self):
+        while self._running:
+            try:
+                conn, _ = self._sock.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def _handle(self, conn):
+        with conn:
+            try:
+                conn.settimeout(DEFAULT_REQUEST_TIMEOUT)
+                request = conn.makefile('r').readline().strip()
+                parts = request.split(' ')
+                if parts[0] == "CAPTURE_STILL" and len(parts) == 2:
+                    saved = self.save_still(parts[1])
+                elif parts[0] == "CAPTURE_AT" and len(parts) == 4:
+                    saved = self.save_still(parts[3], capture_id=parts[1], fire_time=float(parts[2]))
+                else:
+                    raise ValueError(f"unknown request '{request}'")
+                if isinstance(saved, tuple):
+                    saved = f"{saved[0]} crc32={saved[1]}" if saved[0] else None
+                reply = f"OK {saved}" if saved else "ERROR capture failed"
+            except Exception as e:
+                logging.error(f"[OWNER] Still request failed: {e}")
+                reply = f"ERROR {e}"
+            try:
+                conn.sendall((reply + "\n").encode())
+            except OSError:
+                pass
+
+
+def request_still(filename, path=DEFAULT_SOCKET_PATH, timeout=DEFAULT_REQUEST_TIMEOUT,
+                  capture_id=None, fire_time=None):
+    """
+    Ask the camera owner for a still saved to filename (taken at fire_time if given).
+    Returns (saved filename, crc32 or None), or None if no owner is running (caller falls back).
+    Raises RuntimeError if the owner answered but the capture failed.
+    """
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(path)
+            if fire_time is None:
+                sock.sendall(f"CAPTURE_STILL {filename}\n".encode())
+            else:
+                sock.sendall(f"CAPTURE_AT {capture_id} {fire_time:.6f} {filename}\n".encode())
+            reply = sock.makefile('r').readline().strip()
+    except (FileNotFoundError, ConnectionRefusedError):
+        return None
+    status, _, detail = reply.partition(' ')
+    if status != "OK":
+        raise RuntimeError(f"camera owner: {detail or 'no reply'}")
+    saved, _, crc = detail.rpartition(" crc32=")
+    if saved and crc.isdigit():
+        return saved, int(crc)
+    return detail, None
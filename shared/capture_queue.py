@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Capture Queue - one capture worker per slave, fed by a bounded request queue
+CAPTURE_STILL / CAPTURE_AT commands used to start a thread each, so a
+double-tapped space bar or a resent command had two captures racing for the
+camera. Requests now queue for a single worker:
+
+- a request whose id was already accepted (a resent CAPTURE_AT) is coalesced,
+  as is a bare CAPTURE_STILL within coalesce_window of the previous one
+- when max_pending requests are waiting, new ones are rejected, not buffered
+- every state change is reported back to the master on the heartbeat port:
+
+    CAPTURE_STATUS <request_id> <queued|coalesced|rejected|running|done|failed> <queue depth>
+"""
+
+import time
+import queue
+import logging
+import threading
+from collections import OrderedDict
+
+STATUS_PREFIX = "CAPTURE_STATUS"
+ANONYMOUS_ID = "CAPTURE_STILL"  # Reported id of requests without one (bare CAPTURE_STILL)
+DEFAULT_MAX_PENDING = 4
+DEFAULT_COALESCE_WINDOW = 1.0   # Seconds within which repeated bare CAPTURE_STILLs are one request
+SEEN_IDS = 64                   # Request ids remembered for coalescing
+
+
+def format_status_message(request_id, status, depth):
+    return f"{STATUS_PREFIX} {request_id} {status} {depth}"
+
+
+def parse_status_message(message):
+    """(request_id, status, depth) from a CAPTURE_STATUS message, or None"""
+    parts = message.split()
+    if len(parts) != 4 or parts[0] != STATUS_PREFIX:
+        return None
+    try:
+        return parts[1], parts[2], int(parts[3])
+    except ValueError:
+        return None
+
+
+class CaptureQueue:
+    """
+    capture(*args) -> bool runs on one worker thread, one request at a time;
+    report(request_id, status, depth) is called on every state change
+    """
+
+    def __init__(self, capture, max_pending=DEFAULT_MAX_PENDING, coalesce_window=DEFAULT_COALESCE_WINDOW,
+                 report=None, name="capture-worker"):
+        self.capture = capture
+        self.coalesce_window = coalesce_window
+        self.report = report
+        self.name = name
+        self._queue = queue.Queue(max_pending)
+        self._seen = OrderedDict()      # request id -> time accepted
+        self._lock = threading.Lock()
+        self._thread = None
+
+        # Metrics
+        self.accepted = 0
+        self.coalesced = 0
+        self.rejected = 0
+        self.done = 0
+        self.failed = 0
+
+    def submit(self, request_id=None, args=(), now=None):
+        """Queue a capture; returns 'queued', 'coalesced' or 'rejected'"""
+        now = time.time() if now is None else now
+        key = request_id or ANONYMOUS_ID
+        with self._lock:
+            last = self._seen.get(key)
+            if last is not None and (request_id is not None or now - last < self.coalesce_window):
+                self.coalesced += 1
+                status = 'coalesced'
+            else:
+                try:
+                    self._queue.put_nowait((key, args))
+                    self._seen[key] = now
+                    self._seen.move_to_end(key)
+                    while len(self._seen) > SEEN_IDS:
+                        self._seen.popitem(last=False)
+                    self.accepted += 1
+                    status = 'queued'
+                except queue.Full:
+                    self.rejected += 1
+                    status = 'rejected'
+            # Reported under the lock so 'queued' always reaches the master before 'running'
+            self._report(key, status)
+            if status == 'queued' and (self._thread is None or not self._thread.is_alive()):
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+        if status != 'queued':
+            logging.warning(f"[CAPTURE] {key} {status} (queue depth {self.depth()})")
+        return status
+
+    def depth(self):
+        """Requests waiting or running"""
+        return self._queue.unfinished_tasks
+
+    def join(self, timeout=None):
+        """Wait until the queue is drained; True if idle"""
+        deadline = None if timeout is None else time.time() + timeout
+        while self.depth():
+            if deadline is not None and time.time() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def _run(self):
+        while True:
+            key, args = self._queue.get()
+            with self._lock:
+                self._report(key, 'running')
+            try:
+                ok = self.capture(*args)
+            except Exception as e:
+                logging.error(f"[CAPTURE] {key} failed: {e}")
+                ok = False
+            if ok:
+                self.done += 1
+            else:
+                self.failed += 1
+            self._queue.task_done()
+            self._report(key, 'done' if ok else 'failed')
+
+    def _report(self, request_id, status):
+        if self.report:
+            try:
+                self.report(request_id, status, self.depth())
+            except Exception as e:
+                logging.debug(f"[CAPTURE] Status report failed: {e}")
+
+    def format_stats(self):
+        return (f"Captures: {self.done} done, {self.failed} failed, {self.coalesced} coalesced, "
+                f"{self.rejected} rejected, depth {self.depth()}")
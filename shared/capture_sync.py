@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Capture Sync - fire all cameras at one instant and report how close they got
+The master sends every camera the same CAPTURE_AT command with a fire time a
+little in the future:
+
+    CAPTURE_AT_<capture_id>_<fire_time>       (fire_time: epoch seconds)
+
+Each slave arms its still configuration straight away, waits for the fire
+time on its own clock and keeps the first frame exposed at or after it. The
+frame's sensor timestamp (converted to epoch seconds) travels back inside the
+JPEG as a COM segment, so stills stay plain JPEGs to anything that ignores it:
+
+    FF FE <len> "GERTIE-CAPTURE " {"device": ..., "capture_id": ..., "fire_time": ..., "sensor_time": ...}
+
+The master collects one capture set per capture_id and logs the spread of
+sensor times (inter-camera skew) once every camera has reported.
+"""
+
+import json
+import time
+import struct
+import threading
+
+COMMAND_PREFIX = "CAPTURE_AT_"
+COMMENT_TAG = b"GERTIE-CAPTURE "
+DEFAULT_LEAD_TIME = 2.0         # Seconds between sending CAPTURE_AT and the fire time
+SET_TIMEOUT = 30.0              # Capture sets still incomplete after this are reported as-is
+
+
+def new_capture_id():
+    """Capture set id (millisecond epoch - unique per master)"""
+    return str(int(time.time() * 1000))
+
+
+def format_capture_at_command(capture_id, fire_time):
+    return f"{COMMAND_PREFIX}{capture_id}_{fire_time:.6f}"
+
+
+def parse_capture_at_command(command):
+    """(capture_id, fire_time) from a CAPTURE_AT_ command, or None if malformed"""
+    if not command.startswith(COMMAND_PREFIX):
+        return None
+    capture_id, _, fire_text = command[len(COMMAND_PREFIX):].partition('_')
+    try:
+        fire_time = float(fire_text)
+    except ValueError:
+        return None
+    if not capture_id:
+        return None
+    return capture_id, fire_time
+
+
+def sensor_wall_time(metadata):
+    """SensorTimestamp (monotonic ns, start of exposure) as epoch seconds; None if absent"""
+    timestamp_ns = metadata.get('SensorTimestamp') if metadata else None
+    if not timestamp_ns:
+        return None
+    return time.time() - (time.monotonic_ns() - timestamp_ns) / 1e9
+
+
+def wait_until(fire_time, clock=time.time):
+    """Sleep until fire_time; the last couple of milliseconds are spun for precision"""
+    while True:
+        remaining = fire_time - clock()
+        if remaining <= 0:
+            return
+        if remaining > 0.002:
+            time.sleep(remaining - 0.002)
+
+
+def capture_info_segment(info):
+    """COM segment (marker, length, tagged JSON) carrying info"""
+    payload = COMMENT_TAG + json.dumps(info, separators=(',', ':')).encode()
+    if len(payload) > 65533:
+        raise ValueError("capture info too large")
+    return b'\xff\xfe' + struct.pack('>H', len(payload) + 2) + payload
+
+
+def capture_info_parts(jpeg, info):
+    """
+    The tagged JPEG as buffers [SOI, COM segment, rest] without copying jpeg -
+    for writing or sending a large encode buffer (e.g. cv2.imencode's array) as-is
+    """
+    view = memoryview(jpeg).cast('B')
+    if view[:2] != b'\xff\xd8':
+        raise ValueError("not a JPEG")
+    if info is None:
+        return [view]
+    return [view[:2], capture_info_segment(info), view[2:]]
+
+
+def embed_capture_info(jpeg, info):
+    """Insert a COM segment carrying info right after the JPEG's SOI marker"""
+    if jpeg[:2] != b'\xff\xd8':
+        raise ValueError("not a JPEG")
+    return jpeg[:2] + capture_info_segment(info) + jpeg[2:]
+
+
+def read_capture_info(data):
+    """Capture info dict from a JPEG's COM segments (None if the still carries none)"""
+    if data[:2] != b'\xff\xd8':
+        return None
+    pos = 2
+    while pos + 4 <= len(data) and data[pos] == 0xFF:
+        marker = data[pos + 1]
+        if marker == 0xDA:  # Start of scan - no more header segments
+            return None
+        length = struct.unpack('>H', data[pos + 2:pos + 4])[0]
+        segment = data[pos + 4:pos + 2 + length]
+        if marker == 0xFE and segment.startswith(COMMENT_TAG):
+            try:
+                return json.loads(segment[len(COMMENT_TAG):].decode())
+            except ValueError:
+                return None
+        pos += 2 + length
+    return None
+
+
+class CaptureSetTracker:
+    """Collects the sensor times of one capture set per capture_id and reports the skew"""
+
+    def __init__(self, timeout=SET_TIMEOUT):
+        self.timeout = timeout
+        self._sets = {}
+        self._lock = threading.Lock()
+
+    def start(self, capture_id, fire_time, devices):
+        with self._lock:
+            self._sets[capture_id] = {
+                'fire_time': fire_time,
+                'devices': list(devices),
+                'times': {},
+                'started': time.time(),
+            }
+
+    def record(self, capture_id, device, sensor_time):
+        """Record one camera's still; returns the set's report once every camera has reported"""
+        with self._lock:
+            capture_set = self._sets.get(capture_id)
+            if capture_set is None:
+                return None
+            capture_set['times'][device] = sensor_time
+            if not set(capture_set['devices']) <= set(capture_set['times']):
+                return None
+            del self._sets[capture_id]
+        return self._report(capture_id, capture_set)
+
+    def expire(self, now=None):
+        """Reports for sets still incomplete after the timeout (missing cameras listed)"""
+        now = time.time() if now is None else now
+        with self._lock:
+            expired = [(capture_id, capture_set) for capture_id, capture_set in self._sets.items()
+                       if now - capture_set['started'] >= self.timeout]
+            for capture_id, _ in expired:
+                del self._sets[capture_id]
+        return [self._report(capture_id, capture_set) for capture_id, capture_set in expired]
+
+    def _report(self, capture_id, capture_set):
+        fire_time = capture_set['fire_time']
+        times = {device: t for device, t in capture_set['times'].items() if t is not None}
+        offsets_ms = {device: (t - fire_time) * 1000 for device, t in times.items()}
+        return {
+            'capture_id': capture_id,
+            'fire_time': fire_time,
+            'offsets_ms': offsets_ms,
+            'skew_ms': max(offsets_ms.values()) - min(offsets_ms.values()) if offsets_ms else None,
+            'missing': [d for d in capture_set['devices'] if d not in capture_set['times']],
+            'untimed': [d for d, t in capture_set['times'].items() if t is None],
+        }
+
+
+def format_report(report):
+    """One log line per capture set"""
+    text = f"Capture {report['capture_id']}: "
+    if report['skew_ms'] is None:
+        text += "no sensor timestamps"
+    else:
+        offsets = ", ".join(f"{device} {offset:+.1f}" for device, offset in sorted(report['offsets_ms'].items()))
+        text += f"skew {report['skew_ms']:.1f}ms across {len(report['offsets_ms'])} cameras (ms from fire time: {offsets})"
+    if report['missing']:
+        text += f", missing {', '.join(report['missing'])}"
+    if report['untimed']:
+        text += f", no timestamp from {', '.join(report['untimed'])}"
+    return text
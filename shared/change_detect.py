@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Change Detection - skip encoding preview frames that show nothing new
+Most of a session the rig looks at a static specimen; re-encoding and sending
+the same picture 4-30 times a second costs slave CPU and network for nothing.
+
+Each frame is shrunk to a small thumbnail and compared with the
+thumbnail of the last frame that was SENT (not the previous frame, so slow
+drift still adds up to a send). The thumbnail difference is averaged per
+block and the most-changed block decides, so a small object moving in one
+corner is not diluted by an otherwise static frame. Color is kept, so
+toggling grayscale on a static scene still counts. A keepalive frame still
+goes out at a minimum rate so the GUI never looks frozen.
+
+In the slave pipeline a frame judged worth sending can still be dropped
+afterwards (too old, or overtaken by a newer frame), so check() only
+returns a candidate and the reference moves once sent() confirms the
+frame actually went out.
+"""
+
+import time
+import threading
+
+import cv2
+
+# Thumbnail compared between frames (detection costs ~0.5 ms per 640x480 frame)
+THUMB_SIZE = (80, 60)
+# Blocks the thumbnail difference is averaged over: 8x6 blocks of 10x10 thumbnail pixels
+BLOCK_GRID = (8, 6)
+
+
+def frame_thumbnail(frame):
+    """Small copy of a frame for comparisons"""
+    return cv2.resize(frame, THUMB_SIZE, interpolation=cv2.INTER_AREA)
+
+
+def block_difference(thumb_a, thumb_b):
+    """Mean absolute difference of the most-changed block and channel (0-255)"""
+    diff = cv2.absdiff(thumb_a, thumb_b)
+    blocks = cv2.resize(diff, BLOCK_GRID, interpolation=cv2.INTER_AREA)
+    return float(blocks.max())
+
+
+class ChangeDetector:
+    """Decides per frame whether it is worth encoding; safe to share between encoder threads"""
+
+    def __init__(self, threshold=3.0, keepalive_fps=1.0):
+        self.threshold = threshold            # Block difference that counts as a change
+        self.keepalive_fps = keepalive_fps    # Minimum send rate while nothing changes
+        self._reference = None                # (frame shape, thumbnail) of the last frame sent
+        self._reference_time = None
+        self._last_offered = 0.0              # Last frame check() passed on (paces keepalives)
+        self._generation = 0                  # Bumped by reset(); older candidates can't commit
+        self._lock = threading.Lock()
+
+        # Instrumentation
+        self.frames = 0
+        self.skipped = 0
+        self.keepalives = 0
+        self.last_difference = 0.0
+
+    def should_send(self, frame, now=None):
+        """True if the frame changed (or a keepalive is due); the frame then becomes the reference"""
+        candidate = self.check(frame, now)
+        if candidate is None:
+            return False
+        self.sent(candidate)
+        return True
+
+    def check(self, frame, now=None):
+        """Candidate to pass to sent() if the frame changed (or a keepalive is due), else None"""
+        thumb = frame_thumbnail(frame)
+        now = time.perf_counter() if now is None else now
+        with self._lock:
+            self.frames += 1
+            reference = self._reference
+            if reference is None or reference[0] != frame.shape:
+                # First frame, or grayscale / preview size changed what the GUI gets
+                changed = True
+            else:
+                self.last_difference = block_difference(reference[1], thumb)
+                changed = self.last_difference >= self.threshold
+
+            if not changed:
+                if self.keepalive_fps and now - self._last_offered >= 1.0 / self.keepalive_fps:
+                    self.keepalives += 1
+                else:
+                    self.skipped += 1
+                    return None
+
+            self._last_offered = now
+            return (self._generation, now, frame.shape, thumb)
+
+    def sent(self, candidate):
+        """The frame of a check() candidate was published: it becomes the reference"""
+        generation, now, shape, thumb = candidate
+        with self._lock:
+            if generation != self._generation:
+                return  # Checked before a reset()
+            if self._reference_time is not None and now < self._reference_time:
+                return  # A newer frame already went out
+            self._reference = (shape, thumb)
+            self._reference_time = now
+
+    def reset(self):
+        """Send the next frame regardless (e.g. after the JPEG quality changed)"""
+        with self._lock:
+            self._reference = None
+            self._reference_time = None
+            self._generation += 1
+
+    def saved_percent(self):
+        return self.skipped / self.frames * 100 if self.frames else 0.0
+
+    def stats(self):
+        return {
+            'frames': self.frames,
+            'skipped': self.skipped,
+            'keepalives': self.keepalives,
+            'saved_percent': self.saved_percent(),
+            'last_difference': self.last_difference,
+        }
+
+    def format_stats(self):
+        return (f"unchanged skipped {self.saved_percent():.0f}% "
+                f"({self.skipped}/{self.frames}, {self.keepalives} keepalives)")
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Clock Sync - NTP-style clock offset and drift estimation between master and slaves
+The master's NetworkManager runs a ClockSyncClient that pings every slave's
+ClockSyncResponder once per interval over UDP:
+
+    master -> slave:  CLKREQ <t1>
+    slave -> master:  CLKRSP <t1> <t2> <t3>
+
+t1/t4 are the master's send/receive times and t2/t3 the slave's receive/send
+times (time.time(), epoch seconds). Per exchange:
+
+    offset = ((t2 - t1) + (t3 - t4)) / 2      slave clock minus master clock
+    delay  = (t4 - t1) - (t3 - t2)            network round trip
+
+Only low-delay exchanges are trusted (queueing inflates delay and skews the
+offset); a least-squares line through them gives the current offset and the
+drift between the two oscillators. An exchange far off that line (more than a
+few round trips) means a clock was stepped, e.g. by SET_TIME, and the window
+starts over from it instead of averaging the step in for a minute. Nothing
+here sets a clock - callers convert timestamps with to_master_time() /
+to_device_time().
+"""
+
+import time
+import socket
+import logging
+import threading
+from collections import deque
+
+DEFAULT_INTERVAL = 1.0      # Seconds between exchanges per device
+DEFAULT_WINDOW = 64         # Exchanges kept per device (about a minute)
+STALE_AFTER = 10.0          # Seconds without a reply before an estimate is reported stale
+MIN_DRIFT_SPAN = 10.0       # Seconds of trusted exchanges needed before drift is estimated
+STEP_DELAYS = 4             # Offset this many round trips off the estimate is a clock step...
+STEP_MIN = 0.002            # ...and at least this many seconds (loopback round trips are ~0)
+
+
+def exchange_offset(t1, t2, t3, t4):
+    """(offset, delay) of one request/response exchange"""
+    offset = ((t2 - t1) + (t3 - t4)) / 2
+    delay = (t4 - t1) - (t3 - t2)
+    return offset, delay
+
+
+class ClockEstimator:
+    """Offset and drift of one device's clock relative to ours"""
+
+    def __init__(self, window=DEFAULT_WINDOW):
+        self.samples = deque(maxlen=window)  # (master time, offset, delay)
+        self.last_reply = 0.0
+        self.steps = 0
+        self._lock = threading.RLock()  # Client thread adds, GUI thread estimates and resets
+
+    def add(self, t1, t2, t3, t4):
+        offset, delay = exchange_offset(t1, t2, t3, t4)
+        delay = max(0.0, delay)
+        sample_time = (t1 + t4) / 2
+        with self._lock:
+            if self.samples:
+                residual = abs(offset - self.estimate(sample_time)['offset'])
+                if residual > max(STEP_DELAYS * delay, STEP_MIN):
+                    logging.info(f"[CLOCK] Clock step of {residual * 1000:.1f}ms detected - offset window restarted")
+                    self.samples.clear()
+                    self.steps += 1
+            self.samples.append((sample_time, offset, delay))
+            self.last_reply = t4
+        return offset, delay
+
+    def reset(self):
+        """Forget all exchanges (the device's clock was, or is about to be, set)"""
+        with self._lock:
+            self.samples.clear()
+
+    def _trusted(self):
+        """Samples whose round trip is within twice the best one seen (plus 0.5 ms)"""
+        best = min(delay for _, _, delay in self.samples)
+        limit = 2 * best + 0.0005
+        return [sample for sample in self.samples if sample[2] <= limit]
+
+    def estimate(self, now=None):
+        """{'offset', 'drift_ppm', 'delay', 'samples', 'steps', 'age'} or None before the first reply"""
+        with self._lock:
+            if not self.samples:
+                return None
+            samples = len(self.samples)
+            trusted = self._trusted()
+        now = time.time() if now is None else now
+        times = [t for t, _, _ in trusted]
+        offsets = [offset for _, offset, _ in trusted]
+        mean_time = sum(times) / len(times)
+        mean_offset = sum(offsets) / len(offsets)
+        spread = sum((t - mean_time) ** 2 for t in times)
+        drift = 0.0
+        if len(trusted) >= 3 and max(times) - min(times) >= MIN_DRIFT_SPAN:
+            drift = sum((t - mean_time) * (o - mean_offset) for t, o in zip(times, offsets)) / spread
+        return {
+            'offset': mean_offset + drift * (now - mean_time),
+            'drift_ppm': drift * 1e6,
+            'delay': min(delay for _, _, delay in trusted),
+            'samples': samples,
+            'steps': self.steps,
+            'age': now - self.last_reply,
+        }
+
+
+class ClockSyncResponder:
+    """Slave side: answers CLKREQ with its receive and send times"""
+
+    def __init__(self, port, clock=time.time):
+        self.port = port
+        self.clock = clock
+        self._sock = None
+        self._thread = None
+        self._running = False
+        self.requests = 0
+
+    def start(self):
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._sock.bind(("0.0.0.0", self.port))
+        self._sock.settimeout(0.5)
+        self.port = self._sock.getsockname()[1]
+        self._running = True
+        self._thread = threading.Thread(target=self._serve, name="clock-sync", daemon=True)
+        self._thread.start()
+        logging.info(f"[CLOCK] Clock sync responder on port {self.port}")
+
+    def stop(self):
+        self._running = False
+        if self._thread:
+            self._thread.join(2.0)
+        if self._sock:
+            self._sock.close()
+
+    def _serve(self):
+        while self._running:
+            try:
+                data, addr = self._sock.recvfrom(128)
+                t2 = self.clock()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            parts = data.split()
+            if len(parts) != 2 or parts[0] != b"CLKREQ":
+                continue
+            self.requests += 1
+            try:
+                self._sock.sendto(b"CLKRSP %s %.6f %.6f" % (parts[1], t2, self.clock()), addr)
+            except OSError:
+                pass
+
+
+class ClockSyncClient:
+    """Master side: keeps a ClockEstimator per device, refreshed every interval"""
+
+    def __init__(self, peers=None, interval=DEFAULT_INTERVAL, window=DEFAULT_WINDOW):
+        self.interval = interval
+        self.window = window
+        self.peers = {}             # device -> (ip, port)
+        self._by_address = {}
+        self.estimators = {}
+        self._lock = threading.Lock()
+        self._sock = None
+        self._thread = None
+        self._running = False
+        for device, address in (peers or {}).items():
+            self.add_peer(device, address)
+
+    def add_peer(self, device, address):
+        with self._lock:
+            self.peers[device] = address
+            self._by_address[address] = device
+            self.estimators.setdefault(device, ClockEstimator(self.window))
+
+    def start(self):
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._sock.settimeout(0.05)
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="clock-sync-client", daemon=True)
+        self._thread.start()
+        logging.info(f"[CLOCK] Estimating clock offsets of {len(self.peers)} devices every {self.interval:.1f}s")
+
+    def stop(self):
+        self._running = False
+        if self._thread:
+            self._thread.join(2.0)
+        if self._sock:
+            self._sock.close()
+
+    def _run(self):
+        next_round = 0.0
+        while self._running:
+            now = time.time()
+            if now >= next_round:
+                self._send_requests()
+                next_round = now + self.interval
+            self._receive()
+
+    def _send_requests(self):
+        with self._lock:
+            addresses = list(self.peers.values())
+        for address in addresses:
+            try:
+                self._sock.sendto(b"CLKREQ %.6f" % time.time(), address)
+            except OSError:
+                pass  # Device not up yet
+
+    def _receive(self):
+        try:
+            data, addr = self._sock.recvfrom(128)
+            t4 = time.time()
+        except (socket.timeout, OSError):
+            return
+        parts = data.split()
+        if len(parts) != 4 or parts[0] != b"CLKRSP":
+            return
+        with self._lock:
+            device = self._by_address.get(addr)
+            estimator = self.estimators.get(device)
+        if estimator is not None:
+            t1, t2, t3 = (float(p) for p in parts[1:])
+            estimator.add(t1, t2, t3, t4)
+
+    # --- API ---
+
+    def estimate(self, device, now=None):
+        """Offset/drift/delay for one device, None until it has answered"""
+        estimator = self.estimators.get(device)
+        return estimator.estimate(now) if estimator else None
+
+    def offset(self, device, now=None):
+        """Seconds the device's clock is ahead of ours (0.0 while unknown)"""
+        estimate = self.estimate(device, now)
+        return estimate['offset'] if estimate else 0.0
+
+    def to_master_time(self, device, device_time):
+        return device_time - self.offset(device, device_time)
+
+    def to_device_time(self, device, master_time):
+        return master_time + self.offset(device, master_time)
+
+    def reset(self, device=None):
+        """Start one device's (or every device's) estimate over, e.g. when SET_TIME is sent"""
+        with self._lock:
+            estimators = [self.estimators[device]] if device in self.estimators else (
+                list(self.estimators.values()) if device is None else [])
+        for estimator in estimators:
+            estimator.reset()
+
+    def estimates(self, now=None):
+        return {device: self.estimate(device, now) for device in self.peers}
+
+
+def format_estimate(estimate):
+    """Short text for logs: offset ± half the round trip, drift"""
+    if estimate is None:
+        return "no reply"
+    text = (f"{estimate['offset'] * 1000:+.2f}ms ±{estimate['delay'] * 500:.2f}ms, "
+            f"drift {estimate['drift_ppm']:+.1f}ppm")
+    if estimate['age'] > STALE_AFTER:
+        text += f", stale {estimate['age']:.0f}s"
+    return text
@@ -21,6 +21,8 @@ SLAVE_HEARTBEAT_PORT = 5003
 
 # Optional dedicated video control ports (for video_stream command channel)
 SLAVE_VIDEO_CONTROL_PORT = 5004
+# Clock offset estimation (shared/clock_sync.py) - answered by video_stream.py
+SLAVE_CLOCK_SYNC_PORT = 5005
 
 # Local camera ports (to avoid conflicts)
 LOCAL_CONTROL_PORT = 5011
@@ -28,6 +30,89 @@ LOCAL_VIDEO_PORT = 5012
 LOCAL_STILL_PORT = 6010
 LOCAL_HEARTBEAT_PORT = 5013
 LOCAL_VIDEO_CONTROL_PORT = 5014
+LOCAL_CLOCK_SYNC_PORT = 5015
+
+# Slave preview pipeline
+# True: capture, transform+encode and send run on separate threads (latest-wins handoff)
+# False: the original serial capture→encode→send loop
+VIDEO_PIPELINE_THREADED = True
+# JPEG encoder threads (cv2.imencode releases the GIL); frames still go out in capture order
+VIDEO_ENCODER_WORKERS = 2
+# Encoded frames older than this (seconds since capture) are dropped instead of sent late
+VIDEO_MAX_FRAME_AGE = 0.2
+# Preview frames are split into datagrams of this many payload bytes (see shared/video_framing.py)
+VIDEO_FRAGMENT_PAYLOAD = 1400
+# Master discards partially received frames after this many seconds
+VIDEO_REASSEMBLY_TIMEOUT = 0.5
+# Master decodes each camera's preview on its own worker thread (shared/frame_mailbox.py);
+# False decodes on the GUI display timer instead
+VIDEO_DECODE_WORKERS = True
+# Receive and decode previews in a child process that hands the GUI finished tiles
+# through shared memory (shared/preview_process.py), keeping decode off the Tk GIL
+VIDEO_PREVIEW_PROCESS = False
+# Draw every camera's preview on one canvas from one display timer, pasting only the tiles
+# with a new frame (shared/tile_compositor.py), instead of one label and timer per camera
+VIDEO_COMPOSITE_PREVIEW = False
+# Preview JPEG rate control (shared/rate_control.py): per-frame byte budget and quality range
+VIDEO_FRAME_BYTES_TARGET = 16000
+VIDEO_QUALITY_MIN = 20
+VIDEO_QUALITY_MAX = 85
+# Preview codec (shared/preview_codecs.py): 'jpeg', 'turbojpeg' (needs PyTurboJPEG) or 'webp';
+# JPEG chroma subsampling '420', '422' or '444'. The master detects the codec per frame.
+VIDEO_CODEC = 'jpeg'
+VIDEO_JPEG_SUBSAMPLING = '420'
+# Preview demand per GUI mode, as (fps, (width, height)) - sent to slaves on mode change
+# (see shared/preview_demand.py); slaves never upscale, so exclusive still streams 640x480
+PREVIEW_DEMAND_GRID = (4, (320, 240))
+PREVIEW_DEMAND_EXCLUSIVE = (15, (960, 720))
+PREVIEW_DEMAND_HIDDEN = (1, (320, 240))   # Cameras hidden behind an exclusive view
+# Skip encoding preview frames that show nothing new (shared/change_detect.py):
+# threshold is the mean 0-255 difference of the most-changed block; a keepalive
+# frame still goes out at VIDEO_KEEPALIVE_FPS so the GUI never looks frozen
+VIDEO_SKIP_UNCHANGED = True
+VIDEO_CHANGE_THRESHOLD = 3.0
+VIDEO_KEEPALIVE_FPS = 1.0
+# The video service owns the camera (shared/camera_owner.py); still_capture.py asks it
+# for stills on this Unix socket instead of stopping the preview and reopening the camera
+CAMERA_OWNER_SOCKET = "/tmp/gertie_camera_owner.sock"
+# With the preview stopped, stills keep the sensor running in the still configuration
+# between captures (no configure/start/settle); released after this many idle seconds
+STILL_WARM_IDLE_TIMEOUT = 30.0
+# "Capture all" fires every camera at one instant (CAPTURE_AT, shared/capture_sync.py):
+# the fire time is this many seconds after the command is sent, enough to arm the
+# still configuration; False sends the old independent CAPTURE_STILL
+STILL_SYNC_CAPTURE = True
+STILL_SYNC_LEAD_TIME = 2.0
+# Seconds between clock offset exchanges with each slave; the estimated offsets
+# convert CAPTURE_AT fire times, still timestamps and preview latency between clocks
+CLOCK_SYNC_INTERVAL = 1.0
+# Master still ingest (shared/still_ingest.py): uploads read at once, and chunk writes
+# pending per upload before it stops reading and lets TCP push back on the camera
+STILL_INGEST_MAX_UPLOADS = 4
+STILL_INGEST_QUEUE_CHUNKS = 8
+# rep8 uploads stills straight from the encode buffer; True also writes each one to
+# /tmp in the background (a copy is always written if the upload fails)
+LOCAL_STILL_KEEP_COPY = False
+# Slaves upload stills on a background thread (shared/upload_queue.py) so the next
+# exposure never waits on the network; capture blocks once this many are waiting
+STILL_UPLOAD_QUEUE = 4
+# One capture worker per slave (shared/capture_queue.py): requests waiting beyond this
+# are rejected; repeated bare CAPTURE_STILLs within the window count as one
+CAPTURE_QUEUE_SIZE = 4
+CAPTURE_COALESCE_WINDOW = 1.0
+# Control group (shared/control_group.py): capture-all and start/stop-all streams go
+# out as one multicast datagram that every slave's control handler joins; cameras
+# that don't acknowledge within the timeout get the command by unicast
+CONTROL_GROUP_ENABLED = True
+CONTROL_GROUP_ADDRESS = "239.255.42.1"
+CONTROL_GROUP_PORT = 5006
+CONTROL_GROUP_ACK_TIMEOUT = 0.3
+# Cadence mode (shared/cadence.py): a capture set every CADENCE_INTERVAL seconds
+# (0 = only on CADENCE_TRIGGER_KEY, e.g. a USB foot pedal sending that key), with at
+# most CADENCE_MAX_IN_FLIGHT sets per camera captured but not yet delivered
+CADENCE_INTERVAL = 5.0
+CADENCE_MAX_IN_FLIGHT = 2
+CADENCE_TRIGGER_KEY = '<F8>'
 
 # Slave devices configuration
 SLAVES = {
@@ -57,7 +142,8 @@ def get_slave_ports(slave_ip):
             'video': LOCAL_VIDEO_PORT,
             'video_control': LOCAL_VIDEO_CONTROL_PORT,
             'still': LOCAL_STILL_PORT,  # 6010 for local camera
-            'heartbeat': LOCAL_HEARTBEAT_PORT
+            'heartbeat': LOCAL_HEARTBEAT_PORT,
+            'clock_sync': LOCAL_CLOCK_SYNC_PORT
         }
     else:  # Remote slaves
         return {
@@ -65,5 +151,6 @@ def get_slave_ports(slave_ip):
             'video': SLAVE_VIDEO_PORT,      # 5002  
             'video_control': SLAVE_VIDEO_CONTROL_PORT,  # 5004
             'still': SLAVE_STILL_PORT,    # 6000 (FIXED: still capture on port 6000)
-            'heartbeat': SLAVE_HEARTBEAT_PORT  # 5003
+            'heartbeat': SLAVE_HEARTBEAT_PORT,  # 5003
+            'clock_sync': SLAVE_CLOCK_SYNC_PORT  # 5005
         }
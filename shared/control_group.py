@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Control Group - one multicast datagram reaches every slave's command handler
+Capture-all and stream start/stop used to be one unicast send (one thread, one
+socket) per camera. The master now sends a single datagram to a multicast
+group every slave joins; each slave picks its own line (per-camera commands
+such as CAPTURE_AT carry that camera's fire time) or the "*" line:
+
+    GROUP <seq>
+    * START_STREAM
+    rep3 CAPTURE_AT_1700000000123_1700000002.004100
+
+and acknowledges from its control socket, so the reply comes back from the
+slave's control port to the master's group socket:
+
+    ACK <seq> <device>
+
+Cameras that haven't acknowledged within the ack timeout are sent the plain
+command by unicast, so a network that drops multicast only costs the timeout.
+"""
+
+import time
+import socket
+import select
+import struct
+import logging
+import threading
+from collections import deque
+
+DEFAULT_GROUP = "239.255.42.1"
+DEFAULT_PORT = 5006
+DEFAULT_ACK_TIMEOUT = 0.3      # Seconds before unacknowledged cameras get a unicast copy
+ALL_DEVICES = "*"
+RECENT_SEQUENCES = 32           # Sequence numbers remembered to drop repeated datagrams
+
+
+def format_group_command(seq, commands):
+    """commands: {device or '*': command}"""
+    lines = [f"GROUP {seq}"] + [f"{device} {command}" for device, command in commands.items()]
+    return "\n".join(lines).encode()
+
+
+def parse_group_command(data, device):
+    """(seq, command) meant for device, or None if the datagram has nothing for it"""
+    lines = data.decode(errors='replace').strip().split("\n")
+    first = lines[0].split()
+    if len(first) != 2 or first[0] != "GROUP":
+        return None
+    fallback = None
+    for line in lines[1:]:
+        target, _, command = line.strip().partition(" ")
+        if target == device and command:
+            return first[1], command
+        if target == ALL_DEVICES and command:
+            fallback = command
+    return (first[1], fallback) if fallback else None
+
+
+def format_ack(seq, device):
+    return f"ACK {seq} {device}".encode()
+
+
+def parse_ack(data):
+    """(seq, device) from an ACK datagram, or None"""
+    parts = data.decode(errors='replace').split()
+    if len(parts) != 3 or parts[0] != "ACK":
+        return None
+    return parts[1], parts[2]
+
+
+class ControlGroupReceiver:
+    """Slave side: joins the group and merges its commands with the control socket's"""
+
+    def __init__(self, device, group=DEFAULT_GROUP, port=DEFAULT_PORT):
+        self.device = device
+        self.group = group
+        self.port = port
+        self.sock = None
+        self._recent = deque(maxlen=RECENT_SEQUENCES)
+
+    def open(self):
+        """Join the group; returns False (unicast commands only) if the network won't allow it"""
+        try:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            sock.bind(("", self.port))
+            membership = struct.pack("4s4s", socket.inet_aton(self.group), socket.inet_aton("0.0.0.0"))
+            sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, membership)
+            self.sock = sock
+            logging.info(f"[GROUP] {self.device} joined control group {self.group}:{self.port}")
+            return True
+        except OSError as e:
+            logging.warning(f"[GROUP] Could not join control group {self.group}:{self.port}: {e}")
+            return False
+
+    def receive(self, control_sock, bufsize=1024):
+        """
+        Next (command, addr) from either the control socket or the group; group
+        commands are acknowledged from control_sock. Blocks like recvfrom(),
+        including raising socket.timeout after control_sock's timeout.
+        """
+        timeout = control_sock.gettimeout()
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            sockets = [control_sock, self.sock] if self.sock else [control_sock]
+            wait = None if deadline is None else max(0.0, deadline - time.time())
+            ready = select.select(sockets, [], [], wait)[0]
+            if not ready:
+                raise socket.timeout("timed out")
+            if control_sock in ready:
+                data, addr = control_sock.recvfrom(bufsize)
+                return data.decode().strip(), addr
+            data, addr = self.sock.recvfrom(4096)
+            parsed = parse_group_command(data, self.device)
+            if parsed is None:
+                continue
+            seq, command = parsed
+            try:
+                control_sock.sendto(format_ack(seq, self.device), addr)
+            except OSError as e:
+                logging.warning(f"[GROUP] Ack {seq} failed: {e}")
+            if seq in self._recent:
+                continue  # Already handled (datagram repeated)
+            self._recent.append(seq)
+            return command, addr
+
+    def close(self):
+        if self.sock:
+            self.sock.close()
+            self.sock = None
+
+
+class ControlGroupSender:
+    """Master side: one datagram to every slave, acknowledgements collected per sequence"""
+
+    def __init__(self, group=DEFAULT_GROUP, port=DEFAULT_PORT, ack_timeout=DEFAULT_ACK_TIMEOUT, ttl=1):
+        self.group = group
+        self.port = port
+        self.ack_timeout = ack_timeout
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, ttl)
+        self.sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_LOOP, 1)  # rep8 runs on this host
+        self.sock.bind(("", 0))
+        self._seq = int(time.time() * 1000) % 1000000
+        self._acks = {}                 # seq -> {device: seconds after send}
+        self._sent = {}                 # seq -> send time
+        self._lock = threading.Lock()
+        self._running = True
+        self._thread = threading.Thread(target=self._receive_acks, name="control-group-acks", daemon=True)
+        self._thread.start()
+
+        # Metrics
+        self.sent = 0
+        self.fallbacks = 0
+        self.last_fanout = None         # Seconds from send to the last expected ack
+
+    def send(self, commands):
+        """Send {device or '*': command} as one datagram; returns its sequence number"""
+        with self._lock:
+            self._seq += 1
+            seq = str(self._seq)
+            self._acks[seq] = {}
+            self._sent[seq] = time.time()
+            while len(self._sent) > RECENT_SEQUENCES:
+                oldest = next(iter(self._sent))
+                self._sent.pop(oldest)
+                self._acks.pop(oldest, None)
+        self.sock.sendto(format_group_command(seq, commands), (self.group, self.port))
+        self.sent += 1
+        return seq
+
+    def wait_acks(self, seq, devices, timeout=None):
+        """Block until every device acknowledged seq (or the timeout); returns the missing devices"""
+        deadline = time.time() + (self.ack_timeout if timeout is None else timeout)
+        while True:
+            with self._lock:
+                acks = dict(self._acks.get(seq, {}))
+            missing = [device for device in devices if device not in acks]
+            if not missing:
+                self.last_fanout = max(acks[device] for device in devices) if devices else 0.0
+                return []
+            if time.time() >= deadline:
+                self.fallbacks += 1
+                return missing
+            time.sleep(0.002)
+
+    def acks(self, seq):
+        with self._lock:
+            return dict(self._acks.get(seq, {}))
+
+    def _receive_acks(self):
+        while self._running:
+            try:
+                ready = select.select([self.sock], [], [], 0.5)[0]
+                if not ready:
+                    continue
+                data, _ = self.sock.recvfrom(256)
+            except OSError:
+                break
+            received = time.time()
+            parsed = parse_ack(data)
+            if not parsed:
+                continue
+            seq, device = parsed
+            with self._lock:
+                if seq in self._acks:
+                    self._acks[seq].setdefault(device, received - self._sent[seq])
+
+    def close(self):
+        self._running = False
+        self.sock.close()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Frame Mailbox - latest-wins handoff from the master's video receiver to decoders
+The receive thread only reads datagrams and reassembles frames; each complete
+frame is dropped into its camera's single-slot mailbox and decoded by that
+camera's own worker thread. A camera whose decode is slow never delays packet
+reads for the others, and a frame that is replaced before its worker gets to
+it is simply never decoded. Pillow and OpenCV release the GIL while decoding,
+so eight workers spread over the cores.
+"""
+
+import time
+import logging
+import threading
+
+
+class FrameMailbox:
+    """Single slot: put() replaces whatever hasn't been taken yet"""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._item = None
+        self.replaced = 0               # Items overwritten before take()
+
+    def put(self, item):
+        with self._cond:
+            if self._item is not None:
+                self.replaced += 1
+            self._item = item
+            self._cond.notify()
+
+    def take(self, timeout=None):
+        """Newest item, waiting up to timeout for one; None if there is none"""
+        with self._cond:
+            if self._item is None:
+                self._cond.wait(timeout)
+            item, self._item = self._item, None
+            return item
+
+
+class MailboxWorkers:
+    """One mailbox and one worker thread per key, each running handle(key, item)"""
+
+    def __init__(self, handle, name="decode"):
+        self.handle = handle
+        self.name = name
+        self._mailboxes = {}
+        self._lock = threading.Lock()
+        self._running = True
+
+        # Metrics per key
+        self.handled = {}
+        self.busy_seconds = {}
+
+    def submit(self, key, item):
+        """Hand item to key's worker (started on first use); never blocks"""
+        mailbox = self._mailboxes.get(key)
+        if mailbox is None:
+            with self._lock:
+                mailbox = self._mailboxes.get(key)
+                if mailbox is None:
+                    mailbox = self._mailboxes[key] = FrameMailbox()
+                    threading.Thread(target=self._run, args=(key, mailbox),
+                                     name=f"{self.name}-{key}", daemon=True).start()
+        mailbox.put(item)
+
+    def replaced(self, key):
+        """Items for key that were superseded before its worker took them"""
+        mailbox = self._mailboxes.get(key)
+        return mailbox.replaced if mailbox else 0
+
+    def stop(self):
+        self._running = False
+
+    def _run(self, key, mailbox):
+        while self._running:
+            item = mailbox.take(timeout=0.5)
+            if item is None:
+                continue
+            start = time.perf_counter()
+            try:
+                self.handle(key, item)
+            except Exception as e:
+                logging.error(f"[DECODE] {self.name} worker for {key}: {e}")
+            self.handled[key] = self.handled.get(key, 0) + 1
+            self.busy_seconds[key] = self.busy_seconds.get(key, 0.0) + time.perf_counter() - start
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Preview Codecs - pluggable still-image codecs for the preview stream
+Slaves encode with the codec named by VIDEO_CODEC; the master picks a decoder
+from the frame's own magic bytes (see sniff_codec), so slaves on different
+codecs can feed the same GUI and old raw-JPEG slaves keep working.
+
+    jpeg       OpenCV / libjpeg, chroma subsampling selectable
+    turbojpeg  libjpeg-turbo through PyTurboJPEG (optional), subsampling selectable
+    webp       OpenCV WebP - smaller frames, more encode CPU
+
+Single-channel (H, W) frames are encoded as true grayscale by every codec,
+so a grayscale preview no longer ships three identical channels.
+
+Frames are passed through in the same channel order cv2.imencode has always
+been given, so colors on the GUI are unchanged.
+"""
+
+import logging
+
+import cv2
+
+# Chroma subsampling names -> OpenCV sampling factors (OpenCV >= 4.5.5)
+_CV2_SAMPLING = {
+    '444': getattr(cv2, 'IMWRITE_JPEG_SAMPLING_FACTOR_444', None),
+    '422': getattr(cv2, 'IMWRITE_JPEG_SAMPLING_FACTOR_422', None),
+    '420': getattr(cv2, 'IMWRITE_JPEG_SAMPLING_FACTOR_420', None),
+}
+
+
+def sniff_codec(data):
+    """Codec name from an encoded frame's magic bytes (None if unknown)"""
+    if data[:2] == b'\xff\xd8':
+        return 'jpeg'
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return 'webp'
+    return None
+
+
+class PreviewCodec:
+    """Base class: encode(frame, quality) -> bytes or None"""
+
+    name = 'base'
+    wire_codec = None     # What sniff_codec() reports for this codec's output
+
+    def encode(self, frame, quality):
+        raise NotImplementedError
+
+    def describe(self):
+        return self.name
+
+
+class JpegCodec(PreviewCodec):
+    """OpenCV JPEG (the original preview encoder)"""
+
+    name = 'jpeg'
+    wire_codec = 'jpeg'
+
+    def __init__(self, subsampling='420'):
+        self.subsampling = subsampling
+        self._extra = []
+        factor = _CV2_SAMPLING.get(subsampling)
+        if factor is not None:
+            self._extra = [cv2.IMWRITE_JPEG_SAMPLING_FACTOR, factor]
+
+    def encode(self, frame, quality):
+        params = [cv2.IMWRITE_JPEG_QUALITY, int(quality)]
+        if frame.ndim == 3:
+            params += self._extra
+        success, encoded = cv2.imencode(".jpg", frame, params)
+        return encoded.tobytes() if success else None
+
+    def describe(self):
+        return f"{self.name} {self.subsampling}"
+
+
+class TurboJpegCodec(PreviewCodec):
+    """libjpeg-turbo via PyTurboJPEG; raises ImportError/OSError if it is not installed"""
+
+    name = 'turbojpeg'
+    wire_codec = 'jpeg'
+
+    def __init__(self, subsampling='420'):
+        import turbojpeg
+        self._turbojpeg = turbojpeg
+        self._jpeg = turbojpeg.TurboJPEG()
+        self.subsampling = subsampling
+        self._sampling = {
+            '444': turbojpeg.TJSAMP_444,
+            '422': turbojpeg.TJSAMP_422,
+            '420': turbojpeg.TJSAMP_420,
+        }.get(subsampling, turbojpeg.TJSAMP_420)
+
+    def encode(self, frame, quality):
+        tj = self._turbojpeg
+        if frame.ndim == 2:
+            return self._jpeg.encode(frame[:, :, None], quality=int(quality),
+                                     pixel_format=tj.TJPF_GRAY, jpeg_subsample=tj.TJSAMP_GRAY)
+        return self._jpeg.encode(frame, quality=int(quality), pixel_format=tj.TJPF_BGR,
+                                 jpeg_subsample=self._sampling)
+
+    def describe(self):
+        return f"{self.name} {self.subsampling}"
+
+
+class WebpCodec(PreviewCodec):
+    """OpenCV WebP (lossy)"""
+
+    name = 'webp'
+    wire_codec = 'webp'
+
+    def __init__(self, subsampling=None):
+        self.subsampling = '420'  # Lossy WebP is always 4:2:0
+
+    def encode(self, frame, quality):
+        params = [cv2.IMWRITE_WEBP_QUALITY, max(1, int(quality))]
+        success, encoded = cv2.imencode(".webp", frame, params)
+        return encoded.tobytes() if success else None
+
+
+CODECS = {
+    'jpeg': JpegCodec,
+    'turbojpeg': TurboJpegCodec,
+    'webp': WebpCodec,
+}
+
+
+def create_preview_codec(name='jpeg', subsampling='420'):
+    """Build a codec by name, falling back to OpenCV JPEG if it is unavailable"""
+    codec_class = CODECS.get(name)
+    if codec_class is None:
+        logging.warning(f"[CODEC] Unknown preview codec '{name}', using jpeg")
+        return JpegCodec(subsampling)
+    try:
+        return codec_class(subsampling)
+    except (ImportError, OSError, RuntimeError) as e:
+        logging.warning(f"[CODEC] {name} unavailable ({e}), using jpeg")
+        return JpegCodec(subsampling)
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Preview Demand - the frame rate and size the master actually displays
+The master sends SET_PREVIEW_DEMAND_<fps>_<width>x<height> whenever the GUI
+changes mode (grid / exclusive / hidden); slaves pace their capture stage to
+that rate and shrink frames to fit that size before encoding, instead of
+producing 640x480 at 30 fps for the master to throw away.
+
+Slaves that never receive a demand keep streaming at the native rate and size.
+"""
+
+import time
+import threading
+
+import cv2
+
+COMMAND_PREFIX = "SET_PREVIEW_DEMAND_"
+
+# Byte budgets in shared.config are expressed for a 640x480 frame
+REFERENCE_PIXELS = 640 * 480
+
+# Never sleep longer than this between demand checks, so a mode change applies promptly
+PACE_STEP = 0.05
+
+
+def format_demand_command(fps, size):
+    """(4, (320, 240)) -> 'SET_PREVIEW_DEMAND_4_320x240'"""
+    width, height = size
+    return f"{COMMAND_PREFIX}{fps:g}_{int(width)}x{int(height)}"
+
+
+def parse_demand_command(command):
+    """Inverse of format_demand_command(); returns (fps, (width, height)) or None"""
+    if not command.startswith(COMMAND_PREFIX):
+        return None
+    try:
+        fps_part, size_part = command[len(COMMAND_PREFIX):].split('_', 1)
+        width, height = (int(v) for v in size_part.lower().split('x'))
+        fps = float(fps_part)
+    except ValueError:
+        return None
+    if fps <= 0 or width <= 0 or height <= 0:
+        return None
+    return fps, (width, height)
+
+
+class PreviewDemand:
+    """Current demand for one slave stream; set by the command thread, read by the pipeline"""
+
+    def __init__(self, fps=None, size=None):
+        self.fps = fps          # None = native camera rate
+        self.size = size        # None = native resolution
+        self._lock = threading.Lock()
+        self._last_capture = 0.0
+        self.updates = 0
+
+    def set(self, fps, size):
+        """Apply a new demand; returns True if it changed"""
+        with self._lock:
+            changed = (fps, size) != (self.fps, self.size)
+            self.fps = fps
+            self.size = size
+            if changed:
+                self.updates += 1
+            return changed
+
+    def apply_command(self, command):
+        """Apply a SET_PREVIEW_DEMAND_ command; returns True if it changed the demand"""
+        parsed = parse_demand_command(command)
+        if parsed is None:
+            raise ValueError(f"Invalid preview demand: {command}")
+        return self.set(*parsed)
+
+    def describe(self):
+        fps = f"{self.fps:g} fps" if self.fps else "native fps"
+        size = f"{self.size[0]}x{self.size[1]}" if self.size else "native size"
+        return f"{fps}, {size}"
+
+    def pace(self, running=None):
+        """
+        Capture stage: wait until the next frame is due at the demanded rate.
+        Returns False if running() went False while waiting.
+        """
+        while True:
+            fps = self.fps
+            if not fps:
+                return True
+            interval = 1.0 / fps
+            now = time.perf_counter()
+            due = self._last_capture + interval
+            if now >= due:
+                # Keep the average rate exact despite capture latency, without bursting after a stall
+                self._last_capture = due if now - due < interval else now
+                return True
+            if running is not None and not running():
+                return False
+            time.sleep(min(due - now, PACE_STEP))
+
+    def fit(self, frame):
+        """Shrink frame to fit inside the demanded size (aspect kept, never upscaled)"""
+        size = self.size
+        if not size:
+            return frame
+        height, width = frame.shape[:2]
+        scale = min(size[0] / width, size[1] / height)
+        if scale >= 1.0:
+            return frame
+        target = (max(1, int(round(width * scale))), max(1, int(round(height * scale))))
+        return cv2.resize(frame, target, interpolation=cv2.INTER_AREA)
+
+
+def frame_budget(base_bytes, frame):
+    """Scale a 640x480 byte budget to this frame's pixel count"""
+    pixels = frame.shape[0] * frame.shape[1]
+    return max(1, int(base_bytes * pixels / REFERENCE_PIXELS))
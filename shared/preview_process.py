@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Preview Process - video receive, decode and resize in a child process
+Even on worker threads, decoding eight previews competes with Tkinter for
+the GIL, and the GUI heartbeat monitor logs the stalls. In this mode a child
+process owns the video port: it reassembles frames, decodes them at the
+size the GUI wants and publishes ready-to-blit RGB tiles into one
+multiprocessing.shared_memory slot per camera. The Tk process only copies a
+tile out of shared memory into its PhotoImage.
+
+Slot layout (little-endian header, then up to MAX_TILE_SIZE RGB pixels):
+
+    generation  Q   odd while the child is writing a tile, even when it is complete
+    width       I   size of the tile in the slot
+    height      I
+    want_width  I   size the GUI displays this camera at (written by the GUI)
+    want_height I
+    received    Q   frames completed by the reassembler
+    decoded     Q   tiles published
+    lost        Q   frames lost on the network
+
+The GUI reads the generation before and after copying a tile and retries if
+it changed, so it never shows a half-written tile and never takes a lock.
+"""
+
+import io
+import time
+import struct
+import socket
+import logging
+import multiprocessing
+from multiprocessing import shared_memory
+
+from PIL import Image
+
+HEADER = struct.Struct("<QIIIIQQQ")
+WANT_OFFSET = 16                # want_width / want_height
+COUNTERS_OFFSET = 24            # received / decoded / lost
+MAX_TILE_SIZE = (960, 720)      # Exclusive preview, the largest tile the GUI shows
+DEFAULT_TILE_SIZE = (320, 240)
+SLOT_SIZE = HEADER.size + MAX_TILE_SIZE[0] * MAX_TILE_SIZE[1] * 3
+READ_RETRIES = 3
+
+
+def read_header(buf):
+    """(generation, width, height, want_width, want_height, received, decoded, lost)"""
+    return HEADER.unpack_from(buf, 0)
+
+
+def write_tile(buf, image):
+    """Child side: publish an RGB PIL image into a slot"""
+    generation = struct.unpack_from("<Q", buf, 0)[0]
+    struct.pack_into("<Q", buf, 0, generation + 1)            # Odd: being written
+    width, height = image.size
+    buf[HEADER.size:HEADER.size + width * height * 3] = image.tobytes()
+    struct.pack_into("<II", buf, 8, width, height)
+    struct.pack_into("<Q", buf, 0, generation + 2)            # Even: complete
+
+
+def read_tile(buf, last_generation=None):
+    """GUI side: (generation, RGB PIL image) if a newer complete tile is in the slot, else None"""
+    for _ in range(READ_RETRIES):
+        generation, width, height = HEADER.unpack_from(buf, 0)[:3]
+        if generation % 2:
+            continue  # The child is writing it right now
+        if generation == last_generation or not width:
+            return None
+        pixels = bytes(buf[HEADER.size:HEADER.size + width * height * 3])
+        if struct.unpack_from("<Q", buf, 0)[0] == generation:
+            return generation, Image.frombuffer("RGB", (width, height), pixels, "raw", "RGB", 0, 1)
+    return None
+
+
+def decode_tile(data, size):
+    """RGB tile of exactly size from a JPEG/WebP frame (JPEGs decoded at reduced DCT scale)"""
+    image = Image.open(io.BytesIO(data))
+    if image.format == "JPEG":
+        image.draft("RGB", size)
+    image = image.convert("RGB")
+    return image if image.size == size else image.resize(size, Image.Resampling.BILINEAR)
+
+
+def run_preview_receiver(port, slot_names, reassembly_timeout, stop_event):
+    """Child process: receive, reassemble and decode every camera's preview into its slot"""
+    from shared.video_framing import FrameReassembler
+    from shared.frame_mailbox import MailboxWorkers
+
+    slots = {ip: shared_memory.SharedMemory(name=name) for ip, name in slot_names.items()}
+    reassembler = FrameReassembler(reassembly_timeout)
+
+    def decode(ip, data):
+        buf = slots[ip].buf
+        want = struct.unpack_from("<II", buf, WANT_OFFSET)
+        write_tile(buf, decode_tile(data, want if all(want) else DEFAULT_TILE_SIZE))
+        decoded = struct.unpack_from("<Q", buf, COUNTERS_OFFSET + 8)[0]
+        struct.pack_into("<Q", buf, COUNTERS_OFFSET + 8, decoded + 1)
+
+    workers = MailboxWorkers(decode, name="preview-process-decode")
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 262144)
+    sock.bind(("0.0.0.0", port))
+    sock.settimeout(0.5)
+    logging.info(f"[PREVIEW] Child process receiving previews on port {port}")
+
+    while not stop_event.is_set():
+        try:
+            data, addr = sock.recvfrom(65536)
+        except socket.timeout:
+            continue
+        ip = "127.0.0.1" if addr[0] == "localhost" else addr[0]
+        if ip not in slots:
+            continue
+        result = reassembler.add(ip, data)
+        if result is None:
+            continue
+        stats = reassembler.stats(ip)
+        struct.pack_into("<Q", slots[ip].buf, COUNTERS_OFFSET, stats['frames'])
+        struct.pack_into("<Q", slots[ip].buf, COUNTERS_OFFSET + 16, stats['lost'])
+        workers.submit(ip, result[1])
+
+    workers.stop()
+    sock.close()
+    time.sleep(0.1)  # Let a worker finish its tile before the slots go away
+    for slot in slots.values():
+        slot.close()
+
+
+class PreviewProcess:
+    """GUI side: owns the shared-memory slots and the child process"""
+
+    def __init__(self, ips, port, reassembly_timeout=0.5):
+        self.ips = list(ips)
+        self.port = port
+        self.reassembly_timeout = reassembly_timeout
+        self.slots = {}
+        self._generations = {}
+        self._process = None
+        self._stop = None
+
+    def start(self):
+        """Create the slots and start the child (before the GUI starts its own threads)"""
+        for ip in self.ips:
+            slot = shared_memory.SharedMemory(create=True, size=SLOT_SIZE)
+            slot.buf[:HEADER.size] = bytes(HEADER.size)
+            self.slots[ip] = slot
+            self.set_size(ip, DEFAULT_TILE_SIZE)
+        self._stop = multiprocessing.Event()
+        self._process = multiprocessing.Process(
+            target=run_preview_receiver, name="preview-receiver", daemon=True,
+            args=(self.port, {ip: slot.name for ip, slot in self.slots.items()},
+                  self.reassembly_timeout, self._stop))
+        self._process.start()
+        logging.info(f"[PREVIEW] Preview receiver process started (pid {self._process.pid})")
+
+    def alive(self):
+        return self._process is not None and self._process.is_alive()
+
+    def set_size(self, ip, size):
+        """Size the child should decode this camera's tiles at"""
+        struct.pack_into("<II", self.slots[ip].buf, WANT_OFFSET, *size)
+
+    def read(self, ip):
+        """Newest tile for ip as an RGB PIL image, or None if it hasn't changed since the last read"""
+        slot = self.slots.get(ip)
+        if slot is None:
+            return None
+        result = read_tile(slot.buf, self._generations.get(ip))
+        if result is None:
+            return None
+        self._generations[ip], image = result
+        return image
+
+    def stats(self, ip):
+        """{'received', 'decoded', 'lost', 'loss_rate'} counted by the child for ip"""
+        received, decoded, lost = read_header(self.slots[ip].buf)[5:]
+        loss_rate = lost / (received + lost) * 100 if received + lost else 0.0
+        return {'received': received, 'decoded': decoded, 'lost': lost, 'loss_rate': loss_rate}
+
+    def stop(self):
+        if self._stop:
+            self._stop.set()
+        if self._process:
+            self._process.join(timeout=2.0)
+        for slot in self.slots.values():
+            slot.close()
+            slot.unlink()
+        self.slots = {}
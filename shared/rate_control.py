@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+JPEG Rate Control
+Picks the JPEG quality for each preview frame so the encoded size lands near a
+per-frame byte budget - with ONE encode per frame instead of encode, check the
+size, encode again.
+
+Model: size ≈ k × pixels × curve(quality) × complexity(frame)
+  - curve(quality): typical relative JPEG size vs quality (1.0 at q=50)
+  - complexity:     mean Laplacian magnitude of a small grayscale thumbnail,
+                    so a scene change moves the prediction immediately
+  - k:              learned online from the sizes actually produced
+"""
+
+import math
+import threading
+
+import cv2
+import numpy as np
+
+from shared.preview_codecs import JpegCodec
+
+# Relative JPEG size vs quality (q=50 → 1.0), averaged over typical preview scenes
+QUALITY_CURVE = (
+    (5, 0.26), (10, 0.36), (20, 0.54), (30, 0.71), (40, 0.85), (50, 1.0),
+    (60, 1.16), (70, 1.41), (80, 1.84), (85, 2.2), (90, 2.9), (95, 4.4), (100, 9.3),
+)
+_CURVE_Q = np.array([q for q, _ in QUALITY_CURVE], dtype=np.float64)
+_CURVE_LOG = np.log([r for _, r in QUALITY_CURVE])
+
+# Thumbnail used to estimate scene complexity (cost ~0.1 ms at 640x480)
+COMPLEXITY_SIZE = (80, 60)
+
+
+def frame_complexity(frame):
+    """Cheap detail estimate: mean |Laplacian| of a small grayscale thumbnail"""
+    thumb = cv2.resize(frame, COMPLEXITY_SIZE, interpolation=cv2.INTER_AREA)
+    if thumb.ndim == 3:
+        thumb = cv2.cvtColor(thumb, cv2.COLOR_RGB2GRAY)
+    laplacian = cv2.Laplacian(thumb, cv2.CV_16S)
+    return float(cv2.mean(cv2.convertScaleAbs(laplacian))[0]) + 1.0
+
+
+def curve_log(quality):
+    """log relative size at a quality"""
+    return float(np.interp(quality, _CURVE_Q, _CURVE_LOG))
+
+
+def quality_for_log(log_ratio):
+    """Inverse of curve_log()"""
+    return float(np.interp(log_ratio, _CURVE_LOG, _CURVE_Q))
+
+
+class JpegRateController:
+    """
+    Predicts the JPEG quality that hits target_bytes; safe to share between encoder threads.
+    codec is any shared.preview_codecs codec (OpenCV JPEG by default); for non-JPEG
+    codecs the curve is only approximate and the learned k absorbs the difference.
+    """
+
+    def __init__(self, target_bytes, min_quality=20, max_quality=85, initial_quality=50, gain=0.5,
+                 codec=None):
+        self.target_bytes = target_bytes
+        self.codec = codec or JpegCodec()
+        self.min_quality = min_quality
+        self.max_quality = max_quality
+        self.initial_quality = initial_quality
+        self.gain = gain               # How fast k follows new observations (0..1)
+        self._log_k = None             # Learned scale, None until the first frame
+        self._lock = threading.Lock()
+
+        # Instrumentation
+        self.frames = 0
+        self.last_quality = initial_quality
+        self.last_size = 0
+        self.total_bytes = 0
+
+    def _clamp(self, quality):
+        low = min(self.min_quality, self.max_quality)
+        return int(round(min(max(quality, low), self.max_quality)))
+
+    def choose_quality(self, frame):
+        """Return (quality, complexity) for this frame"""
+        complexity = frame_complexity(frame)
+        log_k = self._log_k
+        if log_k is None:
+            return self._clamp(self.initial_quality), complexity
+
+        pixels = frame.shape[0] * frame.shape[1]
+        wanted = math.log(max(self.target_bytes, 1)) - log_k - math.log(pixels * complexity)
+        return self._clamp(quality_for_log(wanted)), complexity
+
+    def update(self, quality, complexity, size, pixels):
+        """Learn from the size one encode actually produced"""
+        if size <= 0:
+            return
+        observed = math.log(size) - curve_log(quality) - math.log(pixels * complexity)
+        with self._lock:
+            if self._log_k is None:
+                self._log_k = observed
+            else:
+                self._log_k += self.gain * (observed - self._log_k)
+            self.frames += 1
+            self.last_quality = quality
+            self.last_size = size
+            self.total_bytes += size
+
+    def encode(self, frame):
+        """Encode once at the predicted quality; returns the encoded bytes or None"""
+        quality, complexity = self.choose_quality(frame)
+        data = self.codec.encode(frame, quality)
+        if data is None:
+            return None
+        self.update(quality, complexity, len(data), frame.shape[0] * frame.shape[1])
+        return data
+
+    def stats(self):
+        return {
+            'frames': self.frames,
+            'target_bytes': self.target_bytes,
+            'last_quality': self.last_quality,
+            'last_size': self.last_size,
+            'avg_size': self.total_bytes / self.frames if self.frames else 0,
+        }
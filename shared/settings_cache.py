@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Device Settings Cache
+Keeps parsed {device}_settings.json files in memory so the per-frame video path
+never re-opens and re-parses JSON on the SD card. An entry is reloaded only when
+the file's stat signature (inode, mtime, size) changes or it is explicitly invalidated.
+"""
+
+import os
+import time
+import threading
+import logging
+
+# Minimum seconds between stat() checks of a cached file.
+# Changes made through save_device_settings()/invalidate() are seen immediately;
+# this only bounds how long an edit by ANOTHER process can go unnoticed.
+DEFAULT_CHECK_INTERVAL = 0.5
+
+
+def file_signature(path):
+    """Return (inode, mtime_ns, size) of a file, or None if it cannot be stat'ed"""
+    try:
+        st = os.stat(path)
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+    except OSError:
+        return None
+
+
+class SettingsCache:
+    """In-memory settings per device, revalidated against the file's stat signature"""
+
+    def __init__(self, check_interval=DEFAULT_CHECK_INTERVAL):
+        self.check_interval = check_interval
+        self._entries = {}  # key -> {'path', 'signature', 'settings', 'checked_at'}
+        self._lock = threading.Lock()
+
+        # Instrumentation
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+
+    def get(self, key):
+        """Return cached settings for key, or None if missing or the file changed"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        now = time.monotonic()
+        if now - entry['checked_at'] >= self.check_interval:
+            if file_signature(entry['path']) != entry['signature']:
+                # File was rewritten (or removed) behind our back - force a reload
+                with self._lock:
+                    if self._entries.get(key) is entry:
+                        del self._entries[key]
+                self.reloads += 1
+                self.misses += 1
+                logging.info(f"[SETTINGS_CACHE] {key}: file changed on disk, reloading")
+                return None
+            entry['checked_at'] = now
+
+        self.hits += 1
+        return entry['settings']
+
+    def put(self, key, path, settings, signature=None):
+        """Store parsed settings; signature should be taken BEFORE the file was read"""
+        if signature is None:
+            signature = file_signature(path)
+        if signature is None:
+            return
+        with self._lock:
+            self._entries[key] = {
+                'path': path,
+                'signature': signature,
+                'settings': dict(settings),
+                'checked_at': time.monotonic(),
+            }
+
+    def invalidate(self, key=None):
+        """Drop one device (or every device when key is None) from the cache"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self):
+        """Return hit/miss counters for performance logging"""
+        total = self.hits + self.misses
+        hit_rate = (self.hits / total * 100) if total else 0.0
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'reloads': self.reloads,
+            'hit_rate': hit_rate,
+            'entries': len(self._entries),
+        }
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Still Ingest - asyncio server for framed still uploads (see still_protocol.py)
+One event loop thread serves every upload instead of a thread per connection:
+
+- at most max_uploads are read at once; the rest wait in the kernel's
+  accept/receive buffers (their cameras simply block in sendall)
+- chunks are handed to a single disk-writer thread in arrival order; when
+  more than queue_chunks writes are pending the upload stops reading, so a
+  slow disk pushes back through TCP instead of piling images up in memory
+- every upload is timed: slot wait, disk backpressure and throughput
+
+The caller decides where each still goes (destination) and what happens once
+it is complete on disk (on_saved); both run on the disk-writer thread.
+"""
+
+import time
+import socket
+import asyncio
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from shared.still_protocol import CHUNK_SIZE, StillTransferError, StillWriter, read_header_async
+
+DEFAULT_MAX_UPLOADS = 4         # Uploads read concurrently
+DEFAULT_QUEUE_CHUNKS = 8        # Chunk writes pending per upload before it stops reading
+DEFAULT_TIMEOUT = 30.0          # Seconds without data before an upload is abandoned
+
+
+class StillIngestServer:
+    """
+    destination(ip, header) -> (path, context)   header is None for legacy uploads
+    on_saved(upload)                              upload: dict with ip, header, path, context and metrics
+    """
+
+    def __init__(self, port, destination, on_saved, max_uploads=DEFAULT_MAX_UPLOADS,
+                 queue_chunks=DEFAULT_QUEUE_CHUNKS, chunk_size=CHUNK_SIZE, timeout=DEFAULT_TIMEOUT):
+        self.port = port
+        self.destination = destination
+        self.on_saved = on_saved
+        self.max_uploads = max_uploads
+        self.queue_chunks = queue_chunks
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+        # One thread: chunks of a file must be written in order, and one disk gains nothing from more
+        self._disk = ThreadPoolExecutor(max_workers=1, thread_name_prefix="still-writer")
+        self._loop = None
+        self._server = None
+        self._slots = None
+        self._thread = None
+        self._ready = threading.Event()
+
+        # Metrics
+        self.active = 0
+        self.peak_active = 0
+        self.completed = 0
+        self.failed = 0
+        self.bytes_received = 0
+        self.recent = deque(maxlen=32)  # Metrics of the latest completed uploads
+
+    # --- Lifecycle ---
+
+    def serve_forever(self):
+        """Run the event loop in the calling thread until stop()"""
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._slots = asyncio.Semaphore(self.max_uploads)
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            sock.bind(("0.0.0.0", self.port))
+            self.port = sock.getsockname()[1]
+            self._server = self._loop.run_until_complete(
+                asyncio.start_server(self._handle, sock=sock, backlog=32, limit=self.chunk_size))
+            logging.info(f"Still receiver listening on port {self.port} "
+                         f"(asyncio, {self.max_uploads} concurrent uploads)")
+            self._ready.set()
+            self._loop.run_forever()
+        finally:
+            self._ready.set()
+            if self._server:
+                self._server.close()
+                self._loop.run_until_complete(self._server.wait_closed())
+            self._loop.close()
+            self._disk.shutdown(wait=True)
+
+    def start(self):
+        """serve_forever() on a daemon thread; returns once the port is bound"""
+        self._thread = threading.Thread(target=self.serve_forever, name="still-ingest", daemon=True)
+        self._thread.start()
+        self._ready.wait(5.0)
+
+    def stop(self):
+        if self._loop and self._loop.is_running():
+            self._loop.call_soon_threadsafe(self._loop.stop)
+        if self._thread:
+            self._thread.join(5.0)
+
+    # --- Uploads ---
+
+    async def _handle(self, reader, writer):
+        peer = writer.get_extra_info('peername')
+        ip = peer[0] if peer else "unknown"
+        arrived = time.time()
+        try:
+            async with self._slots:
+                self.active += 1
+                self.peak_active = max(self.peak_active, self.active)
+                try:
+                    upload = await self._receive(ip, reader, time.time() - arrived)
+                finally:
+                    self.active -= 1
+            if upload:
+                self.completed += 1
+                self.bytes_received += upload['size']
+                self.recent.append(upload)
+                logging.info(f"[INGEST] {format_upload(upload)}")
+        except (StillTransferError, asyncio.TimeoutError, ConnectionError, OSError, ValueError) as e:
+            self.failed += 1
+            logging.error(f"[INGEST] Rejected still from {ip}: {e or type(e).__name__}")
+        except Exception as e:
+            self.failed += 1
+            logging.error(f"[INGEST] Error handling still from {ip}: {e}")
+        finally:
+            writer.close()
+
+    async def _receive(self, ip, reader, slot_wait):
+        loop = asyncio.get_running_loop()
+        header, initial = await asyncio.wait_for(read_header_async(reader), self.timeout)
+        if header is None and not initial:
+            return None  # Connected and closed without sending anything
+        started = time.time()
+        path, context = await loop.run_in_executor(self._disk, self.destination, ip, header)
+        still = await loop.run_in_executor(self._disk, StillWriter, path, header)
+
+        pending = deque()
+        disk_wait = 0.0
+        expected = header['size'] if header else None
+        received = len(initial)
+        try:
+            if initial:
+                pending.append(loop.run_in_executor(self._disk, still.write, initial))
+            while expected is None or received < expected:
+                want = self.chunk_size if expected is None else min(self.chunk_size, expected - received)
+                chunk = await asyncio.wait_for(reader.read(want), self.timeout)
+                if not chunk:
+                    break
+                received += len(chunk)
+                pending.append(loop.run_in_executor(self._disk, still.write, chunk))
+                if len(pending) >= self.queue_chunks:
+                    # Backpressure: stop reading until the disk catches up
+                    waited = time.time()
+                    await pending.popleft()
+                    disk_wait += time.time() - waited
+            while pending:
+                await pending.popleft()
+            size = await loop.run_in_executor(self._disk, still.finish)
+        except BaseException:
+            for future in pending:
+                future.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            await loop.run_in_executor(self._disk, still.abort)
+            raise
+
+        elapsed = max(time.time() - started, 1e-6)
+        upload = {
+            'ip': ip,
+            'header': header,
+            'path': path,
+            'context': context,
+            'size': size,
+            'seconds': elapsed,
+            'mbps': size / elapsed / 1e6,
+            'slot_wait': slot_wait,
+            'disk_wait': disk_wait,
+        }
+        await loop.run_in_executor(self._disk, self.on_saved, upload)
+        return upload
+
+    # --- Metrics ---
+
+    def format_stats(self):
+        text = (f"Stills: {self.completed} ok, {self.failed} failed, {self.bytes_received / 1e6:.1f}MB, "
+                f"{self.active} active (peak {self.peak_active}/{self.max_uploads})")
+        if self.recent:
+            mbps = sorted(upload['mbps'] for upload in self.recent)
+            text += f", median {mbps[len(mbps) // 2]:.1f}MB/s over last {len(mbps)}"
+        return text
+
+
+def format_upload(upload):
+    """One log line per upload"""
+    header = upload['header'] or {}
+    device = header.get('device') or upload['ip']
+    text = (f"{device}: {upload['size'] / 1e6:.1f}MB in {upload['seconds'] * 1000:.0f}ms "
+            f"({upload['mbps']:.1f}MB/s, slot wait {upload['slot_wait'] * 1000:.0f}ms, "
+            f"disk backpressure {upload['disk_wait'] * 1000:.0f}ms)")
+    if not upload['header']:
+        text += " legacy, unchecked"
+    return text
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Still Protocol - framed still-image upload from slave to master (STILL_PORT)
+Every upload starts with a length-prefixed JSON header, then the image bytes:
+
+    b"GSTL" | header length (uint32, big endian) | header JSON | image (size bytes)
+
+    header: {"version": 1, "device": "rep3", "capture_id": "1700000000123" | null,
+             "sensor_time": 1700000002.0041 | null, "settings_hash": "9f2c01ab" | null,
+             "size": 7340032, "crc32": 2864434397, "filename": "rep3_20240101_120000.jpg"}
+
+The receiver streams the image straight to a temporary file through one
+preallocated buffer (recv_into), checks size and CRC-32, then renames the
+file into place - memory use is flat whatever the image size, and a torn
+upload never appears in the gallery. Uploads without the magic are legacy
+bare JPEGs and are read to EOF the same way.
+"""
+
+import os
+import json
+import zlib
+import struct
+import hashlib
+
+from shared.capture_sync import read_capture_info
+
+MAGIC = b"GSTL"
+VERSION = 1
+PREFIX = struct.Struct(">4sI")     # magic, header length
+MAX_HEADER_SIZE = 64 * 1024
+CHUNK_SIZE = 256 * 1024
+
+
+class StillTransferError(Exception):
+    """Upload truncated, oversized or failing its checksum"""
+
+
+def settings_hash(settings):
+    """Short stable hash of a settings dict (which transforms produced this still)"""
+    if not settings:
+        return None
+    encoded = json.dumps(settings, sort_keys=True, default=str).encode()
+    return hashlib.sha1(encoded).hexdigest()[:8]
+
+
+def file_crc32(path, chunk_size=CHUNK_SIZE):
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+    crc = 0
+    with open(path, "rb", buffering=0) as f:
+        while True:
+            count = f.readinto(buffer)
+            if not count:
+                return crc
+            crc = zlib.crc32(view[:count], crc)
+
+
+def build_header(size, crc32, device, capture_id=None, sensor_time=None, settings_hash=None, filename=None):
+    header = {
+        'version': VERSION,
+        'device': device,
+        'capture_id': capture_id,
+        'sensor_time': sensor_time,
+        'settings_hash': settings_hash,
+        'size': size,
+        'crc32': crc32,
+        'filename': filename,
+    }
+    encoded = json.dumps(header, separators=(',', ':')).encode()
+    return PREFIX.pack(MAGIC, len(encoded)) + encoded
+
+
+def metadata_from_info(info, device, settings=None):
+    """send_still() keyword arguments from a still's capture info (None if it has none)"""
+    info = info or {}
+    return {
+        'device': info.get('device') or device,
+        'capture_id': info.get('capture_id'),
+        'sensor_time': info.get('sensor_time'),
+        'settings_hash': info.get('settings_hash') or settings_hash(settings),
+    }
+
+
+def still_metadata(data, device, settings=None):
+    """send_still() keyword arguments for a JPEG: capture info from its COM segment when present"""
+    return metadata_from_info(read_capture_info(data), device, settings)
+
+
+def send_still(sock, data, device, **metadata):
+    """Send one framed still (data: bytes-like) over a connected socket"""
+    return send_still_parts(sock, [data], device, **metadata)
+
+
+def send_still_parts(sock, parts, device, **metadata):
+    """
+    Send a still held as several buffers (e.g. capture_sync.capture_info_parts) as one
+    framed upload; each buffer goes to the socket as-is, without joining them first
+    """
+    views = [memoryview(part).cast('B') for part in parts]
+    size = sum(view.nbytes for view in views)
+    crc = 0
+    for view in views:
+        crc = zlib.crc32(view, crc)
+    sock.sendall(build_header(size, crc, device, **metadata))
+    for view in views:
+        sock.sendall(view)
+    return size
+
+
+def send_still_file(sock, path, device, settings=None, crc32=None):
+    """
+    Send a still from disk with socket.sendfile() (no copy through Python); returns its size.
+    Pass the crc32 save_parts() returned - without it the file is read once more to compute it.
+    """
+    with open(path, "rb") as f:
+        head = f.read(CHUNK_SIZE)
+        size = os.fstat(f.fileno()).st_size
+        if crc32 is None:
+            crc32 = file_crc32(path)
+        metadata = metadata_from_info(read_capture_info(head), device, settings)
+        sock.sendall(build_header(size, crc32, filename=os.path.basename(path), **metadata))
+        f.seek(0)
+        sock.sendfile(f)
+    return size
+
+
+def save_parts(path, parts):
+    """Write a still held as several buffers (no join) to path; returns its CRC-32 for send_still_file()"""
+    crc = 0
+    with open(path, "wb") as f:
+        for part in parts:
+            f.write(part)
+            crc = zlib.crc32(memoryview(part).cast('B'), crc)
+    return crc
+
+
+def _recv_exact(conn, count):
+    data = bytearray()
+    while len(data) < count:
+        chunk = conn.recv(count - len(data))
+        if not chunk:
+            raise StillTransferError(f"connection closed after {len(data)}/{count} header bytes")
+        data += chunk
+    return bytes(data)
+
+
+def _header_length(first):
+    """Header length from the prefix, or None if first is not a framed upload's prefix"""
+    if len(first) < PREFIX.size or first[:4] != MAGIC:
+        return None
+    _, length = PREFIX.unpack(first)
+    if length > MAX_HEADER_SIZE:
+        raise StillTransferError(f"header of {length} bytes")
+    return length
+
+
+def _decode_header(raw):
+    header = json.loads(raw.decode())
+    if header.get('version') != VERSION:
+        raise StillTransferError(f"unsupported still protocol version {header.get('version')}")
+    return header
+
+
+def _short_prefix(first):
+    """True while first could still grow into the magic and prefix"""
+    return 0 < len(first) < PREFIX.size and MAGIC.startswith(first[:4])
+
+
+def read_header(conn):
+    """
+    (header, b"") for a framed upload, or (None, first_bytes) for a legacy bare JPEG -
+    first_bytes must be written before the rest of the stream.
+    """
+    first = conn.recv(PREFIX.size)
+    while _short_prefix(first):
+        more = conn.recv(PREFIX.size - len(first))
+        if not more:
+            break
+        first += more
+    length = _header_length(first)
+    if length is None:
+        return None, first
+    return _decode_header(_recv_exact(conn, length)), b""
+
+
+async def read_header_async(reader):
+    """read_header() for an asyncio StreamReader"""
+    import asyncio
+    first = await reader.read(PREFIX.size)
+    while _short_prefix(first):
+        more = await reader.read(PREFIX.size - len(first))
+        if not more:
+            break
+        first += more
+    length = _header_length(first)
+    if length is None:
+        return None, first
+    try:
+        raw = await reader.readexactly(length)
+    except asyncio.IncompleteReadError as e:
+        raise StillTransferError(f"connection closed after {len(e.partial)}/{length} header bytes")
+    return _decode_header(raw), b""
+
+
+class StillWriter:
+    """
+    Writes one upload to path + '.part' with a running CRC; finish() checks it
+    against the header and renames the file into place, abort() removes it.
+    Without a header (legacy upload) finish() only requires a non-empty image.
+    """
+
+    def __init__(self, path, header=None):
+        self.path = path
+        self.header = header
+        self.temp_path = path + ".part"
+        self.size = 0
+        self.crc = 0
+        self._file = open(self.temp_path, "wb")
+
+    def write(self, chunk):
+        self._file.write(chunk)
+        self.crc = zlib.crc32(chunk, self.crc)
+        self.size += len(chunk)
+
+    def finish(self):
+        """Verify and rename into place; returns the image size"""
+        try:
+            self._file.close()
+            if self.header:
+                if self.size != self.header['size']:
+                    raise StillTransferError(f"truncated upload: {self.size}/{self.header['size']} bytes")
+                if self.crc != self.header['crc32']:
+                    raise StillTransferError(f"CRC mismatch: {self.crc:08x} != {self.header['crc32']:08x}")
+            elif self.size == 0:
+                raise StillTransferError("empty upload")
+            os.replace(self.temp_path, self.path)
+            return self.size
+        except BaseException:
+            self.abort()
+            raise
+
+    def abort(self):
+        self._file.close()
+        try:
+            os.remove(self.temp_path)
+        except OSError:
+            pass
+
+
+def receive_to_file(conn, path, header=None, initial=b"", buffer=None):
+    """
+    Stream the image to path via path + '.part' and rename it into place.
+    With a header the size and CRC are checked; without one (legacy) the image runs to EOF.
+    Returns the number of bytes written.
+    """
+    buffer = buffer if buffer is not None else bytearray(CHUNK_SIZE)
+    view = memoryview(buffer)
+    expected = header['size'] if header else None
+    writer = StillWriter(path, header)
+    try:
+        if initial:
+            writer.write(initial)
+        while expected is None or writer.size < expected:
+            want = len(buffer) if expected is None else min(len(buffer), expected - writer.size)
+            count = conn.recv_into(view[:want])
+            if count == 0:
+                break
+            writer.write(view[:count])
+    except BaseException:
+        writer.abort()
+        raise
+    return writer.finish()
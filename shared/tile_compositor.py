@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Tile Compositor - layout and dirty tracking for the composite preview
+The composite preview renderer draws all visible cameras on one canvas,
+each camera's preview as a canvas image item of exactly one tile. Each
+display tick the GUI takes only the tiles that received a new frame from
+compose() and pastes those into their PhotoImages - unchanged tiles, the
+header strips and the gaps between tiles never go to Tk, and nothing does
+when no camera has a new frame.
+
+Cells are laid out row by row; each cell has `header` pixels above its tile
+for the camera's name/state/buttons strip (a Tk widget placed on the
+canvas) and `gap` pixels around it.
+"""
+
+import math
+
+import numpy as np
+from PIL import Image
+
+DEFAULT_TILE_SIZE = (320, 240)
+DEFAULT_BACKGROUND = (51, 51, 51)    # gray20, the background of the per-camera labels
+
+
+def fit_tile(image, size):
+    """RGB PIL image of exactly size from a PIL image or HxWx3 array"""
+    if isinstance(image, np.ndarray):
+        image = Image.fromarray(np.ascontiguousarray(image[:, :, :3]))
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    return image if image.size == tuple(size) else image.resize(size, Image.Resampling.BILINEAR)
+
+
+class TileCompositor:
+    """Fixed grid of tiles; update() queues a tile, compose() hands over the queued (dirty) ones"""
+
+    def __init__(self, tile_size=DEFAULT_TILE_SIZE, columns=4, header=0, gap=6, background=DEFAULT_BACKGROUND):
+        self.tile_size = tile_size
+        self.columns = columns
+        self.header = header
+        self.gap = gap
+        self.background = background
+        self.positions = {}             # key -> (x, y) of the tile's top-left pixel
+        self.size = (0, 0)              # (width, height) of the whole layout
+        self._pending = {}
+
+        # Metrics
+        self.composes = 0               # compose() calls with at least one dirty tile
+        self.blits = 0                  # Tiles handed over to be pushed to Tk
+        self.unchanged = 0              # Visible tiles left alone because no new frame arrived
+        self.pixels = 0                 # Pixels handed over (tile area only)
+
+    def layout(self, keys, tile_size=None, columns=None):
+        """Place tiles for keys, row by row; queued tiles are dropped"""
+        if tile_size:
+            self.tile_size = tile_size
+        if columns:
+            self.columns = columns
+        keys = list(keys)
+        columns = max(1, min(self.columns, len(keys)))
+        rows = max(1, math.ceil(len(keys) / columns))
+        cell_width, cell_height = self.cell_size()
+        self.positions = {}
+        for index, key in enumerate(keys):
+            row, col = divmod(index, columns)
+            self.positions[key] = (col * cell_width + self.gap // 2,
+                                   row * cell_height + self.gap // 2 + self.header)
+        self.size = (columns * cell_width, rows * cell_height)
+        self._pending = {}
+
+    def cell_size(self):
+        return self.tile_size[0] + self.gap, self.tile_size[1] + self.header + self.gap
+
+    def update(self, key, image):
+        """Queue a new frame (RGB PIL image or HxWx3 array) for key; ignored if key isn't laid out"""
+        if key not in self.positions:
+            return False
+        self._pending[key] = image
+        return True
+
+    def compose(self):
+        """{key: tile-sized RGB image} for the tiles with a new frame (empty: nothing to push)"""
+        if not self._pending:
+            return {}
+        pending, self._pending = self._pending, {}
+        tiles = {key: fit_tile(image, self.tile_size) for key, image in pending.items()}
+        self.composes += 1
+        self.blits += len(tiles)
+        self.unchanged += len(self.positions) - len(tiles)
+        self.pixels += len(tiles) * self.tile_size[0] * self.tile_size[1]
+        return tiles
+
+    def format_stats(self):
+        return (f"Composite: {self.composes} updates, {self.blits} tiles pushed, "
+                f"{self.unchanged} unchanged tiles skipped")
@@ -6,9 +6,13 @@ Unified Transform Pipeline - FIXED COLOR HANDLING
 """
 
 import cv2
+import numpy as np
 import json
 import os
 import logging
+import threading
+
+from shared.settings_cache import SettingsCache, file_signature
 
 # Default camera settings - FIXED FOR HIGH RESOLUTION STILLS
 # GUI expects brightness on scale -50 to +50 where 0 = neutral
@@ -32,6 +36,9 @@ DEFAULT_SETTINGS = {
     'rotation': 0
 }
 
+# Parsed settings per device - see shared/settings_cache.py
+_settings_cache = SettingsCache()
+
 def get_device_name_from_ip():
     """Get device name from IP address"""
     try:
@@ -62,10 +69,16 @@ def get_device_name_from_ip():
         return "rep8"
 
 def load_device_settings(device_name):
-    """Load settings from device-specific file with brightness migration"""
-    # Try production path first (/home/andrc1/), then development path
-    import os
+    """Load settings from device-specific file with brightness migration
     
+    Parsed settings are served from an in-memory cache and only re-read when the
+    file's inode/mtime/size changes, so per-frame callers never hit the SD card.
+    """
+    cached = _settings_cache.get(device_name)
+    if cached is not None:
+        return cached.copy()
+    
+    # Try production path first (/home/andrc1/), then development path
     production_settings_file = f"/home/andrc1/{device_name}_settings.json"
     project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     dev_settings_file = os.path.join(project_dir, f"{device_name}_settings.json")
@@ -81,13 +94,16 @@ def load_device_settings(device_name):
     
     try:
         if os.path.exists(settings_file):
+            # Take the signature BEFORE reading so a concurrent rewrite forces a reload
+            signature = file_signature(settings_file)
             with open(settings_file, 'r') as f:
                 settings = json.load(f)
             
             # FIXED: Removed bad migration logic that was corrupting brightness
             # The migration was running on EVERY load and forcing brightness to 0
             # Now we trust the saved values or use defaults
-                
+            
+            _settings_cache.put(device_name, settings_file, settings, signature)
             return settings
         else:
             # Create with defaults in appropriate directory
@@ -95,18 +111,26 @@ def load_device_settings(device_name):
             os.makedirs(base_dir, exist_ok=True)
             with open(settings_file, 'w') as f:
                 json.dump(DEFAULT_SETTINGS, f, indent=2)
+            _settings_cache.put(device_name, settings_file, DEFAULT_SETTINGS)
             return DEFAULT_SETTINGS.copy()
             
     except Exception as e:
         logging.error(f"[SETTINGS] Failed to load settings for {device_name}: {e}")
         return DEFAULT_SETTINGS.copy()
 
+def invalidate_device_settings(device_name=None):
+    """Drop cached settings so the next load re-reads the file (all devices if None)"""
+    _settings_cache.invalidate(device_name)
+    logging.info(f"[SETTINGS] Cache invalidated for {device_name or 'all devices'}")
+
+def get_settings_cache_stats():
+    """Return settings cache hit/miss counters"""
+    return _settings_cache.stats()
+
 def save_device_settings(device_name, settings):
     """Save settings to device-specific file with brightness validation"""
     try:
         # Try production path first (/home/andrc1/), then development path
-        import os
-        
         production_settings_file = f"/home/andrc1/{device_name}_settings.json"
         project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
         dev_settings_file = os.path.join(project_dir, f"{device_name}_settings.json")
@@ -135,6 +159,7 @@ def save_device_settings(device_name, settings):
             json.dump(settings, f, indent=2)
         
         os.rename(temp_file, settings_file)
+        _settings_cache.invalidate(device_name)
         logging.info(f"[SETTINGS] Saved for {device_name}: brightness={settings.get('brightness', 0)} (GUI scale)")
         return True
         
@@ -142,92 +167,236 @@ def save_device_settings(device_name, settings):
         logging.error(f"[SETTINGS] Failed to save for {device_name}: {e}")
         return False
 
-def apply_unified_transforms(image_array, device_name):
+# Settings that affect the per-frame pipeline; a plan is recompiled when any of them change
+PLAN_SETTING_KEYS = ('crop_enabled', 'crop_x', 'crop_y', 'crop_width', 'crop_height',
+                     'rotation', 'flip_horizontal', 'flip_vertical', 'grayscale')
+
+# rotation -> (transpose, flip_h, flip_v) applied to the ORIGINAL image
+# rotate(r) followed by flips is always equal to an optional transpose plus flips
+_ROTATION_ORIENTATION = {
+    0: (False, False, False),
+    90: (True, True, False),
+    180: (False, True, True),
+    270: (True, False, True),
+}
+
+def get_crop_bounds(shape, settings):
+    """Return clamped (x, y, w, h) for a crop, or None if the crop settings are unusable"""
+    try:
+        x = max(0, settings.get('crop_x', 0))
+        y = max(0, settings.get('crop_y', 0))
+        w = settings.get('crop_width', shape[1])
+        h = settings.get('crop_height', shape[0])
+
+        height, width = shape[:2]
+
+        # Validate and clamp values to image bounds
+        x = min(x, width - 10)  # Leave at least 10 pixels
+        y = min(y, height - 10)  # Leave at least 10 pixels
+
+        # Ensure crop dimensions are valid
+        w = max(10, min(w, width - x))  # Minimum 10 pixels, max to image edge
+        h = max(10, min(h, height - y))  # Minimum 10 pixels, max to image edge
+
+        for value in (x, y, w, h):
+            if not isinstance(value, (int, np.integer)):
+                raise TypeError(f"crop values must be integers, got {value!r}")
+        return int(x), int(y), int(w), int(h)
+    except Exception as e:
+        logging.error(f"[CROP] Error: {e}")
+        return None
+
+class TransformPlan:
+    """
+    Precompiled frame transforms for one settings/shape/format combination.
+    Crop is a view, rotation and both flips collapse into ONE transpose/flip op,
+    and outputs can be written into buffers owned by the plan.
+    """
+
+    def __init__(self, settings, shape, output_format='RGB'):
+        self.key = plan_key(settings, shape, output_format)
+        self.shape = tuple(shape)
+        self.output_format = output_format
+        channels = shape[2] if len(shape) == 3 else 1
+
+        # Step 1: Crop (numpy view, no copy)
+        self.crop = None
+        if settings.get('crop_enabled', False):
+            self.crop = get_crop_bounds(shape, settings)
+
+        # Steps 2+3: rotation followed by flips == transpose? + flipH? + flipV?
+        transpose, flip_h, flip_v = _ROTATION_ORIENTATION.get(settings.get('rotation', 0), (False, False, False))
+        if settings.get('flip_horizontal', False):
+            flip_h = not flip_h
+        if settings.get('flip_vertical', False):
+            flip_v = not flip_v
+        self.transpose, self.flip_h, self.flip_v = transpose, flip_h, flip_v
+
+        # Step 4: Grayscale (only meaningful for colour images)
+        self.grayscale = bool(settings.get('grayscale', False)) and len(shape) == 3
+
+        # Still captures are saved with cv2.imwrite and need BGR; gray output is identical either way
+        self.to_bgr = output_format == 'BGR' and channels == 3 and not self.grayscale
+        if output_format == 'BGR' and channels != 3:
+            self.gray_code = cv2.COLOR_BGR2GRAY
+        else:
+            self.gray_code = cv2.COLOR_RGB2GRAY
+        # Preview encoders take a single-channel frame and encode true grayscale JPEGs
+        self.single_channel_gray = output_format == 'RGB_OR_GRAY'
+
+        # Buffers are per thread so parallel encoder workers never share an output
+        self._local = threading.local()
+
+    @property
+    def is_identity(self):
+        """True if the plan leaves pixels untouched"""
+        return not (self.crop or self.transpose or self.flip_h or self.flip_v
+                    or self.grayscale or self.to_bgr)
+
+    def describe(self):
+        """Short list of the operations the plan performs (for logging)"""
+        ops = []
+        if self.crop:
+            ops.append('crop')
+        if self.transpose:
+            ops.append('transpose')
+        if self.flip_h:
+            ops.append('flipH')
+        if self.flip_v:
+            ops.append('flipV')
+        if self.grayscale:
+            ops.append('grayscale')
+        if self.to_bgr:
+            ops.append('RGB→BGR')
+        return ops or ['none']
+
+    def _buffer(self, name, shape, dtype, reuse):
+        """Return a reusable output buffer, or None to let OpenCV allocate a new one"""
+        if not reuse:
+            return None
+        buffers = getattr(self._local, 'buffers', None)
+        if buffers is None:
+            buffers = self._local.buffers = {}
+        buf = buffers.get(name)
+        if buf is None or buf.shape != shape or buf.dtype != dtype:
+            buf = np.empty(shape, dtype=dtype)
+            buffers[name] = buf
+        return buf
+
+    def apply(self, image, reuse_buffers=False):
+        """
+        Run the plan on one frame.
+        reuse_buffers=True writes into plan-owned arrays (and may return a view of the
+        input), so the result is only valid until the next apply() call on the same thread.
+        """
+        src = image
+        produced = False
+
+        if self.crop:
+            x, y, w, h = self.crop
+            src = src[y:y+h, x:x+w]
+
+        if self.transpose or self.flip_h or self.flip_v:
+            if self.transpose:
+                out_shape = (src.shape[1], src.shape[0]) + src.shape[2:]
+            else:
+                out_shape = src.shape
+            dst = self._buffer('orient', out_shape, src.dtype, reuse_buffers)
+
+            if not self.transpose:
+                code = -1 if (self.flip_h and self.flip_v) else (1 if self.flip_h else 0)
+                src = cv2.flip(src, code, dst)
+            elif self.flip_h and not self.flip_v:
+                src = cv2.rotate(src, cv2.ROTATE_90_CLOCKWISE, dst)
+            elif self.flip_v and not self.flip_h:
+                src = cv2.rotate(src, cv2.ROTATE_90_COUNTERCLOCKWISE, dst)
+            else:
+                src = cv2.transpose(src, dst)
+                if self.flip_h:
+                    cv2.flip(src, -1, src)
+            produced = True
+
+        if self.grayscale:
+            gray = self._buffer('gray', src.shape[:2], src.dtype, reuse_buffers)
+            gray = cv2.cvtColor(src, self.gray_code, gray)
+            if self.single_channel_gray:
+                src = gray
+            else:
+                out = self._buffer('out', src.shape[:2] + (3,), src.dtype, reuse_buffers)
+                src = cv2.cvtColor(gray, cv2.COLOR_GRAY2RGB, out)
+            produced = True
+        elif self.to_bgr:
+            out = self._buffer('out', src.shape, src.dtype, reuse_buffers)
+            src = cv2.cvtColor(src, cv2.COLOR_RGB2BGR, out)
+            produced = True
+
+        if not produced and not reuse_buffers:
+            # Callers that did not opt in always get an array they own
+            src = src.copy()
+        return src
+
+def plan_key(settings, shape, output_format):
+    """Everything a compiled plan depends on"""
+    return (tuple(settings.get(k) for k in PLAN_SETTING_KEYS), tuple(shape), output_format)
+
+# Compiled plans per (device, output format); rebuilt when settings or frame shape change
+_transform_plans = {}
+
+def get_transform_plan(device_name, settings, shape, output_format='RGB'):
+    """Return the cached TransformPlan for a device, compiling a new one if needed"""
+    cache_key = (device_name, output_format)
+    key = plan_key(settings, shape, output_format)
+    plan = _transform_plans.get(cache_key)
+    if plan is None or plan.key != key:
+        plan = TransformPlan(settings, shape, output_format)
+        _transform_plans[cache_key] = plan
+        logging.info(f"[TRANSFORM] {device_name}: compiled plan {plan.describe()} "
+                     f"for {shape[1]}x{shape[0]} ({output_format})")
+    return plan
+
+def invalidate_transform_plans(device_name=None):
+    """Drop compiled plans for one device (or all devices)"""
+    for cache_key in list(_transform_plans):
+        if device_name is None or cache_key[0] == device_name:
+            _transform_plans.pop(cache_key, None)
+
+def apply_unified_transforms(image_array, device_name, reuse_buffers=False, output_format='RGB'):
     """
     FIXED: Apply transforms with correct color handling
     - NO RGB→BGR conversion (GUI expects RGB)
     - Pure frame transforms (no camera control changes)
+    - Streaming loops pass reuse_buffers=True to avoid per-frame allocations
+    - Preview encoders pass output_format='RGB_OR_GRAY' to get grayscale as one channel
     """
     try:
         settings = load_device_settings(device_name)
-        
-        # Start with the original image (keep RGB format for GUI)
-        image = image_array.copy()
-        
+        plan = get_transform_plan(device_name, settings, image_array.shape, output_format)
+
         # Log active transforms occasionally
         if not hasattr(apply_unified_transforms, 'call_count'):
             apply_unified_transforms.call_count = 0
         apply_unified_transforms.call_count += 1
-        
+
         if apply_unified_transforms.call_count % 100 == 0:
-            active_transforms = []
-            if settings.get('crop_enabled', False): 
-                active_transforms.append('crop')
-            if settings.get('rotation', 0) != 0: 
-                active_transforms.append(f'rotate{settings["rotation"]}°')
-            if settings.get('flip_horizontal', False): 
-                active_transforms.append('flipH')
-            if settings.get('flip_vertical', False): 
-                active_transforms.append('flipV') 
-            if settings.get('grayscale', False): 
-                active_transforms.append('grayscale')
-            
-            logging.info(f"[TRANSFORM] {device_name}: {active_transforms or ['none']} (RGB format preserved)")
-        
-        # CRITICAL: Work in RGB format throughout (no BGR conversion)
+            logging.info(f"[TRANSFORM] {device_name}: {plan.describe()} (RGB format preserved)")
+
+        # CRITICAL: Output stays in RGB format (no BGR conversion)
         # This ensures red objects appear red in the GUI
-        
-        # Step 1: Crop
-        if settings.get('crop_enabled', False):
-            image = apply_crop_rgb(image, settings)
-        
-        # Step 2: Rotation  
-        rotation = settings.get('rotation', 0)
-        if rotation != 0:
-            image = apply_rotation_rgb(image, rotation)
-        
-        # Step 3: Flips (PURE FRAME TRANSFORMS - NO BRIGHTNESS EFFECT)
-        if settings.get('flip_horizontal', False):
-            image = cv2.flip(image, 1)  # Horizontal flip
-        if settings.get('flip_vertical', False):
-            image = cv2.flip(image, 0)   # Vertical flip
-        
-        # Step 4: Grayscale
-        if settings.get('grayscale', False):
-            if len(image.shape) == 3:
-                # Convert to grayscale then back to RGB (not BGR)
-                gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
-                image = cv2.cvtColor(gray, cv2.COLOR_GRAY2RGB)
-        
-        return image
-        
+        return plan.apply(image_array, reuse_buffers=reuse_buffers)
+
     except Exception as e:
         logging.error(f"[TRANSFORM] Error for {device_name}: {e}")
         return image_array  # Return original on error
 
 def apply_crop_rgb(image, settings):
     """Apply crop while maintaining RGB format"""
-    try:
-        x = max(0, settings.get('crop_x', 0))
-        y = max(0, settings.get('crop_y', 0))
-        w = settings.get('crop_width', image.shape[1])
-        h = settings.get('crop_height', image.shape[0])
-        
-        height, width = image.shape[:2]
-        
-        # Validate and clamp values to image bounds
-        x = min(x, width - 10)  # Leave at least 10 pixels
-        y = min(y, height - 10)  # Leave at least 10 pixels
-        
-        # Ensure crop dimensions are valid
-        w = max(10, min(w, width - x))  # Minimum 10 pixels, max to image edge
-        h = max(10, min(h, height - y))  # Minimum 10 pixels, max to image edge
-        
-        logging.info(f"[CROP] Applying crop: x={x}, y={y}, w={w}, h={h} from image {width}x{height}")
-        return image[y:y+h, x:x+w]
-    except Exception as e:
-        logging.error(f"[CROP] Error: {e}")
+    bounds = get_crop_bounds(image.shape, settings)
+    if bounds is None:
         return image
+    x, y, w, h = bounds
+    height, width = image.shape[:2]
+    logging.info(f"[CROP] Applying crop: x={x}, y={y}, w={w}, h={h} from image {width}x{height}")
+    return image[y:y+h, x:x+w]
 
 def apply_rotation_rgb(image, degrees):
     """Apply rotation while maintaining RGB format"""
@@ -251,58 +420,17 @@ def apply_unified_transforms_for_still(image_array, device_name):
     """
     try:
         settings = load_device_settings(device_name)
-        
-        # For still captures, we need BGR format for cv2.imwrite
-        # But we still want pure frame transforms (no camera control changes)
-        if len(image_array.shape) == 3 and image_array.shape[2] == 3:
-            # Convert RGB to BGR for proper file saving
-            image = cv2.cvtColor(image_array, cv2.COLOR_RGB2BGR)
-            logging.info(f"[STILL_TRANSFORM] {device_name}: RGB→BGR conversion applied (colors fixed)")
-        else:
-            image = image_array
-            logging.info(f"[STILL_TRANSFORM] {device_name}: Grayscale image, no color conversion needed")
-        
-        # Log active transforms for still capture
-        active_transforms = []
-        if settings.get('crop_enabled', False): 
-            active_transforms.append('crop')
-        if settings.get('rotation', 0) != 0: 
-            active_transforms.append(f'rotate{settings["rotation"]}°')
-        if settings.get('flip_horizontal', False): 
-            active_transforms.append('flipH')
-        if settings.get('flip_vertical', False): 
-            active_transforms.append('flipV') 
-        if settings.get('grayscale', False): 
-            active_transforms.append('grayscale')
-        
-        logging.info(f"[STILL_TRANSFORM] {device_name}: Applying {active_transforms or ['none']} (BGR format)")
-        
-        # Apply identical transforms as video (but in BGR format)
-        
-        # Step 1: Crop
-        if settings.get('crop_enabled', False):
-            image = apply_crop_rgb(image, settings)  # Works same for BGR
-        
-        # Step 2: Rotation
-        rotation = settings.get('rotation', 0)
-        if rotation != 0:
-            image = apply_rotation_rgb(image, rotation)  # Works same for BGR
-        
-        # Step 3: Flips (CRITICAL: These are PURE frame operations)
-        if settings.get('flip_horizontal', False):
-            image = cv2.flip(image, 1)
-        if settings.get('flip_vertical', False):
-            image = cv2.flip(image, 0)
-        
-        # Step 4: Grayscale
-        if settings.get('grayscale', False):
-            if len(image.shape) == 3:
-                gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-                image = cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR)
-        
+
+        # Same compiled plan as video, but emitting BGR for cv2.imwrite
+        # (pure frame transforms - no camera control changes)
+        plan = get_transform_plan(device_name, settings, image_array.shape, 'BGR')
+        logging.info(f"[STILL_TRANSFORM] {device_name}: Applying {plan.describe()} (BGR format)")
+
+        image = plan.apply(image_array)
+
         logging.info(f"[STILL_TRANSFORM] ✅ {device_name}: Transform pipeline complete (BGR format for cv2.imwrite)")
         return image
-        
+
     except Exception as e:
         logging.error(f"[STILL_TRANSFORM] Error for {device_name}: {e}")
         # Fallback: convert RGB to BGR at minimum
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Upload Queue - background still uploads on the slaves
+Capture hands the finished still (a file, or encode buffers on rep8) to one
+upload thread and returns, so the camera can expose the next set while this
+one is still on the wire. Uploads go out in capture order; when max_pending
+stills are waiting, submit() blocks and capture slows to what the network
+can carry instead of piling up images in memory.
+"""
+
+import time
+import queue
+import logging
+import threading
+
+DEFAULT_MAX_PENDING = 4
+
+
+class UploadQueue:
+    """One worker thread running send(item) -> bool for each submitted still, in order"""
+
+    def __init__(self, send, max_pending=DEFAULT_MAX_PENDING, name="still-upload"):
+        self.send = send
+        self.name = name
+        self._queue = queue.Queue(max_pending)
+        self._thread = None
+        self._lock = threading.Lock()
+
+        # Metrics
+        self.uploaded = 0
+        self.failed = 0
+        self.last_seconds = 0.0
+        self.max_depth = 0
+
+    def submit(self, item, label=""):
+        """Queue a still for upload (blocks while max_pending are waiting); returns the queue depth"""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+        self._queue.put((item, label))
+        depth = self.depth()
+        self.max_depth = max(self.max_depth, depth)
+        return depth
+
+    def depth(self):
+        """Stills captured but not yet uploaded (including the one on the wire)"""
+        return self._queue.unfinished_tasks
+
+    def join(self, timeout=None):
+        """Wait until every submitted still has been sent (or failed); True if idle"""
+        deadline = None if timeout is None else time.time() + timeout
+        while self.depth():
+            if deadline is not None and time.time() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def _run(self):
+        while True:
+            item, label = self._queue.get()
+            start = time.time()
+            try:
+                ok = self.send(item)
+            except Exception as e:
+                logging.error(f"[UPLOAD] {label or 'still'}: {e}")
+                ok = False
+            self.last_seconds = time.time() - start
+            if ok:
+                self.uploaded += 1
+            else:
+                self.failed += 1
+            self._queue.task_done()
+
+    def format_stats(self):
+        return (f"Uploads: {self.uploaded} ok, {self.failed} failed, depth {self.depth()} "
+                f"(max {self.max_depth}), last {self.last_seconds * 1000:.0f}ms")
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Video Framing - fragmented, sequenced UDP preview frames
+Slaves split each JPEG into datagrams that carry a small binary header;
+the master reassembles them and keeps per-camera loss statistics.
+
+Datagram = header (24 bytes, network byte order) + payload slice
+    magic        2s   b'GV'
+    version      B
+    camera_id    B    1-8 for rep1-rep8 (0 = unknown)
+    sequence     I    frame counter per stream, starts at 1
+    frag_index   H    0 .. frag_count-1
+    frag_count   H
+    capture_time d    time.time() when the frame was captured
+    stream_id    I    random per FrameSender, so the master sees a restarted
+                      stream (sequence back at 1) as new rather than late
+
+Datagrams that do not start with the magic are treated as legacy
+single-datagram JPEG frames, so old and new slaves can be mixed.
+"""
+
+import re
+import time
+import random
+import struct
+from collections import deque
+
+MAGIC = b'GV'
+VERSION = 2
+HEADER = struct.Struct('!2sBBIHHdI')
+HEADER_SIZE = HEADER.size
+
+# Payload per datagram: header + payload stays under a 1500-byte Ethernet MTU,
+# so a lost IP fragment never takes a whole frame with it
+DEFAULT_PAYLOAD_SIZE = 1400
+
+# Incomplete frames older than this are discarded
+DEFAULT_REASSEMBLY_TIMEOUT = 0.5
+
+# A sequence number this far below the last completed one means the stream restarted
+# (for senders without a stream_id)
+SEQUENCE_RESET_WINDOW = 64
+
+# Stream ids of restarted streams remembered per source, so their stragglers are dropped as late
+RETIRED_STREAMS = 4
+
+
+def camera_id_from_name(device_name):
+    """rep1..rep8 -> 1..8 (0 if the name carries no number)"""
+    match = re.search(r'(\d+)$', device_name or "")
+    return int(match.group(1)) & 0xFF if match else 0
+
+
+def fragment_frame(data, camera_id, sequence, capture_time, payload_size=DEFAULT_PAYLOAD_SIZE, stream_id=0):
+    """Split one encoded frame into header-prefixed datagrams"""
+    frag_count = max(1, (len(data) + payload_size - 1) // payload_size)
+    if frag_count > 0xFFFF:
+        raise ValueError(f"Frame of {len(data)} bytes needs too many fragments")
+    view = memoryview(data)
+    datagrams = []
+    for index in range(frag_count):
+        header = HEADER.pack(MAGIC, VERSION, camera_id, sequence, index, frag_count, capture_time, stream_id)
+        datagrams.append(header + view[index * payload_size:(index + 1) * payload_size])
+    return datagrams
+
+
+class FrameSender:
+    """Slave side: numbers frames and sends them as fragments"""
+
+    def __init__(self, sock, address, camera_id, payload_size=DEFAULT_PAYLOAD_SIZE):
+        self.sock = sock
+        self.address = address
+        self.camera_id = camera_id
+        self.payload_size = payload_size
+        self.sequence = 0
+        self.stream_id = random.getrandbits(32) or 1  # New on every (re)start of the stream
+        self.datagrams_sent = 0
+
+    def send(self, data, capture_time=None):
+        """Send one frame; returns the number of datagrams written"""
+        self.sequence = (self.sequence + 1) & 0xFFFFFFFF
+        if capture_time is None:
+            capture_time = time.time()
+        datagrams = fragment_frame(data, self.camera_id, self.sequence, capture_time, self.payload_size,
+                                   self.stream_id)
+        for datagram in datagrams:
+            self.sock.sendto(datagram, self.address)
+        self.datagrams_sent += len(datagrams)
+        return len(datagrams)
+
+
+class FrameReassembler:
+    """
+    Master side: collects fragments per source and returns complete frames.
+    Only frames newer than the last completed one are returned; incomplete
+    frames are evicted on timeout or as soon as a newer frame completes.
+    """
+
+    def __init__(self, timeout=DEFAULT_REASSEMBLY_TIMEOUT, max_pending=8, clock_offset=None):
+        self.timeout = timeout
+        self.max_pending = max_pending
+        self.clock_offset = clock_offset  # clock_offset(source) -> seconds the sender's clock is ahead
+        self._sources = {}
+
+    def _source(self, source):
+        state = self._sources.get(source)
+        if state is None:
+            state = {
+                'pending': {},          # sequence -> {'parts', 'received', 'first_seen'}
+                'last_complete': 0,
+                'stream_id': None,
+                'retired': deque(maxlen=RETIRED_STREAMS),
+                'last_evict_check': 0.0,
+                'stats': {
+                    'frames': 0, 'fragments': 0, 'lost': 0, 'late': 0,
+                    'duplicates': 0, 'expired': 0, 'malformed': 0,
+                    'legacy': 0, 'restarts': 0, 'latency_ms': 0.0,
+                },
+            }
+            self._sources[source] = state
+        return state
+
+    def add(self, source, datagram, now=None):
+        """
+        Feed one datagram. Returns (header, frame_bytes) when a frame completes,
+        otherwise None. header is None for legacy raw-JPEG datagrams.
+        """
+        state = self._source(source)
+        stats = state['stats']
+
+        if datagram[:2] != MAGIC:
+            stats['legacy'] += 1
+            stats['frames'] += 1
+            return None, datagram
+
+        if len(datagram) < HEADER_SIZE:
+            stats['malformed'] += 1
+            return None
+        magic, version, camera_id, sequence, index, count, capture_time, stream_id = HEADER.unpack_from(datagram)
+        if version != VERSION or count == 0 or index >= count:
+            stats['malformed'] += 1
+            return None
+
+        stats['fragments'] += 1
+        now = time.time() if now is None else now
+        self._evict_expired(state, now)
+
+        if stream_id != state['stream_id']:
+            if stream_id in state['retired']:
+                stats['late'] += 1  # Straggler from before the restart
+                return None
+            if state['stream_id'] is not None:
+                # Slave restarted its stream - start counting again
+                state['retired'].append(state['stream_id'])
+                state['pending'].clear()
+                state['last_complete'] = 0
+                stats['restarts'] += 1
+            state['stream_id'] = stream_id
+
+        last = state['last_complete']
+        if sequence <= last:
+            if last - sequence > SEQUENCE_RESET_WINDOW:
+                # Slave restarted its stream - start counting again
+                state['pending'].clear()
+                state['last_complete'] = last = 0
+                stats['restarts'] += 1
+            else:
+                stats['late'] += 1
+                return None
+
+        header = {'camera_id': camera_id, 'sequence': sequence,
+                  'frag_count': count, 'capture_time': capture_time}
+        payload = datagram[HEADER_SIZE:]
+
+        if count == 1:
+            return self._complete(state, header, payload, now, source)
+
+        pending = state['pending'].get(sequence)
+        if pending is None:
+            if len(state['pending']) >= self.max_pending:
+                oldest = min(state['pending'])
+                del state['pending'][oldest]
+                stats['expired'] += 1
+            pending = {'parts': [None] * count, 'received': 0, 'first_seen': now}
+            state['pending'][sequence] = pending
+        elif len(pending['parts']) != count:
+            stats['malformed'] += 1
+            return None
+
+        if pending['parts'][index] is not None:
+            stats['duplicates'] += 1
+            return None
+        pending['parts'][index] = payload
+        pending['received'] += 1
+
+        if pending['received'] < count:
+            return None
+
+        del state['pending'][sequence]
+        return self._complete(state, header, b''.join(pending['parts']), now, source)
+
+    def _complete(self, state, header, frame, now, source=None):
+        stats = state['stats']
+        sequence = header['sequence']
+        last = state['last_complete']
+        if last and sequence > last + 1:
+            stats['lost'] += sequence - last - 1
+        state['last_complete'] = sequence
+        stats['frames'] += 1
+        capture_time = header['capture_time']
+        if self.clock_offset is not None:
+            capture_time -= self.clock_offset(source)  # Sender's clock -> ours
+        stats['latency_ms'] = max(0.0, (now - capture_time) * 1000)
+
+        # Anything older than this frame can never be shown any more
+        for pending_sequence in [s for s in state['pending'] if s < sequence]:
+            del state['pending'][pending_sequence]
+        return header, frame
+
+    def _evict_expired(self, state, now):
+        if now - state['last_evict_check'] < self.timeout / 2:
+            return
+        state['last_evict_check'] = now
+        expired = [s for s, p in state['pending'].items() if now - p['first_seen'] > self.timeout]
+        for sequence in expired:
+            del state['pending'][sequence]
+        state['stats']['expired'] += len(expired)
+
+    def stats(self, source=None):
+        """Per-source counters (dict of dicts, or one dict for a given source)"""
+        if source is not None:
+            return self._summary(self._source(source)['stats'])
+        return {src: self._summary(state['stats']) for src, state in self._sources.items()}
+
+    def _summary(self, stats):
+        summary = dict(stats)
+        expected = stats['frames'] + stats['lost']
+        summary['loss_rate'] = (stats['lost'] / expected * 100) if expected else 0.0
+        return summary
+
+    def reset(self, source=None):
+        if source is None:
+            self._sources.clear()
+        else:
+            self._sources.pop(source, None)
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Staged Video Pipeline
+Runs the slave preview loop as threads joined by latest-wins slots:
+
+    capture ──[slot]──> transform+encode (x N workers) ──[slot]──> send
+
+The camera keeps capturing while the previous frame is being encoded, and
+cv2 / socket calls release the GIL so the stages genuinely overlap. A slot
+holds ONE item: if a downstream stage falls behind, the older item is
+dropped instead of queueing latency.
+
+With several encoder workers, frames can finish out of order. They are
+still sent in capture order: a frame that finishes after a newer one has
+been published (or is older than max_frame_age) is dropped, never sent late.
+"""
+
+import time
+import threading
+import logging
+
+
+class LatestSlot:
+    """Single-item handoff between two threads; put() replaces any unread item"""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._item = None
+        self._has_item = False
+        self._closed = False
+        self.puts = 0
+        self.dropped = 0
+
+    def put(self, item):
+        with self._cond:
+            if self._has_item:
+                self.dropped += 1
+            self._item = item
+            self._has_item = True
+            self.puts += 1
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        """Return the newest item, or None on timeout / after close()"""
+        with self._cond:
+            if not self._has_item and not self._closed:
+                self._cond.wait(timeout)
+            if not self._has_item:
+                return None
+            item = self._item
+            self._item = None
+            self._has_item = False
+            return item
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+class StageTimer:
+    """Per-stage timing counters (count, average, max, last in ms)"""
+
+    def __init__(self, name):
+        self.name = name
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last = 0.0
+        self._lock = threading.Lock()  # Shared by all encoder workers
+
+    def record(self, seconds):
+        with self._lock:
+            self.count += 1
+            self.total += seconds
+            self.last = seconds
+            if seconds > self.max:
+                self.max = seconds
+
+    def stats(self):
+        avg = self.total / self.count if self.count else 0.0
+        return {
+            'count': self.count,
+            'avg_ms': avg * 1000,
+            'max_ms': self.max * 1000,
+            'last_ms': self.last * 1000,
+        }
+
+
+class VideoPipeline:
+    """
+    capture_fn()        -> frame (or None to skip)
+    process_fn(frame)   -> bytes to send (or None to skip)
+    send_fn(data, capture_time)   capture_time is time.time() when the frame was captured
+    threaded=False runs the same stages serially in one thread (old behaviour).
+    encoder_workers runs process_fn on N threads; process_fn must be thread-safe.
+    max_frame_age (seconds) drops encoded frames that are too old to be worth sending.
+    """
+
+    def __init__(self, capture_fn, process_fn, send_fn, name="video", threaded=True,
+                 encoder_workers=1, max_frame_age=None):
+        self.capture_fn = capture_fn
+        self.process_fn = process_fn
+        self.send_fn = send_fn
+        self.name = name
+        self.threaded = threaded
+        self.encoder_workers = max(1, int(encoder_workers)) if threaded else 1
+        self.max_frame_age = max_frame_age
+
+        self.capture_slot = LatestSlot()
+        self.send_slot = LatestSlot()
+        self.timers = {
+            'capture': StageTimer('capture'),
+            'process': StageTimer('process'),
+            'send': StageTimer('send'),
+        }
+        self.latency = StageTimer('latency')  # frame captured -> send complete
+
+        # Capture-order bookkeeping for the encoder pool
+        self._sequence = 0
+        self._last_published = 0
+        self._order_lock = threading.Lock()
+        self.stale = 0
+        self.worker_frames = [0] * self.encoder_workers
+
+        self._stop = threading.Event()
+        self._threads = []
+        self.error = None
+        self.started_at = None
+
+    # --- Control ---
+
+    def start(self):
+        self.started_at = time.perf_counter()
+        if self.threaded:
+            stages = [('capture', self._capture_loop, ())]
+            for worker in range(self.encoder_workers):
+                stages.append((f'encode{worker}', self._process_loop, (worker,)))
+            stages.append(('send', self._send_loop, ()))
+        else:
+            stages = [('serial', self._serial_loop, ())]
+        for stage, target, args in stages:
+            thread = threading.Thread(target=self._run_stage, args=(stage, target) + args,
+                                      name=f"{self.name}-{stage}", daemon=True)
+            self._threads.append(thread)
+            thread.start()
+        mode = f"threaded, {self.encoder_workers} encoder(s)" if self.threaded else "serial"
+        logging.info(f"[PIPELINE] {self.name}: started ({mode})")
+
+    def stop(self, timeout=5.0):
+        self._stop.set()
+        self.capture_slot.close()
+        self.send_slot.close()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def is_running(self):
+        return not self._stop.is_set()
+
+    # --- Stages ---
+
+    def _run_stage(self, stage, target, *args):
+        try:
+            target(*args)
+        except Exception as e:
+            # Any stage failure ends the stream, like the serial loop's break
+            self.error = e
+            logging.error(f"[PIPELINE] {self.name}: {stage} stage failed: {e}")
+            self._stop.set()
+            self.capture_slot.close()
+            self.send_slot.close()
+
+    def _capture(self):
+        # captured_at = (perf_counter for latency/age, time.time() for the wire header)
+        t0 = time.perf_counter()
+        frame = self.capture_fn()
+        t1 = time.perf_counter()
+        self.timers['capture'].record(t1 - t0)
+        return (t1, time.time()), frame
+
+    def _process(self, frame):
+        t0 = time.perf_counter()
+        data = self.process_fn(frame)
+        self.timers['process'].record(time.perf_counter() - t0)
+        return data
+
+    def _send(self, captured_at, data):
+        perf_time, capture_time = captured_at
+        t0 = time.perf_counter()
+        self.send_fn(data, capture_time)
+        t1 = time.perf_counter()
+        self.timers['send'].record(t1 - t0)
+        self.latency.record(t1 - perf_time)
+
+    def _publish(self, sequence, captured_at, data):
+        """Hand an encoded frame to the sender unless a newer one already went out"""
+        with self._order_lock:
+            too_old = (self.max_frame_age is not None
+                       and time.perf_counter() - captured_at[0] > self.max_frame_age)
+            if sequence <= self._last_published or too_old:
+                self.stale += 1
+                return
+            self._last_published = sequence
+            self.send_slot.put((captured_at, data))
+
+    def _capture_loop(self):
+        while not self._stop.is_set():
+            captured_at, frame = self._capture()
+            if frame is not None:
+                self._sequence += 1
+                self.capture_slot.put((self._sequence, captured_at, frame))
+
+    def _process_loop(self, worker=0):
+        while not self._stop.is_set():
+            item = self.capture_slot.get(timeout=0.5)
+            if item is None:
+                continue
+            sequence, captured_at, frame = item
+            data = self._process(frame)
+            self.worker_frames[worker] += 1
+            if data is not None:
+                self._publish(sequence, captured_at, data)
+
+    def _send_loop(self):
+        while not self._stop.is_set():
+            item = self.send_slot.get(timeout=0.5)
+            if item is None:
+                continue
+            self._send(*item)
+
+    def _serial_loop(self):
+        while not self._stop.is_set():
+            captured_at, frame = self._capture()
+            if frame is None:
+                continue
+            data = self._process(frame)
+            if data is not None:
+                self._send(captured_at, data)
+
+    # --- Instrumentation ---
+
+    def stats(self):
+        elapsed = time.perf_counter() - self.started_at if self.started_at else 0.0
+        sent = self.timers['send'].count
+        stats = {name: timer.stats() for name, timer in self.timers.items()}
+        stats['latency'] = self.latency.stats()
+        stats['fps'] = sent / elapsed if elapsed > 0 else 0.0
+        stats['dropped'] = self.capture_slot.dropped + self.send_slot.dropped
+        stats['stale'] = self.stale
+        stats['encoder_workers'] = self.encoder_workers
+        stats['worker_frames'] = list(self.worker_frames)
+        return stats
+
+    def format_stats(self):
+        """One-line summary for [PERF] logging"""
+        stats = self.stats()
+        stages = " ".join(f"{name}={stats[name]['avg_ms']:.1f}ms"
+                          for name in ('capture', 'process', 'send', 'latency'))
+        return (f"{stats['fps']:.1f} fps, {stages}, dropped={stats['dropped']}, "
+                f"stale={stats['stale']}, encoders={stats['worker_frames']}")
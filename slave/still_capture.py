@@ -15,7 +15,6 @@ import logging
 import datetime
 import subprocess
 import cv2
-from picamera2 import Picamera2
 # Import from config with robust fallback
 try:
     import sys
@@ -23,7 +22,10 @@ try:
     # Add parent directory to path for shared module
     sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
     
-    from shared.config import MASTER_IP, CONTROL_PORT, STILL_PORT, HEARTBEAT_PORT, get_slave_ports
+    from shared.config import (MASTER_IP, CONTROL_PORT, STILL_PORT, HEARTBEAT_PORT, get_slave_ports,
+                               CAMERA_OWNER_SOCKET, STILL_UPLOAD_QUEUE, CAPTURE_QUEUE_SIZE,
+                               CAPTURE_COALESCE_WINDOW, CONTROL_GROUP_ENABLED, CONTROL_GROUP_ADDRESS,
+                               CONTROL_GROUP_PORT)
     logging.info("✅ Successfully imported from shared.config")
 except ImportError as e:
     logging.warning(f"❌ Failed to import shared.config: {e}")
@@ -32,6 +34,13 @@ except ImportError as e:
     CONTROL_PORT = 5001
     STILL_PORT = 6000
     HEARTBEAT_PORT = 5003
+    CAMERA_OWNER_SOCKET = "/tmp/gertie_camera_owner.sock"
+    STILL_UPLOAD_QUEUE = 4
+    CAPTURE_QUEUE_SIZE = 4
+    CAPTURE_COALESCE_WINDOW = 1.0
+    CONTROL_GROUP_ENABLED = True
+    CONTROL_GROUP_ADDRESS = "239.255.42.1"
+    CONTROL_GROUP_PORT = 5006
     
     # Fallback get_slave_ports function
     def get_slave_ports(ip: str):
@@ -42,6 +51,16 @@ except ImportError as e:
             return {"control": 5001, "video": 5002, "video_control": 5004, "still": 6000, "heartbeat": 5003}
     
     logging.info("Using fallback configuration")
+
+# Camera access (Picamera2 on the Pi; synthetic/replay sources for off-Pi profiling)
+from shared.camera_backend import create_camera_backend
+from shared.camera_owner import request_still
+from shared.capture_sync import COMMAND_PREFIX as CAPTURE_AT_PREFIX, parse_capture_at_command
+from shared.still_protocol import send_still_file
+from shared.upload_queue import UploadQueue
+from shared.capture_queue import CaptureQueue, format_status_message
+from shared.control_group import ControlGroupReceiver
+
 # Import from config
 try:
     from shared.config import MASTER_IP, CONTROL_PORT, STILL_PORT, HEARTBEAT_PORT, get_slave_ports
@@ -218,14 +237,16 @@ def apply_rotation(image, degrees):
         logging.error(f"Error applying rotation: {e}")
         return image
 
+def still_filename():
+    """Device-specific, timestamped path for a new still"""
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    os.makedirs(SAVE_DIR, exist_ok=True)
+    return os.path.join(SAVE_DIR, f"{get_device_name()}_{timestamp}.jpg")
+
 def capture_image():
     """Universal enhanced capture with all transforms - SIMPLIFIED PROCESSING PATH"""
-    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-    
-    # Generate device-specific filename
     device_name = get_device_name()
-    filename = os.path.join(SAVE_DIR, f"{device_name}_{timestamp}.jpg")
-    os.makedirs(SAVE_DIR, exist_ok=True)
+    filename = still_filename()
 
     try:
         # FIXED: Always use SIMPLIFIED processing path for guaranteed high resolution
@@ -242,7 +263,7 @@ def capture_image():
 def capture_with_processing(filename):
     """Capture image with full processing pipeline - SIMPLIFIED WORKING VERSION"""
     try:
-        picam2 = Picamera2()
+        picam2 = create_camera_backend()
         
         # Configure for maximum resolution still - SIMPLE like working slave201
         still_config = picam2.create_still_configuration(
@@ -252,7 +273,7 @@ def capture_with_processing(filename):
         picam2.start()
         
         # Let camera settle - SIMPLE timing like working slave201
-        time.sleep(1)
+        picam2.settle(1.0)
         
         # Capture full resolution image
         image_array = picam2.capture_array()
@@ -398,8 +419,28 @@ def get_device_name():
         # Fallback for local/unknown devices
         return "rep8"
 
-def capture_still():
-    """Capture and send still image to master - ENHANCED VIDEO STREAM ISOLATION"""
+def capture_still(capture_id=None, fire_time=None):
+    """Capture and send still image to master (at fire_time for a synchronized CAPTURE_AT)"""
+    # Preferred: the video service owns the camera and captures without stopping the preview
+    try:
+        saved = request_still(still_filename(), CAMERA_OWNER_SOCKET,
+                              capture_id=capture_id, fire_time=fire_time)
+    except (RuntimeError, OSError) as e:
+        # The owner holds the camera, so the legacy path could not open it either
+        logging.error(f"[SLAVE] Camera owner still capture failed: {e}")
+        return False
+    if saved:
+        # Upload in the background: the camera is free for the next exposure straight away
+        depth = uploader.submit(saved, saved[0])
+        logging.info(f"[SLAVE] Still captured via camera owner, queued for upload (depth {depth})")
+        return True
+    
+    if fire_time is not None:
+        logging.warning(f"[SYNC] No camera owner - capture {capture_id} taken unsynchronized")
+    return capture_still_isolated()
+
+def capture_still_isolated():
+    """Legacy path (no camera owner running) - ENHANCED VIDEO STREAM ISOLATION"""
     logging.info("[SLAVE] Starting still capture with COMPLETE video isolation...")
     
     try:
@@ -454,24 +495,36 @@ def capture_still():
         except Exception as e:
             logging.warning(f"[SLAVE] Unable to send START_STREAM after capture: {e}")
 
-def send_image(filename):
-    """Send captured image to master via TCP"""
+def send_image(filename, crc32=None):
+    """Send captured image to master via TCP (crc32 from the camera owner saves re-reading the file)"""
     try:
         with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
             sock.settimeout(30.0)
             sock.connect((MASTER_IP, STILL_PORT))
             
-            with open(filename, "rb") as f:
-                data = f.read()
-            
-            sock.sendall(data)
-            logging.info(f"[SLAVE] Image sent: {filename} ({len(data)} bytes)")
+            # Framed upload straight from the page cache (sendfile); the master checks
+            # size/CRC and files it by device and sensor time
+            start = time.time()
+            size = send_still_file(sock, filename, get_device_name(), camera_settings, crc32)
+            logging.info(f"[SLAVE] Image sent: {filename} ({size} bytes in {(time.time() - start) * 1000:.0f}ms)")
             return True
             
     except Exception as e:
         logging.error(f"[SLAVE] Error sending image: {e}")
         return False
 
+# Stills from the camera owner upload on this thread, in capture order
+uploader = UploadQueue(lambda saved: send_image(*saved), STILL_UPLOAD_QUEUE)
+
+def report_capture_status(request_id, status, depth):
+    """Tell the master what happened to a capture request (heartbeat port)"""
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.sendto(format_status_message(request_id, status, depth).encode(), (MASTER_IP, HEARTBEAT_PORT))
+
+# Capture requests run one at a time on a single worker (duplicates coalesced)
+capture_queue = CaptureQueue(capture_still, CAPTURE_QUEUE_SIZE, CAPTURE_COALESCE_WINDOW,
+                             report=report_capture_status)
+
 def handle_control_commands():
     """Enhanced command handler with universal transform support"""
     global camera_settings
@@ -490,15 +543,25 @@ def handle_control_commands():
         logging.error(f"Failed to bind to port: {e}")
         return
 
+    # Capture-all and start/stop-all arrive as one multicast datagram for every camera
+    group = ControlGroupReceiver(get_device_name(), CONTROL_GROUP_ADDRESS, CONTROL_GROUP_PORT)
+    if CONTROL_GROUP_ENABLED:
+        group.open()
+
     while True:
         try:
-            data, addr = sock.recvfrom(1024)
-            command = data.decode().strip()
+            command, addr = group.receive(sock)
             logging.info(f"Received command from {addr}: {command}")
 
             # EXISTING COMMANDS (unchanged)
             if command == "CAPTURE_STILL":
-                threading.Thread(target=capture_still, daemon=True).start()
+                capture_queue.submit()
+            elif command.startswith(CAPTURE_AT_PREFIX):
+                parsed = parse_capture_at_command(command)
+                if parsed:
+                    capture_queue.submit(parsed[0], parsed)
+                else:
+                    logging.warning(f"Malformed capture command: {command}")
             elif command == "RESTART_STREAM_WITH_SETTINGS":
                 restart_video_stream()
             elif command == "START_STREAM":
@@ -618,8 +681,10 @@ def handle_settings_package(command):
         
         # Save to unified transforms system
         try:
-            from shared.transforms import save_device_settings
+            from shared.transforms import save_device_settings, invalidate_device_settings
             device_name = get_device_name()
+            # Drop cached settings first so nothing in this process reads pre-package values
+            invalidate_device_settings(device_name)
             if save_device_settings(device_name, camera_settings):
                 logging.info(f"[STILL] ✅ SETTINGS_APPLIED to unified system for {device_name}")
             else:
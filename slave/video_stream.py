@@ -18,7 +18,6 @@ import numpy as np
 import traceback
 import subprocess
 import re
-from picamera2 import Picamera2
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -29,7 +28,12 @@ try:
     import os
     sys.path.insert(0, "/home/andrc1/camera_system_integrated_final")
     
-    from shared.config import MASTER_IP, VIDEO_PORT, get_slave_ports, HEARTBEAT_PORT
+    from shared.config import (MASTER_IP, VIDEO_PORT, get_slave_ports, HEARTBEAT_PORT,
+                               VIDEO_PIPELINE_THREADED, VIDEO_ENCODER_WORKERS, VIDEO_MAX_FRAME_AGE,
+                               VIDEO_FRAGMENT_PAYLOAD, VIDEO_FRAME_BYTES_TARGET, VIDEO_QUALITY_MIN,
+                               VIDEO_QUALITY_MAX, VIDEO_SKIP_UNCHANGED, VIDEO_CHANGE_THRESHOLD,
+                               VIDEO_KEEPALIVE_FPS, VIDEO_CODEC, VIDEO_JPEG_SUBSAMPLING,
+                               CAMERA_OWNER_SOCKET, STILL_WARM_IDLE_TIMEOUT)
     logging.info("✅ Successfully imported from shared.config")
 except ImportError as e:
     logging.warning(f"❌ Failed to import shared.config: {e}")
@@ -37,20 +41,70 @@ except ImportError as e:
     MASTER_IP = "192.168.0.200"
     VIDEO_PORT = 5002
     HEARTBEAT_PORT = 5003
+    VIDEO_PIPELINE_THREADED = True
+    VIDEO_ENCODER_WORKERS = 2
+    VIDEO_MAX_FRAME_AGE = 0.2
+    VIDEO_FRAGMENT_PAYLOAD = 1400
+    VIDEO_FRAME_BYTES_TARGET = 16000
+    VIDEO_QUALITY_MIN = 20
+    VIDEO_QUALITY_MAX = 85
+    VIDEO_SKIP_UNCHANGED = True
+    VIDEO_CHANGE_THRESHOLD = 3.0
+    VIDEO_KEEPALIVE_FPS = 1.0
+    VIDEO_CODEC = 'jpeg'
+    VIDEO_JPEG_SUBSAMPLING = '420'
+    CAMERA_OWNER_SOCKET = "/tmp/gertie_camera_owner.sock"
+    STILL_WARM_IDLE_TIMEOUT = 30.0
     
     def get_slave_ports(ip: str):
         """Fallback function to get slave ports"""
         if ip == "127.0.0.1" or ip.startswith("127."):
-            return {"control": 5011, "video": 5012, "video_control": 5014, "still": 6010, "heartbeat": 5013}
+            return {"control": 5011, "video": 5012, "video_control": 5014, "still": 6010, "heartbeat": 5013,
+                    "clock_sync": 5015}
         else:
-            return {"control": 5001, "video": 5002, "video_control": 5004, "still": 6000, "heartbeat": 5003}
+            return {"control": 5001, "video": 5002, "video_control": 5004, "still": 6000, "heartbeat": 5003,
+                    "clock_sync": 5005}
     
     logging.info("Using fallback configuration")
 
+# Settings cache - keeps per-frame transforms from re-reading JSON off the SD card
+try:
+    from shared.settings_cache import SettingsCache, file_signature
+    _settings_cache = SettingsCache()
+except ImportError as e:
+    logging.warning(f"❌ Settings cache unavailable, loading settings from disk every frame: {e}")
+    _settings_cache = None
+
+# Compiled transform plans - one transpose/flip op per frame into reused buffers
+try:
+    from shared.transforms import get_transform_plan
+except ImportError as e:
+    logging.warning(f"❌ Transform plans unavailable, using per-step transforms: {e}")
+    get_transform_plan = None
+
+# Camera access (Picamera2 on the Pi; synthetic/replay sources for off-Pi profiling).
+# This service owns the camera; still_capture.py asks it for stills over CAMERA_OWNER_SOCKET.
+from shared.camera_owner import CameraOwner, CameraOwnerServer
+from shared.capture_sync import capture_info_parts
+from shared.still_protocol import save_parts, settings_hash
+from shared.clock_sync import ClockSyncResponder
+from shared.video_pipeline import VideoPipeline
+from shared.video_framing import FrameSender, camera_id_from_name
+from shared.rate_control import JpegRateController
+from shared.preview_codecs import create_preview_codec
+from shared.preview_demand import PreviewDemand, frame_budget
+from shared.change_detect import ChangeDetector
+
 # Global variables
 streaming = False
 streaming_lock = threading.Lock()
-jpeg_quality = 35  # Balanced quality/size - improved from 10 (too low) but still UDP-safe (~8-12KB frames)
+jpeg_quality = VIDEO_QUALITY_MAX  # Quality ceiling for the preview rate controller (SET_QUALITY_ adjusts it live)
+preview_demand = PreviewDemand()  # Rate/size the master displays (SET_PREVIEW_DEMAND_), kept across stream restarts
+# Static scene: skip encode/send, with a keepalive frame at VIDEO_KEEPALIVE_FPS
+change_detector = ChangeDetector(VIDEO_CHANGE_THRESHOLD, VIDEO_KEEPALIVE_FPS) if VIDEO_SKIP_UNCHANGED else None
+# Opened once; stream stop/start and stills never close it. With the stream stopped,
+# stills come from a warm still session released after STILL_WARM_IDLE_TIMEOUT idle seconds
+camera_owner = CameraOwner(still_idle_timeout=STILL_WARM_IDLE_TIMEOUT)
 
 def get_device_name_from_ip():
     """SIMPLIFIED: Get correct device name with robust fallback"""
@@ -135,6 +189,11 @@ def get_device_name_from_ip():
 
 def load_device_settings(device_name):
     """Load settings from correct device-specific file - FIXED BRIGHTNESS SCALE"""
+    if _settings_cache is not None:
+        cached = _settings_cache.get(device_name)
+        if cached is not None:
+            return cached.copy()
+    
     settings_file = f"/home/andrc1/camera_system_integrated_final/{device_name}_settings.json"
     
     # FIXED: Default settings with correct GUI brightness scale
@@ -160,6 +219,7 @@ def load_device_settings(device_name):
     
     try:
         if os.path.exists(settings_file):
+            signature = file_signature(settings_file) if _settings_cache is not None else None
             with open(settings_file, 'r') as f:
                 settings = json.load(f)
             
@@ -176,6 +236,8 @@ def load_device_settings(device_name):
                 settings['brightness'] = 0
                 
             logging.info(f"[SETTINGS] Loaded {device_name}: brightness={settings.get('brightness', 0)} (GUI scale)")
+            if _settings_cache is not None:
+                _settings_cache.put(device_name, settings_file, settings, signature)
             return settings
         else:
             logging.info(f"[SETTINGS] Creating default settings file for {device_name}")
@@ -202,6 +264,7 @@ def save_device_settings(device_name, settings):
             json.dump(settings, f, indent=2)
         
         os.rename(temp_file, settings_file)
+        invalidate_settings_cache(device_name)
         logging.info(f"[SETTINGS] Saved {device_name}: brightness={settings.get('brightness', 0)}")
         return True
         
@@ -209,11 +272,23 @@ def save_device_settings(device_name, settings):
         logging.error(f"[SETTINGS] Failed to save settings for {device_name}: {e}")
         return False
 
+def invalidate_settings_cache(device_name=None):
+    """Force the next load_device_settings() to re-read the settings file"""
+    if _settings_cache is not None:
+        _settings_cache.invalidate(device_name)
+
 def apply_frame_transforms(image_array, device_name):
     """Apply ONLY frame transforms - never affects camera hardware"""
     try:
         settings = load_device_settings(device_name)
         
+        if get_transform_plan is not None:
+            # Same plan as stills and rep8; recompiled only when settings change.
+            # The result lives in plan-owned buffers, valid until the next frame.
+            # Grayscale comes out single-channel so the encoder sends one channel, not three.
+            plan = get_transform_plan(device_name, settings, image_array.shape, 'RGB_OR_GRAY')
+            return plan.apply(image_array, reuse_buffers=True)
+        
         # FIXED: Keep RGB format for GUI display (no BGR conversion)
         # GUI expects RGB data, so red objects appear red (not blue)
         image = image_array.copy()
@@ -361,13 +436,11 @@ def start_stream():
     logging.info(f"[VIDEO] 🚀 Starting FIXED stream for {device_name}")
     logging.info(f"[VIDEO] ✅ Camera controls and frame transforms are completely separated")
 
-    picam2 = None
+    session = None
     sock = None
+    pipeline = None
 
     try:
-        # Initialize camera
-        picam2 = Picamera2()
-        
         # Get configuration with separated concerns
         resolution = get_video_resolution(device_name)
         camera_controls = build_camera_controls(device_name)
@@ -379,23 +452,20 @@ def start_stream():
         
         # Configure camera with ONLY hardware controls
         # WYSIWYG FIX v2: Use raw (sensor) config to force full sensor usage
-        video_config = picam2.create_video_configuration(
+        # The owner reconfigures the open camera in place (and skips it if nothing changed)
+        session = camera_owner.start_preview(
             main={"size": resolution, "format": "RGB888"},
             raw={"size": (4608, 2592)},  # Force full HQ sensor - prevents center crop
             controls=camera_controls
         )
         logging.info(f"[VIDEO] WYSIWYG v2: Using full sensor (4608x2592) → scaled to {resolution}")
-        picam2.configure(video_config)
-        picam2.start()
         
         # MATCH REP8: Don't set controls after start
         # Rep8 doesn't call set_controls and works perfectly
         # Let the camera use its auto-exposure and defaults
-        # picam2.set_controls(camera_controls)  # COMMENTED OUT to match rep8
         logging.info(f"[VIDEO] ✅ Camera started with MINIMAL controls (matching rep8)")
         
         logging.info(f"[VIDEO] ✅ Camera hardware initialized for {device_name}")
-        time.sleep(2.0)
         
         # Setup UDP socket
         sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
@@ -403,59 +473,95 @@ def start_stream():
         
         logging.info(f"[VIDEO] 📡 Streaming to {MASTER_IP}:{VIDEO_PORT} for {device_name}")
         
-        # Main streaming loop
-        frame_count = 0
-        last_time = time.time()
+        # Pipeline stages: capture | transform+encode | send
+        # Capture is paced to the rate the master displays (native FPS until it says otherwise)
+        logging.info(f"[VIDEO] Preview demand for {device_name}: {preview_demand.describe()}")
+        if change_detector:
+            change_detector.reset()
+        codec = create_preview_codec(VIDEO_CODEC, VIDEO_JPEG_SUBSAMPLING)
+        logging.info(f"[VIDEO] Preview codec for {device_name}: {codec.describe()}")
+        rate_controller = JpegRateController(VIDEO_FRAME_BYTES_TARGET, VIDEO_QUALITY_MIN, jpeg_quality,
+                                             codec=codec)
+        
+        def capture_frame():
+            if not preview_demand.pace(pipeline.is_running):
+                return None
+            return camera_owner.capture_preview()
+        
+        def encode_frame(frame_rgb):
+            # Apply frame transforms (RGB preserved for the GUI), then shrink to the displayed size
+            frame_out = preview_demand.fit(apply_frame_transforms(frame_rgb, device_name))
+            
+            # Nothing new on screen - don't spend an encode and a send on it
+            change = change_detector.check(frame_out) if change_detector else None
+            if change_detector and change is None:
+                return None
+            
+            # Encode once at the quality predicted to hit the byte budget
+            # (ceiling and budget read per frame so SET_QUALITY_ / demand changes apply live)
+            rate_controller.max_quality = jpeg_quality
+            rate_controller.target_bytes = frame_budget(VIDEO_FRAME_BYTES_TARGET, frame_out)
+            frame_data = rate_controller.encode(frame_out)
+            return (frame_data, change) if frame_data is not None else None
         
-        while True:
+        send_stats = {'frames': 0, 'errors': 0, 'last_frames': 0, 'last_time': time.time()}
+        
+        # Fragmented, sequenced datagrams - frame size is no longer capped at one datagram
+        sender = FrameSender(sock, (MASTER_IP, VIDEO_PORT), camera_id_from_name(device_name),
+                             VIDEO_FRAGMENT_PAYLOAD)
+        
+        def send_frame(encoded, capture_time):
+            frame_data, change = encoded
+            try:
+                sender.send(frame_data, capture_time)
+                if change:
+                    change_detector.sent(change)  # Only now is this what the GUI shows
+            except socket.error as e:
+                send_stats['errors'] += 1
+                if send_stats['errors'] % 100 == 1:  # Log errors sparingly
+                    logging.warning(f"[VIDEO] Socket error: {e}")
+            
+            # Performance monitoring (every 10 seconds, whatever the demanded rate)
+            send_stats['frames'] += 1
+            current_time = time.time()
+            if current_time - send_stats['last_time'] >= 10.0:
+                actual_fps = (send_stats['frames'] - send_stats['last_frames']) / (current_time - send_stats['last_time'])
+                logging.info(f"[VIDEO] {device_name}: {actual_fps:.1f} fps, {len(frame_data)} bytes/frame, "
+                             f"quality {rate_controller.last_quality}, demand {preview_demand.describe()}")
+                logging.info(f"[PERF] {device_name} pipeline: {pipeline.format_stats()}")
+                if change_detector:
+                    logging.info(f"[PERF] {device_name} {change_detector.format_stats()}")
+                send_stats['last_frames'] = send_stats['frames']
+                send_stats['last_time'] = current_time
+        
+        pipeline = VideoPipeline(capture_frame, encode_frame, send_frame,
+                                 name=device_name, threaded=VIDEO_PIPELINE_THREADED,
+                                 encoder_workers=VIDEO_ENCODER_WORKERS,
+                                 max_frame_age=VIDEO_MAX_FRAME_AGE)
+        pipeline.start()
+        
+        while pipeline.is_running():
             with streaming_lock:
                 if not streaming:
                     logging.info("[VIDEO] Stream stop requested")
                     break
-            
-            try:
-                # Capture frame from camera (RGB format from Picamera2)
-                frame_rgb = picam2.capture_array()
-                
-                # Apply frame transforms (includes RGB→BGR conversion)
-                frame_bgr = apply_frame_transforms(frame_rgb, device_name)
-                
-                # Encode as JPEG
-                encode_params = [cv2.IMWRITE_JPEG_QUALITY, jpeg_quality]
-                success, encoded = cv2.imencode(".jpg", frame_bgr, encode_params)
-                
-                if success:
-                    frame_data = encoded.tobytes()
-                    try:
-                        sock.sendto(frame_data, (MASTER_IP, VIDEO_PORT))
-                    except socket.error as e:
-                        if frame_count % 100 == 0:  # Log errors sparingly
-                            logging.warning(f"[VIDEO] Socket error: {e}")
-                    
-                    # Performance monitoring
-                    frame_count += 1
-                    if frame_count % 300 == 0:  # Every 10 seconds at 30fps
-                        current_time = time.time()
-                        actual_fps = 300 / (current_time - last_time)
-                        logging.info(f"[VIDEO] {device_name}: {actual_fps:.1f} fps, {len(frame_data)} bytes/frame")
-                        last_time = current_time
-                
-                # Frame rate control removed - let camera run at native FPS (30)
-                # Display throttling handled by master GUI
-                
-            except Exception as e:
-                logging.error(f"[VIDEO] Error in streaming loop for {device_name}: {e}")
-                break
+            time.sleep(0.1)
+        
+        if pipeline.error is not None:
+            logging.error(f"[VIDEO] Error in streaming loop for {device_name}: {pipeline.error}")
                 
     except Exception as e:
         logging.error(f"[VIDEO] Critical error for {device_name}: {e}")
         
     finally:
-        # Cleanup
-        if picam2:
+        # Cleanup - stop the pipeline threads before releasing the camera
+        if pipeline:
+            pipeline.stop()
+            logging.info(f"[PERF] {device_name} pipeline final: {pipeline.format_stats()}")
+        
+        if session is not None:
             try:
-                picam2.stop()
-                picam2.close()
+                camera_owner.stop_preview(session)  # Camera stays open for the next stream or still
                 logging.info(f"[VIDEO] Camera stopped for {device_name}")
             except:
                 pass
@@ -541,10 +647,19 @@ def handle_video_commands():
                     quality = int(command.split('_')[2])
                     if 20 <= quality <= 100:
                         jpeg_quality = quality
+                        if change_detector:
+                            change_detector.reset()  # Show the new quality even on a static scene
                         logging.info(f"[VIDEO] JPEG quality for {device_name}: {quality}")
                 except:
                     logging.error(f"[VIDEO] Invalid quality command: {command}")
             
+            elif command.startswith("SET_PREVIEW_DEMAND_"):
+                try:
+                    if preview_demand.apply_command(command):
+                        logging.info(f"[VIDEO] Preview demand for {device_name}: {preview_demand.describe()}")
+                except ValueError as e:
+                    logging.error(f"[VIDEO] {e}")
+            
             elif command == "RESET_TO_FACTORY_DEFAULTS":
                 handle_factory_reset_fixed(device_name)
                     
@@ -559,6 +674,9 @@ def handle_settings_package_fixed(command, device_name):
         
         logging.info(f"[SETTINGS] Processing package for {device_name}: {len(new_settings)} settings")
         
+        # The package may follow a write by still_capture - never merge into stale cached values
+        invalidate_settings_cache(device_name)
+        
         # Load current settings
         current_settings = load_device_settings(device_name)
         
@@ -695,6 +813,39 @@ def initialize_device_settings():
         logging.error(f"[INIT] Failed to initialize settings for {device_name}: {e}")
         return False
 
+def save_still(filename, capture_id=None, fire_time=None):
+    """Capture a full-resolution still from the owned camera (preview keeps running)"""
+    device_name = get_device_name_from_ip()
+    if fire_time is None:
+        image_array = camera_owner.capture_still()
+    else:
+        image_array = camera_owner.capture_still_at(fire_time)
+        logging.info(f"[SYNC] {device_name}: capture {capture_id} armed {camera_owner.last_arm_margin * 1000:.0f}ms "
+                     f"before fire time")
+    try:
+        from shared.transforms import apply_unified_transforms_for_still, load_device_settings
+        processed_image = apply_unified_transforms_for_still(image_array, device_name)
+        transform_hash = settings_hash(load_device_settings(device_name))
+    except Exception as e:
+        logging.error(f"[STILL] Unified transforms failed, saving untransformed: {e}")
+        processed_image = image_array
+        transform_hash = None
+    
+    success, encoded = cv2.imencode(".jpg", processed_image)
+    if not success:
+        return None
+    info = None
+    if camera_owner.last_still_time is not None:
+        # The sensor timestamp travels inside the JPEG (COM segment) for skew reporting
+        info = {'device': device_name, 'capture_id': capture_id, 'fire_time': fire_time,
+                'sensor_time': camera_owner.last_still_time, 'settings_hash': transform_hash}
+    os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
+    crc32 = save_parts(filename, capture_info_parts(encoded, info))  # Written from the encode buffer, no copy
+    logging.info(f"[STILL] {device_name}: {filename} "
+                 f"(preview {'running' if camera_owner.previewing else 'stopped'})")
+    logging.info(f"[PERF] {device_name} {camera_owner.format_stats()}")
+    return filename, crc32
+
 def main():
     """Main function with device-specific initialization"""
     device_name = get_device_name_from_ip()
@@ -712,6 +863,14 @@ def main():
         # Start services
         threading.Thread(target=send_video_heartbeat, daemon=True).start()
         threading.Thread(target=handle_video_commands, daemon=True).start()
+        owner_server = CameraOwnerServer(save_still, CAMERA_OWNER_SOCKET)
+        owner_server.start()
+        # Lets the master measure this Pi's clock offset (no external NTP needed)
+        try:
+            ports = get_slave_ports(socket.gethostbyname(socket.gethostname()))
+            ClockSyncResponder(ports.get('clock_sync', 5005)).start()
+        except OSError as e:
+            logging.warning(f"[CLOCK] Clock sync responder unavailable: {e}")
         
         logging.info(f"[MAIN] Services started for {device_name}")
         
@@ -729,6 +888,7 @@ def main():
     except KeyboardInterrupt:
         logging.info(f"[MAIN] Stopping video service for {device_name}")
         stop_stream()
+        camera_owner.close()
     except Exception as e:
         logging.error(f"[MAIN] Error for {device_name}: {e}")
 
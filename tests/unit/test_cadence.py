@@ -0,0 +1,111 @@
+import numpy as np
+import pytest
+import cv2
+import time
+import sys
+import os
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from shared.cadence import CadenceController
+from shared.upload_queue import UploadQueue
+
+CAMERAS = ["192.168.0.201", "192.168.0.202", "127.0.0.1"]
+
+def test_schedule_keeps_period_and_drops_missed_slots():
+    cadence = CadenceController(interval=5.0)
+    cadence.start(now=100.0)
+    assert cadence.due(now=100.0)
+    cadence.sent(CAMERAS, now=100.0)
+    assert not cadence.due(now=104.9)
+    assert cadence.due(now=105.0)
+    cadence.sent(CAMERAS, now=117.0)  # Late: next slot is a full period later, no burst
+    assert cadence.next_fire == 122.0
+    cadence.stop()
+    assert not cadence.due(now=200.0)
+
+def test_trigger_only_mode_is_never_due():
+    cadence = CadenceController(interval=0)
+    cadence.start(now=0.0)
+    assert not cadence.due(now=1000.0)
+
+def test_queue_depth_and_backpressure():
+    cadence = CadenceController(interval=1.0, max_in_flight=2)
+    cadence.start(now=0.0)
+    cadence.sent(CAMERAS, now=0.0)
+    cadence.sent(CAMERAS, now=1.0)
+    assert cadence.blocked(CAMERAS) == CAMERAS
+    for ip in CAMERAS[:2]:
+        cadence.delivered(ip, now=1.5)
+    assert cadence.blocked(CAMERAS) == ["127.0.0.1"]
+    assert cadence.queue_depth("192.168.0.201") == 1
+    assert cadence.queue_depth("127.0.0.1") == 2
+    cadence.delivered("127.0.0.1", now=1.6)
+    assert cadence.sets_completed == 1
+    assert "1/2 sets complete" in cadence.format_status(CAMERAS, {"127.0.0.1": "rep8"}, now=2.0)
+    assert "rep8 1" in cadence.format_status(CAMERAS, {"127.0.0.1": "rep8"}, now=2.0)
+
+def test_incomplete_sets_expire():
+    cadence = CadenceController(interval=1.0, set_timeout=10.0)
+    cadence.start(now=0.0)
+    cadence.sent(CAMERAS, now=0.0)
+    cadence.delivered(CAMERAS[0], now=1.0)
+    assert cadence.expire(now=5.0) == []
+    assert cadence.expire(now=10.0) == sorted(CAMERAS[1:])
+    assert cadence.sets_expired == 1
+    assert cadence.queue_depth(CAMERAS[1]) == 0
+
+def test_sets_per_minute():
+    cadence = CadenceController(interval=2.0)
+    cadence.start(now=0.0)
+    for i in range(10):
+        cadence.sent(CAMERAS, now=i * 2.0)
+        for ip in CAMERAS:
+            cadence.delivered(ip, now=i * 2.0 + 1.0)
+    assert cadence.sets_per_minute(now=20.0) == pytest.approx(30.0)
+
+def test_upload_queue_runs_in_order_and_counts_failures():
+    sent = []
+    def send(item):
+        sent.append(item)
+        return item != "bad"
+    uploads = UploadQueue(send, max_pending=2)
+    for item in ["a", "bad", "c"]:
+        uploads.submit(item)
+    assert uploads.join(timeout=5.0)
+    assert sent == ["a", "bad", "c"]
+    assert uploads.uploaded == 2 and uploads.failed == 1
+    assert uploads.depth() == 0
+
+def test_pipelined_cadence_benchmark():
+    """Benchmark: capture sets with upload overlapped vs each set waiting for its upload"""
+    exposure, transfer, sets = 0.03, 0.06, 8
+    image = np.zeros((240, 320, 3), dtype=np.uint8)
+
+    def capture():
+        time.sleep(exposure)
+        return cv2.imencode(".jpg", image)[1]
+
+    def upload(_):
+        time.sleep(transfer)
+        return True
+
+    start = time.time()
+    for _ in range(sets):
+        upload(capture())
+    serial = time.time() - start
+
+    uploads = UploadQueue(upload, max_pending=2)
+    start = time.time()
+    for _ in range(sets):
+        uploads.submit(capture())
+    uploads.join(timeout=10.0)
+    pipelined = time.time() - start
+
+    print(f"{sets} sets: serial {sets / serial * 60:.0f} sets/min, pipelined {sets / pipelined * 60:.0f} sets/min "
+          f"(max upload depth {uploads.max_depth})")
+    assert pipelined < serial
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
@@ -0,0 +1,103 @@
+import numpy as np
+import pytest
+import cv2
+import time
+import sys
+import os
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from shared.camera_backend import (
+    create_camera_backend,
+    SyntheticBackend,
+    ReplayBackend,
+    BACKEND_ENV
+)
+
+def start_camera(camera, size=(64, 48), fps=0):
+    config = camera.create_video_configuration(
+        main={"size": size, "format": "RGB888"},
+        controls={"FrameRate": fps}
+    )
+    camera.configure(config)
+    camera.start()
+    return camera
+
+def test_synthetic_frames_have_configured_shape():
+    """Synthetic frames match the requested size and change every frame"""
+    camera = start_camera(SyntheticBackend(), size=(64, 48))
+    first = camera.capture_array()
+    second = camera.capture_array()
+    assert first.shape == (48, 64, 3)
+    assert first.dtype == np.uint8
+    assert not np.array_equal(first, second)
+    camera.close()
+
+def test_synthetic_metadata():
+    """Metadata carries frame number, configured values and overrides"""
+    camera = start_camera(SyntheticBackend(metadata={'Lux': 400.0}), fps=30)
+    camera.capture_array()
+    metadata = camera.capture_metadata()
+    assert metadata['FrameNumber'] == 1
+    assert metadata['FrameDuration'] == int(1e6 / 30)
+    assert metadata['Lux'] == 400.0
+
+def test_frame_rate_pacing():
+    """A paced backend delivers frames no faster than its frame rate"""
+    camera = start_camera(SyntheticBackend(fps=100))
+    start_time = time.perf_counter()
+    for _ in range(11):
+        camera.capture_array()
+    elapsed = time.perf_counter() - start_time
+    assert elapsed >= 0.09  # 10 frame intervals at 100 fps
+
+def test_settle_uses_backend_setting():
+    """Hardware-free backends skip the caller's settle delay unless configured"""
+    camera = SyntheticBackend()
+    start_time = time.perf_counter()
+    camera.settle(2.0)
+    assert time.perf_counter() - start_time < 0.5
+
+def test_capture_requires_start():
+    """Capturing before start() fails like the real camera would"""
+    camera = SyntheticBackend()
+    with pytest.raises(RuntimeError):
+        camera.capture_array()
+
+def test_replay_backend_loops_frames(tmp_path):
+    """Replay serves JPEG frames as RGB and .npy frames as-is, in name order, looping"""
+    red_rgb = np.zeros((48, 64, 3), dtype=np.uint8)
+    red_rgb[:, :, 0] = 255
+    cv2.imwrite(str(tmp_path / "000.png"), cv2.cvtColor(red_rgb, cv2.COLOR_RGB2BGR))
+    np.save(str(tmp_path / "001.npy"), np.full((48, 64, 3), 7, dtype=np.uint8))
+
+    camera = start_camera(ReplayBackend(str(tmp_path)), size=(64, 48))
+    frames = [camera.capture_array() for _ in range(3)]
+    np.testing.assert_array_equal(frames[0], red_rgb)
+    assert frames[1][0, 0, 0] == 7
+    np.testing.assert_array_equal(frames[2], red_rgb)
+
+def test_replay_backend_resizes_to_configuration(tmp_path):
+    """Replayed frames are scaled to the configured main size"""
+    np.save(str(tmp_path / "frame.npy"), np.zeros((96, 128, 3), dtype=np.uint8))
+    camera = start_camera(ReplayBackend(str(tmp_path)), size=(64, 48))
+    assert camera.capture_array().shape == (48, 64, 3)
+
+def test_replay_backend_without_frames(tmp_path):
+    """An empty replay directory is reported up front"""
+    with pytest.raises(FileNotFoundError):
+        ReplayBackend(str(tmp_path))
+
+def test_factory_selects_backend(monkeypatch):
+    """create_camera_backend() honours the explicit kind and the environment"""
+    assert isinstance(create_camera_backend('synthetic'), SyntheticBackend)
+
+    monkeypatch.setenv(BACKEND_ENV, 'synthetic')
+    assert isinstance(create_camera_backend(), SyntheticBackend)
+
+    with pytest.raises(ValueError):
+        create_camera_backend('webcam')
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
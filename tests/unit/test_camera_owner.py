@@ -0,0 +1,179 @@
+import numpy as np
+import pytest
+import cv2
+import time
+import threading
+import sys
+import os
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from shared.camera_backend import SyntheticBackend
+from shared.camera_owner import CameraOwner, CameraOwnerServer, request_still
+
+PREVIEW = {"size": (64, 48), "format": "RGB888"}
+STILL_SIZE = (1152, 648)
+
+def make_owner(still_size=STILL_SIZE):
+    return CameraOwner(backend_factory=SyntheticBackend, still_size=still_size)
+
+def test_still_while_previewing_keeps_preview_running():
+    """A still mid-stream is a mode switch: full-size frame, preview frames continue unchanged"""
+    owner = make_owner()
+    owner.start_preview(PREVIEW, controls={"FrameRate": 0})
+    assert owner.capture_preview().shape == (48, 64, 3)
+
+    still = owner.capture_still()
+    assert still.shape == (STILL_SIZE[1], STILL_SIZE[0], 3)
+    assert owner.previewing
+    assert owner.camera.started
+    assert owner.capture_preview().shape == (48, 64, 3)
+    assert owner.stats()['mode_switches'] == 1
+    owner.close()
+
+def test_still_without_preview():
+    """With the stream stopped the still config starts a warm still session"""
+    owner = make_owner()
+    still = owner.capture_still(settle=0)
+    assert still.shape == (STILL_SIZE[1], STILL_SIZE[0], 3)
+    assert owner.still_warm and owner.camera.started
+    assert owner.capture_preview() is None
+
+    # The next stream releases the still session and reconfigures the video mode
+    owner.start_preview(PREVIEW, settle=0)
+    assert not owner.still_warm
+    assert owner.capture_preview().shape == (48, 64, 3)
+    owner.close()
+
+def test_capture_preview_waits_instead_of_spinning():
+    """Without a preview the capture loop is held briefly, and gets a frame as soon as preview starts"""
+    owner = make_owner()
+    start_time = time.perf_counter()
+    assert owner.capture_preview(wait=0.05) is None
+    assert time.perf_counter() - start_time >= 0.04
+
+    threading.Timer(0.05, lambda: owner.start_preview(PREVIEW, settle=0)).start()
+    assert owner.capture_preview(wait=2.0).shape == (48, 64, 3)
+    owner.close()
+
+def test_warm_session_hits():
+    """Back-to-back stills after the first reuse the running still session"""
+    owner = make_owner()
+    for _ in range(4):
+        owner.capture_still(settle=0)
+    assert (owner.warm_misses, owner.warm_hits) == (1, 3)
+    assert owner.warm_hit_rate() == pytest.approx(75.0)
+    assert owner.last_still_kind == 'warm'
+    assert "warm hit rate 75%" in owner.format_stats()
+    owner.close()
+
+def test_warm_session_idle_release():
+    """The still session is released after the idle timeout, then the next still is cold"""
+    owner = CameraOwner(backend_factory=SyntheticBackend, still_size=STILL_SIZE, still_idle_timeout=0.3)
+    owner.capture_still(settle=0)
+    time.sleep(0.2)
+    owner.capture_still(settle=0)  # Hit - and restarts the idle clock
+    time.sleep(0.1)
+    assert owner.still_warm
+    time.sleep(0.5)
+    assert not owner.still_warm
+    assert not owner.camera.started
+    owner.capture_still(settle=0)
+    assert (owner.warm_misses, owner.warm_hits) == (2, 1)
+    owner.close()
+
+def test_camera_opened_once():
+    """Stream restarts and stills never reopen the camera"""
+    owner = make_owner()
+    for _ in range(3):
+        session = owner.start_preview(PREVIEW, settle=0)
+        owner.capture_still()
+        owner.stop_preview(session)
+        owner.capture_still(settle=0)
+    assert owner.opens == 1
+    assert owner.stills == 6
+    owner.close()
+
+def test_stale_stop_is_ignored():
+    """A finishing stream thread must not stop the stream that replaced it"""
+    owner = make_owner()
+    old = owner.start_preview(PREVIEW, settle=0)
+    new = owner.start_preview({"size": (32, 24), "format": "RGB888"}, settle=0)
+    owner.stop_preview(old)
+    assert owner.previewing
+    assert owner.capture_preview().shape == (24, 32, 3)
+    owner.stop_preview(new)
+    assert not owner.previewing
+    owner.close()
+
+def test_socket_round_trip(tmp_path):
+    """still_capture.py's request reaches the owner process and gets the saved filename back"""
+    owner = make_owner()
+    owner.start_preview(PREVIEW, settle=0)
+
+    def save_still(filename):
+        return filename if cv2.imwrite(filename, owner.capture_still()) else None
+
+    server = CameraOwnerServer(save_still, str(tmp_path / "owner.sock"))
+    server.start()
+    try:
+        target = str(tmp_path / "rep1_still.jpg")
+        assert request_still(target, server.path, timeout=5.0) == (target, None)
+        assert cv2.imread(target).shape == (STILL_SIZE[1], STILL_SIZE[0], 3)
+        assert owner.previewing
+
+        with pytest.raises(RuntimeError):
+            request_still(str(tmp_path / "missing_dir" / "x.jpg"), server.path, timeout=5.0)
+    finally:
+        server.stop()
+        owner.close()
+
+def test_owner_reply_carries_crc(tmp_path):
+    """The CRC computed while the owner wrote the still comes back with its filename"""
+    server = CameraOwnerServer(lambda filename: (filename, 2864434397), str(tmp_path / "owner.sock"))
+    server.start()
+    try:
+        target = str(tmp_path / "rep1_still.jpg")
+        assert request_still(target, server.path, timeout=5.0) == (target, 2864434397)
+    finally:
+        server.stop()
+
+def test_no_owner_means_fallback(tmp_path):
+    """No socket: request_still returns None so the caller uses the legacy path"""
+    assert request_still(str(tmp_path / "x.jpg"), str(tmp_path / "none.sock"), timeout=1.0) is None
+
+def test_still_latency_benchmark():
+    """Benchmark still latency at full sensor size: owner mode switch vs stop/reopen/settle"""
+    owner = make_owner(still_size=(4608, 2592))
+    owner.start_preview({"size": (640, 480), "format": "RGB888"}, settle=0)
+    times = []
+    for _ in range(3):
+        start_time = time.perf_counter()
+        owner.capture_still()
+        times.append((time.perf_counter() - start_time) * 1000)
+        owner.capture_preview()
+    owner.close()
+
+    # What the old protocol waited for before any capture work: 0.5 + 3.0 + 1.0 + 2.0 s of sleeps
+    legacy_sleeps_ms = (0.5 + 3.0 + 1.0 + 2.0) * 1000
+    print(f"Owner still (synthetic 4608x2592): {np.mean(times):.0f}ms avg, {max(times):.0f}ms max; "
+          f"legacy fixed sleeps alone: {legacy_sleeps_ms:.0f}ms")
+    assert max(times) < 1000
+
+def test_warm_still_benchmark():
+    """Benchmark back-to-back stills with the preview stopped: cold (configure+start+settle) vs warm"""
+    owner = CameraOwner(backend_factory=lambda: SyntheticBackend(settle_time=None), still_size=(4608, 2592))
+    times = []
+    for _ in range(4):
+        start_time = time.perf_counter()
+        owner.capture_still(settle=1.0)
+        times.append((time.perf_counter() - start_time) * 1000)
+    print(f"Cold still: {times[0]:.0f}ms, warm stills: {np.mean(times[1:]):.0f}ms avg; "
+          f"{owner.format_stats()}")
+    owner.close()
+    assert times[0] >= 1000
+    assert max(times[1:]) < times[0] / 2
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
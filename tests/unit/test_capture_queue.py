@@ -0,0 +1,115 @@
+import pytest
+import time
+import sys
+import os
+import threading
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from shared.capture_queue import CaptureQueue, format_status_message, parse_status_message
+
+class FakeCamera:
+    """Counts captures and how many ever ran at once"""
+    def __init__(self, seconds=0.02):
+        self.seconds = seconds
+        self.calls = []
+        self.running = 0
+        self.max_running = 0
+        self.lock = threading.Lock()
+
+    def capture(self, capture_id=None, fire_time=None):
+        with self.lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        time.sleep(self.seconds)
+        with self.lock:
+            self.running -= 1
+            self.calls.append(capture_id)
+        return capture_id != "bad"
+
+def test_status_message_round_trip():
+    message = format_status_message("1700000000123", "running", 2)
+    assert message == "CAPTURE_STATUS 1700000000123 running 2"
+    assert parse_status_message(message) == ("1700000000123", "running", 2)
+    assert parse_status_message("HEARTBEAT") is None
+    assert parse_status_message("CAPTURE_STATUS x done many") is None
+
+def test_double_tap_is_coalesced():
+    camera = FakeCamera()
+    captures = CaptureQueue(camera.capture, coalesce_window=1.0)
+    assert captures.submit(now=100.0) == 'queued'
+    assert captures.submit(now=100.3) == 'coalesced'
+    assert captures.join(timeout=5.0)
+    assert captures.submit(now=101.5) == 'queued'  # Outside the window: a new capture
+    assert captures.join(timeout=5.0)
+    assert len(camera.calls) == 2
+
+def test_resent_capture_id_is_coalesced():
+    camera = FakeCamera()
+    captures = CaptureQueue(camera.capture)
+    assert captures.submit("42", ("42", None)) == 'queued'
+    assert captures.join(timeout=5.0)
+    assert captures.submit("42", ("42", None), now=time.time() + 60) == 'coalesced'
+    assert captures.submit("43", ("43", None)) == 'queued'
+    assert captures.join(timeout=5.0)
+    assert camera.calls == ["42", "43"]
+
+def test_bounded_queue_rejects_and_reports_every_state():
+    camera = FakeCamera(seconds=0.1)
+    reports = []
+    captures = CaptureQueue(camera.capture, max_pending=2,
+                            report=lambda request_id, status, depth: reports.append((request_id, status)))
+    statuses = [captures.submit(str(i), (str(i), None)) for i in range(5)]
+    assert captures.join(timeout=5.0)
+    assert statuses.count('rejected') >= 1
+    assert captures.rejected == statuses.count('rejected')
+    accepted = [str(i) for i, status in enumerate(statuses) if status == 'queued']
+    assert camera.calls == accepted
+    for request_id in accepted:
+        assert [s for r, s in reports if r == request_id] == ['queued', 'running', 'done']
+
+def test_failed_capture_reported():
+    camera = FakeCamera()
+    reports = []
+    captures = CaptureQueue(camera.capture, report=lambda request_id, status, depth: reports.append(status))
+    captures.submit("bad", ("bad", None))
+    assert captures.join(timeout=5.0)
+    assert reports[-1] == 'failed' and captures.failed == 1
+
+def test_rapid_trigger_benchmark():
+    """Benchmark: 20 triggers 10 ms apart - thread per command vs one worker with coalescing"""
+    triggers = [("CAPTURE_STILL" if i % 2 else f"id{i // 4}") for i in range(20)]
+
+    camera = FakeCamera(seconds=0.03)
+    start = time.time()
+    threads = []
+    for trigger in triggers:
+        thread = threading.Thread(target=camera.capture, args=(trigger,))
+        thread.start()
+        threads.append(thread)
+        time.sleep(0.01)
+    for thread in threads:
+        thread.join()
+    old_time, old_captures, old_concurrent = time.time() - start, len(camera.calls), camera.max_running
+
+    camera = FakeCamera(seconds=0.03)
+    captures = CaptureQueue(camera.capture, max_pending=4)
+    start = time.time()
+    for trigger in triggers:
+        if trigger == "CAPTURE_STILL":
+            captures.submit()
+        else:
+            captures.submit(trigger, (trigger, None))
+        time.sleep(0.01)
+    captures.join(timeout=10.0)
+    new_time = time.time() - start
+
+    print(f"20 rapid triggers: thread-per-command {old_captures} captures, up to {old_concurrent} at once, "
+          f"{old_time * 1000:.0f}ms; queue {len(camera.calls)} captures, 1 at a time, {new_time * 1000:.0f}ms "
+          f"({captures.format_stats()})")
+    assert camera.max_running == 1
+    assert len(camera.calls) < old_captures
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
@@ -0,0 +1,137 @@
+import numpy as np
+import pytest
+import cv2
+import time
+import sys
+import os
+import threading
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from shared.camera_backend import SyntheticBackend
+from shared.camera_owner import CameraOwner
+from shared.capture_sync import (
+    CaptureSetTracker,
+    embed_capture_info,
+    format_capture_at_command,
+    format_report,
+    parse_capture_at_command,
+    read_capture_info,
+    sensor_wall_time
+)
+
+PREVIEW = {"size": (64, 48), "format": "RGB888"}
+STILL_SIZE = (1152, 648)
+
+def make_owner():
+    return CameraOwner(backend_factory=SyntheticBackend, still_size=STILL_SIZE)
+
+def test_command_round_trip():
+    command = format_capture_at_command("1700000000123", 1700000002.123456)
+    assert command == "CAPTURE_AT_1700000000123_1700000002.123456"
+    assert parse_capture_at_command(command) == ("1700000000123", pytest.approx(1700000002.123456))
+    assert parse_capture_at_command("CAPTURE_AT_123_soon") is None
+    assert parse_capture_at_command("CAPTURE_STILL") is None
+
+def test_capture_info_survives_in_jpeg():
+    """The COM segment is read back and the still still decodes as a normal JPEG"""
+    image = np.full((48, 64, 3), 128, dtype=np.uint8)
+    jpeg = cv2.imencode(".jpg", image)[1].tobytes()
+    info = {'device': 'rep3', 'capture_id': '42', 'fire_time': 100.0, 'sensor_time': 100.004}
+    tagged = embed_capture_info(jpeg, info)
+    assert read_capture_info(tagged) == info
+    assert read_capture_info(jpeg) is None
+    decoded = cv2.imdecode(np.frombuffer(tagged, np.uint8), cv2.IMREAD_COLOR)
+    assert decoded.shape == image.shape
+
+def test_tracker_reports_skew_when_set_complete():
+    tracker = CaptureSetTracker()
+    tracker.start("7", 100.0, ["rep1", "rep2", "rep3"])
+    assert tracker.record("7", "rep1", 100.010) is None
+    assert tracker.record("7", "rep2", 100.002) is None
+    report = tracker.record("7", "rep3", 100.025)
+    assert report['skew_ms'] == pytest.approx(23.0)
+    assert report['offsets_ms']['rep1'] == pytest.approx(10.0)
+    assert "skew 23.0ms across 3 cameras" in format_report(report)
+    assert tracker.record("7", "rep1", 100.0) is None  # Set already reported
+
+def test_tracker_expires_incomplete_sets():
+    tracker = CaptureSetTracker(timeout=5.0)
+    tracker.start("8", 100.0, ["rep1", "rep2", "rep8"])
+    tracker.record("8", "rep1", 100.001)
+    tracker.record("8", "rep8", None)  # Legacy slave: still arrived without a timestamp
+    assert tracker.expire(now=time.time()) == []
+    (report,) = tracker.expire(now=time.time() + 10)
+    assert report['missing'] == ["rep2"]
+    assert report['untimed'] == ["rep8"]
+    assert "missing rep2" in format_report(report)
+
+def test_sensor_wall_time():
+    now_ns = time.monotonic_ns()
+    assert sensor_wall_time({'SensorTimestamp': now_ns}) == pytest.approx(time.time(), abs=0.01)
+    assert sensor_wall_time({}) is None
+
+def test_capture_at_fires_on_time_and_resumes_preview():
+    """Preview pauses for the armed still and comes back in its own configuration"""
+    owner = make_owner()
+    owner.start_preview(PREVIEW, settle=0)
+    fire_time = time.time() + 0.3
+    still = owner.capture_still_at(fire_time, settle=0)
+    assert still.shape == (STILL_SIZE[1], STILL_SIZE[0], 3)
+    assert owner.last_still_time >= fire_time
+    assert owner.last_still_time - fire_time < 0.2
+    assert owner.last_arm_margin > 0
+    assert owner.previewing and not owner.still_warm
+    assert owner.capture_preview().shape == (48, 64, 3)
+    owner.close()
+
+def test_capture_at_without_preview_uses_warm_session():
+    owner = make_owner()
+    owner.capture_still(settle=0)
+    owner.capture_still_at(time.time() + 0.1, settle=0)
+    assert owner.last_still_kind == 'warm'
+    assert owner.still_warm
+    owner.close()
+
+def test_synchronized_skew_benchmark():
+    """Benchmark inter-camera skew: CAPTURE_AT vs independent captures started as commands arrive"""
+    owners = [make_owner() for _ in range(4)]
+    for owner in owners:
+        owner.start_preview(PREVIEW, settle=0)
+
+    def skew_ms(times):
+        return (max(times) - min(times)) * 1000
+
+    # Independent: each camera starts when its command lands (staggered like threaded sends)
+    independent = []
+    def independent_capture(owner, delay):
+        time.sleep(delay)
+        owner.capture_still(settle=0)
+        independent.append(time.time())
+    threads = [threading.Thread(target=independent_capture, args=(owner, i * 0.05)) for i, owner in enumerate(owners)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Synchronized: same staggered arrival, one fire time
+    fire_time = time.time() + 0.5
+    def synced_capture(owner, delay):
+        time.sleep(delay)
+        owner.capture_still_at(fire_time, settle=0)
+    threads = [threading.Thread(target=synced_capture, args=(owner, i * 0.05)) for i, owner in enumerate(owners)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    synced = [owner.last_still_time for owner in owners]
+    for owner in owners:
+        owner.close()
+
+    print(f"Skew across {len(owners)} synthetic cameras: independent {skew_ms(independent):.1f}ms, "
+          f"CAPTURE_AT {skew_ms(synced):.1f}ms")
+    assert skew_ms(synced) < skew_ms(independent)
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
@@ -0,0 +1,131 @@
+import numpy as np
+import pytest
+import cv2
+import time
+import sys
+import os
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from shared.change_detect import ChangeDetector, frame_thumbnail, block_difference
+
+def make_scene(seed=0):
+    rng = np.random.default_rng(seed)
+    image = rng.integers(0, 256, (480, 640, 3), dtype=np.uint8)
+    return cv2.GaussianBlur(image, (0, 0), 6)
+
+def noisy(image, seed, sigma=3):
+    """Same scene with sensor-like noise"""
+    noise = np.random.default_rng(seed).normal(0, sigma, image.shape)
+    return np.clip(image + noise, 0, 255).astype(np.uint8)
+
+def test_static_noisy_scene_is_skipped():
+    """Sensor noise alone never counts as a change"""
+    detector = ChangeDetector(keepalive_fps=0)
+    scene = make_scene()
+    results = [detector.should_send(noisy(scene, i), now=i * 0.1) for i in range(20)]
+    assert results[0] is True  # First frame always goes out
+    assert not any(results[1:])
+    assert detector.saved_percent() == pytest.approx(95.0)
+
+def test_small_moving_object_is_detected():
+    """A change confined to one corner is not diluted by the static rest of the frame"""
+    detector = ChangeDetector(keepalive_fps=0)
+    scene = make_scene()
+    detector.should_send(scene, now=0.0)
+
+    moved = scene.copy()
+    cv2.circle(moved, (600, 440), 25, (255, 255, 255), -1)
+    assert detector.should_send(moved, now=0.1)
+    assert detector.last_difference >= detector.threshold
+
+def test_slow_drift_accumulates():
+    """Changes are measured against the last SENT frame, so gradual drift is eventually sent"""
+    detector = ChangeDetector(threshold=3.0, keepalive_fps=0)
+    scene = make_scene().astype(np.int16)
+    sent = [detector.should_send(np.clip(scene + step, 0, 255).astype(np.uint8), now=step)
+            for step in range(12)]
+    assert sent[0]
+    assert any(sent[1:])
+    assert not all(sent[1:])
+
+def test_keepalive_rate():
+    """An unchanged scene is still sent at the keepalive rate"""
+    detector = ChangeDetector(keepalive_fps=2.0)
+    scene = make_scene()
+    sent = [now for now in np.arange(0, 3.0, 0.1) if detector.should_send(scene, now=now)]
+    assert len(sent) == 6  # t=0 plus one every 0.5 s
+    assert detector.keepalives == 5
+
+def test_reference_moves_only_when_sent():
+    """A changed frame dropped after check() (too old to send) doesn't hide the change from the next frame"""
+    detector = ChangeDetector(keepalive_fps=0)
+    scene = make_scene()
+    detector.should_send(scene, now=0.0)
+    moved = scene.copy()
+    cv2.circle(moved, (600, 440), 25, (255, 255, 255), -1)
+
+    assert detector.check(moved, now=0.1) is not None  # Encoded, then dropped by the pipeline
+    candidate = detector.check(moved, now=0.2)
+    assert candidate is not None
+    detector.sent(candidate)
+    assert detector.check(moved, now=0.3) is None
+
+    stale = detector.check(scene, now=0.4)
+    detector.reset()
+    detector.sent(stale)  # Checked before the reset: must not become the reference
+    assert detector.check(moved, now=0.5) is not None
+
+def test_reset_and_size_change_force_send():
+    detector = ChangeDetector(keepalive_fps=0)
+    scene = make_scene()
+    detector.should_send(scene, now=0.0)
+    assert not detector.should_send(scene, now=0.1)
+
+    detector.reset()
+    assert detector.should_send(scene, now=0.2)
+    # Grayscale or a new preview demand changes the frame shape
+    assert detector.should_send(cv2.resize(scene, (320, 240)), now=0.3)
+    assert detector.should_send(cv2.cvtColor(scene, cv2.COLOR_RGB2GRAY), now=0.4)
+
+def test_grayscale_toggle_is_detected():
+    """Grayscale output (still 3 channels) differs from the colour frame"""
+    detector = ChangeDetector(keepalive_fps=0)
+    scene = make_scene()
+    detector.should_send(scene, now=0.0)
+    gray = cv2.cvtColor(cv2.cvtColor(scene, cv2.COLOR_RGB2GRAY), cv2.COLOR_GRAY2RGB)
+    assert detector.should_send(gray, now=0.1)
+
+def test_block_difference_identical():
+    thumb = frame_thumbnail(make_scene())
+    assert block_difference(thumb, thumb) == 0.0
+
+def test_static_scene_cpu_benchmark():
+    """Benchmark CPU per frame on a static scene: encode every frame vs change detection"""
+    scene = make_scene()
+    frames = [noisy(scene, i) for i in range(30)]
+
+    def encode(frame):
+        success, encoded = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 70])
+        return encoded.tobytes()
+
+    start_cpu = time.process_time()
+    for frame in frames:
+        encode(frame)
+    always_ms = (time.process_time() - start_cpu) / len(frames) * 1000
+
+    detector = ChangeDetector(keepalive_fps=1.0)
+    start_cpu = time.process_time()
+    for i, frame in enumerate(frames):
+        if detector.should_send(frame, now=i / 30):
+            encode(frame)
+    detect_ms = (time.process_time() - start_cpu) / len(frames) * 1000
+
+    print(f"Encode every frame: {always_ms:.2f}ms CPU/frame")
+    print(f"Change detection:   {detect_ms:.2f}ms CPU/frame, {detector.format_stats()}")
+    assert detector.saved_percent() > 90
+    assert detect_ms < always_ms
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
@@ -0,0 +1,101 @@
+import numpy as np
+import pytest
+import time
+import sys
+import os
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from shared.clock_sync import (
+    ClockEstimator,
+    ClockSyncClient,
+    ClockSyncResponder,
+    exchange_offset,
+    format_estimate
+)
+
+def simulate(estimator, offset, drift=0.0, rounds=60, interval=1.0, seed=0, start=1_700_000_000.0):
+    """Feed exchanges with a device whose clock runs offset + drift*t ahead, over a jittery link"""
+    rng = np.random.default_rng(seed)
+    for i in range(rounds):
+        t1 = start + i * interval
+        outbound = 0.0004 + rng.exponential(0.002)  # Occasional queueing delay
+        inbound = 0.0004 + rng.exponential(0.002)
+        device_clock = lambda t: t + offset + drift * (t - start)
+        t2 = device_clock(t1 + outbound)
+        t3 = t2 + 0.0001
+        t4 = t1 + outbound + 0.0001 + inbound
+        estimator.add(t1, t2, t3, t4)
+    return start + rounds * interval
+
+def test_exchange_offset_symmetric_link():
+    offset, delay = exchange_offset(100.0, 100.5 + 0.001, 100.5 + 0.0011, 100.0021)
+    assert offset == pytest.approx(0.5, abs=1e-9)
+    assert delay == pytest.approx(0.002, abs=1e-9)
+
+def test_estimator_recovers_offset_despite_jitter():
+    estimator = ClockEstimator()
+    now = simulate(estimator, offset=-0.0375)
+    estimate = estimator.estimate(now)
+    assert estimate['offset'] == pytest.approx(-0.0375, abs=0.0005)
+    assert estimate['delay'] < 0.002
+
+def test_estimator_tracks_drift():
+    """A 50 ppm oscillator difference shows up as drift and is extrapolated forward"""
+    estimator = ClockEstimator()
+    now = simulate(estimator, offset=0.010, drift=50e-6, rounds=64)
+    estimate = estimator.estimate(now)
+    assert estimate['drift_ppm'] == pytest.approx(50, abs=15)
+    assert estimate['offset'] == pytest.approx(0.010 + 50e-6 * 64, abs=0.0005)
+    assert "drift +" in format_estimate(estimate)
+
+def test_clock_step_restarts_the_window():
+    """A 500 ms SET_TIME step is followed at once, not averaged in with a minute of old exchanges"""
+    estimator = ClockEstimator()
+    resumed = simulate(estimator, offset=0.010, rounds=60)
+    now = simulate(estimator, offset=0.510, rounds=10, seed=1, start=resumed)
+    estimate = estimator.estimate(now)
+    assert estimate['offset'] == pytest.approx(0.510, abs=0.001)
+    assert abs(estimate['drift_ppm']) < 100
+    assert estimate['steps'] == 1 and estimate['samples'] == 10
+
+def test_client_reset_forgets_exchanges():
+    client = ClockSyncClient({'rep1': ("127.0.0.1", 9), 'rep2': ("127.0.0.1", 10)})
+    for device in ('rep1', 'rep2'):
+        simulate(client.estimators[device], offset=0.1, rounds=5)
+    client.reset('rep1')
+    assert client.estimate('rep1') is None
+    assert client.estimate('rep2')['samples'] == 5
+    client.reset()
+    assert client.estimate('rep2') is None
+
+def test_no_samples_means_no_estimate():
+    assert ClockEstimator().estimate() is None
+    assert format_estimate(None) == "no reply"
+
+def test_client_measures_responder_offset_over_udp():
+    """Loopback exchange against a responder whose clock is 250 ms ahead"""
+    responder = ClockSyncResponder(0, clock=lambda: time.time() + 0.25)
+    responder.start()
+    client = ClockSyncClient({'rep1': ("127.0.0.1", responder.port)}, interval=0.05)
+    client.start()
+    try:
+        deadline = time.time() + 3.0
+        while time.time() < deadline:
+            estimate = client.estimate('rep1')
+            if estimate and estimate['samples'] >= 5:
+                break
+            time.sleep(0.05)
+    finally:
+        client.stop()
+        responder.stop()
+
+    print(f"Loopback estimate: {format_estimate(estimate)} from {estimate['samples']} exchanges")
+    assert estimate['offset'] == pytest.approx(0.25, abs=0.005)
+    master_time = time.time()
+    assert client.to_master_time('rep1', client.to_device_time('rep1', master_time)) == pytest.approx(master_time, abs=1e-3)
+    assert client.offset('unknown') == 0.0
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
@@ -0,0 +1,120 @@
+import pytest
+import time
+import sys
+import os
+import socket
+import threading
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from shared.control_group import (ControlGroupReceiver, ControlGroupSender, format_ack, format_group_command,
+                                  parse_ack, parse_group_command)
+
+TEST_GROUP_PORT = 5096  # Not the rig's control group port
+
+def test_group_command_round_trip():
+    data = format_group_command("7", {"*": "START_STREAM", "rep3": "CAPTURE_AT_1_2.000000"})
+    assert parse_group_command(data, "rep3") == ("7", "CAPTURE_AT_1_2.000000")
+    assert parse_group_command(data, "rep1") == ("7", "START_STREAM")
+    assert parse_group_command(format_group_command("8", {"rep2": "STOP_STREAM"}), "rep1") is None
+    assert parse_group_command(b"START_STREAM", "rep1") is None
+
+def test_ack_round_trip():
+    assert parse_ack(format_ack("7", "rep8")) == ("7", "rep8")
+    assert parse_ack(b"HEARTBEAT") is None
+
+def bound_udp_socket():
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(("127.0.0.1", 0))
+    return sock
+
+def test_receiver_acks_from_control_socket_and_drops_repeats():
+    """Group datagrams are answered from the control port; a repeated sequence runs once"""
+    control = bound_udp_socket()
+    group = bound_udp_socket()      # Stands in for the multicast membership
+    master = bound_udp_socket()
+    receiver = ControlGroupReceiver("rep2")
+    receiver.sock = group
+    datagram = format_group_command("41", {"*": "START_STREAM"})
+    master.sendto(datagram, group.getsockname())
+    master.sendto(datagram, group.getsockname())
+
+    control.settimeout(1.0)
+    assert receiver.receive(control)[0] == "START_STREAM"
+    master.sendto(b"CAPTURE_STILL", control.getsockname())
+    assert receiver.receive(control)[0] == "CAPTURE_STILL"
+    control.settimeout(0.05)
+    with pytest.raises(socket.timeout):
+        receiver.receive(control)  # The repeat is acknowledged but not run again
+
+    master.settimeout(1.0)
+    for _ in range(2):
+        data, addr = master.recvfrom(256)
+        assert parse_ack(data) == ("41", "rep2")
+        assert addr == control.getsockname()
+    for sock in (control, group, master):
+        sock.close()
+
+def test_sender_reports_missing_acks():
+    sender = ControlGroupSender(ack_timeout=0.1)
+    seq = sender.send({"*": "STOP_STREAM"})
+    ack = bound_udp_socket()
+    ack.sendto(format_ack(seq, "rep1"), ("127.0.0.1", sender.sock.getsockname()[1]))
+    assert sender.wait_acks(seq, ["rep1", "rep2"]) == ["rep2"]
+    assert "rep1" in sender.acks(seq)
+    assert sender.fallbacks == 1
+    ack.close()
+    sender.close()
+
+def test_fanout_benchmark():
+    """Benchmark: 8 cameras - thread + socket per command vs one datagram acknowledged by all"""
+    cameras = [f"rep{i}" for i in range(1, 9)]
+    controls = {name: bound_udp_socket() for name in cameras}
+    received = []
+
+    start = time.time()
+    threads = []
+    for name, control in controls.items():
+        def send(address=control.getsockname()):
+            with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+                sock.sendto(b"CAPTURE_STILL", address)
+        for _ in range(2):  # capture_all_stills thread, then send_command's own thread
+            thread = threading.Thread(target=send)
+            thread.start()
+            threads.append(thread)
+    for thread in threads:
+        thread.join()
+    for control in controls.values():
+        control.settimeout(1.0)
+        received.append(control.recvfrom(64)[0])
+        received.append(control.recvfrom(64)[0])
+    unicast = time.time() - start
+
+    # Every receiver joins the same group on this host (multicast loopback)
+    receivers = []
+    for name, control in controls.items():
+        receiver = ControlGroupReceiver(name, port=TEST_GROUP_PORT)
+        if not receiver.open():
+            pytest.skip("multicast not available here")
+        control.settimeout(1.0)
+        threading.Thread(target=receiver.receive, args=(control,), daemon=True).start()
+        receivers.append(receiver)
+    sender = ControlGroupSender(port=TEST_GROUP_PORT, ack_timeout=1.0)
+    start = time.time()
+    seq = sender.send({"*": "CAPTURE_STILL"})
+    missing = sender.wait_acks(seq, cameras)
+    group = time.time() - start
+
+    print(f"8 cameras: 16 threads/sockets {unicast * 1000:.1f}ms to deliver, "
+          f"one datagram {group * 1000:.1f}ms to deliver and collect 8 acks")
+    assert len(received) == 16
+    assert missing == []
+    sender.close()
+    for receiver in receivers:
+        receiver.close()
+    for control in controls.values():
+        control.close()
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
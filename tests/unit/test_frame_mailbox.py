@@ -0,0 +1,103 @@
+import numpy as np
+import pytest
+import cv2
+import io
+import time
+import sys
+import os
+import threading
+from PIL import Image
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from shared.frame_mailbox import FrameMailbox, MailboxWorkers
+
+def test_mailbox_latest_wins():
+    mailbox = FrameMailbox()
+    for frame in (b"1", b"2", b"3"):
+        mailbox.put(frame)
+    assert mailbox.take(timeout=0) == b"3"
+    assert mailbox.replaced == 2
+    assert mailbox.take(timeout=0.01) is None
+
+def test_mailbox_take_wakes_on_put():
+    mailbox = FrameMailbox()
+    threading.Timer(0.05, mailbox.put, args=(b"frame",)).start()
+    start = time.time()
+    assert mailbox.take(timeout=2.0) == b"frame"
+    assert time.time() - start < 1.0
+
+def test_workers_run_per_key_and_coalesce():
+    handled = {}
+    def handle(key, item):
+        time.sleep(0.05)
+        handled.setdefault(key, []).append(item)
+    workers = MailboxWorkers(handle)
+    for i in range(5):
+        workers.submit("slow", i)
+    workers.submit("fast", "only")
+    time.sleep(0.3)
+    workers.stop()
+    assert handled["fast"] == ["only"]
+    assert handled["slow"][-1] == 4  # The newest always gets handled
+    assert len(handled["slow"]) + workers.replaced("slow") == 5
+
+def test_worker_survives_handler_errors():
+    results = []
+    def handle(key, item):
+        if item == "bad":
+            raise ValueError("corrupt frame")
+        results.append(item)
+    workers = MailboxWorkers(handle)
+    workers.submit("cam", "bad")
+    time.sleep(0.05)
+    workers.submit("cam", "good")
+    time.sleep(0.1)
+    workers.stop()
+    assert results == ["good"]
+
+def test_receive_loop_benchmark():
+    """Benchmark: 8 cameras, one slow decoder - decode inline on the receive thread vs per-camera workers"""
+    frame = cv2.GaussianBlur(np.random.default_rng(0).integers(0, 256, (480, 640, 3), dtype=np.uint8), (0, 0), 4)
+    data = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 80])[1].tobytes()
+    cameras = [f"192.168.0.{200 + i}" for i in range(1, 9)]
+
+    def decode(ip, payload):
+        image = Image.open(io.BytesIO(payload))
+        image.draft("RGB", (320, 240))
+        image.convert("RGB")
+        if ip == cameras[0]:
+            time.sleep(0.02)  # One camera's decode stalls (large frame, busy core)
+
+    rounds = 20
+    start = time.perf_counter()
+    worst_inline = 0.0
+    for _ in range(rounds):
+        for ip in cameras:
+            read = time.perf_counter()
+            decode(ip, data)
+            worst_inline = max(worst_inline, time.perf_counter() - read)
+    inline = time.perf_counter() - start
+
+    workers = MailboxWorkers(decode)
+    start = time.perf_counter()
+    worst_dispatch = 0.0
+    for _ in range(rounds):
+        for ip in cameras:
+            read = time.perf_counter()
+            workers.submit(ip, data)
+            worst_dispatch = max(worst_dispatch, time.perf_counter() - read)
+        time.sleep(0.005)  # Frames arrive over time, not in one burst
+    dispatched = time.perf_counter() - start
+    time.sleep(0.1)
+    workers.stop()
+
+    replaced = sum(workers.replaced(ip) for ip in cameras)
+    print(f"{rounds * len(cameras)} frames: inline {inline * 1000:.0f}ms, worst receive gap "
+          f"{worst_inline * 1000:.1f}ms; workers {dispatched * 1000:.0f}ms, worst receive gap "
+          f"{worst_dispatch * 1000:.2f}ms, {replaced} frames superseded before decode")
+    assert worst_dispatch < worst_inline
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
@@ -0,0 +1,159 @@
+import numpy as np
+import pytest
+import cv2
+import io
+import time
+import sys
+import os
+from PIL import Image
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from shared.preview_codecs import (
+    CODECS,
+    JpegCodec,
+    WebpCodec,
+    create_preview_codec,
+    sniff_codec
+)
+from shared.rate_control import JpegRateController
+from shared.transforms import TransformPlan, DEFAULT_SETTINGS
+
+def make_scene(size=(480, 640)):
+    """Smooth color scene with some edges, like a specimen on a bench"""
+    rng = np.random.default_rng(0)
+    image = rng.integers(0, 256, size + (3,), dtype=np.uint8)
+    image = cv2.GaussianBlur(image, (0, 0), 4)
+    cv2.putText(image, "GERTIE", (size[1] // 10, size[0] // 2), cv2.FONT_HERSHEY_SIMPLEX,
+                size[1] / 200, (255, 255, 255), 3)
+    return image
+
+def decode(data):
+    """What the master does with a preview frame"""
+    return np.asarray(Image.open(io.BytesIO(data)).convert("RGB"))
+
+def decode_for_tile(data, size):
+    """What the master does with a preview frame for a tile of this size (DCT-scaled decode)"""
+    image = Image.open(io.BytesIO(data))
+    image.draft("RGB", size)
+    image = image.convert("RGB")
+    return image if image.size == size else image.resize(size, Image.Resampling.BILINEAR)
+
+def decode_full_then_resize(data, size):
+    """The master's decode path before reduced-scale decoding"""
+    return Image.open(io.BytesIO(data)).convert("RGB").resize(size, Image.Resampling.BILINEAR)
+
+@pytest.mark.parametrize("codec", [JpegCodec(), JpegCodec('444'), WebpCodec()])
+def test_codecs_round_trip_through_master_decoder(codec):
+    """Every codec's output is sniffed correctly and decodes to the same picture"""
+    frame = make_scene()
+    data = codec.encode(frame, 80)
+    assert sniff_codec(data) == codec.wire_codec
+
+    # cv2 encodes the array as-is and PIL reads it back in the same channel order
+    decoded = decode(data)
+    assert decoded.shape == frame.shape
+    assert np.abs(decoded.astype(int) - frame[:, :, ::-1]).mean() < 6
+
+@pytest.mark.parametrize("codec", [JpegCodec(), WebpCodec()])
+def test_single_channel_gray_encodes(codec):
+    """Grayscale frames are encoded as one channel and still display as RGB"""
+    gray = cv2.cvtColor(make_scene(), cv2.COLOR_RGB2GRAY)
+    data = codec.encode(gray, 80)
+    decoded = decode(data)
+    assert decoded.shape == gray.shape + (3,)
+    assert np.abs(decoded[:, :, 0].astype(int) - gray).mean() < 4
+
+def test_single_channel_gray_is_smaller():
+    """A true grayscale JPEG is smaller than gray replicated into three channels"""
+    gray = cv2.cvtColor(make_scene(), cv2.COLOR_RGB2GRAY)
+    codec = JpegCodec()
+    one_channel = codec.encode(gray, 80)
+    three_channels = codec.encode(cv2.cvtColor(gray, cv2.COLOR_GRAY2RGB), 80)
+    assert len(one_channel) < len(three_channels)
+
+def test_plan_single_channel_gray_output():
+    """'RGB_OR_GRAY' plans output (H, W) for grayscale and RGB otherwise"""
+    image = make_scene()
+    settings = DEFAULT_SETTINGS.copy()
+    assert TransformPlan(settings, image.shape, 'RGB_OR_GRAY').apply(image).shape == image.shape
+
+    settings['grayscale'] = True
+    gray = TransformPlan(settings, image.shape, 'RGB_OR_GRAY').apply(image, reuse_buffers=True)
+    assert gray.shape == image.shape[:2]
+    rgb = TransformPlan(settings, image.shape, 'RGB').apply(image)
+    np.testing.assert_array_equal(rgb[:, :, 0], gray)
+
+def test_unknown_or_missing_codec_falls_back_to_jpeg():
+    assert isinstance(create_preview_codec('h265'), JpegCodec)
+    codec = create_preview_codec('turbojpeg', '422')
+    assert codec.wire_codec == 'jpeg'
+    assert sniff_codec(codec.encode(make_scene((240, 320)), 50)) == 'jpeg'
+
+def test_sniff_codec_rejects_garbage():
+    assert sniff_codec(b"GV\x01") is None
+    assert sniff_codec(b"") is None
+
+def test_rate_controller_uses_codec():
+    """The rate controller can drive any codec and still converge on the budget"""
+    controller = JpegRateController(6000, min_quality=5, max_quality=95, codec=WebpCodec())
+    sizes = [len(controller.encode(make_scene())) for _ in range(8)]
+    assert sniff_codec(controller.encode(make_scene())) == 'webp'
+    assert abs(sizes[-1] - 6000) / 6000 < 0.3, sizes
+
+def test_codec_benchmark():
+    """Benchmark encode µs/frame and bytes/frame per codec at the preview resolutions"""
+    codecs = []
+    for name in CODECS:
+        for subsampling in ('420', '444'):
+            codec = create_preview_codec(name, subsampling)
+            if codec.name == name and codec.describe() not in [c.describe() for c in codecs]:
+                codecs.append(codec)
+
+    for size in ((240, 320), (480, 640)):
+        frame = make_scene(size)
+        gray = cv2.cvtColor(frame, cv2.COLOR_RGB2GRAY)
+        gray_rgb = cv2.cvtColor(gray, cv2.COLOR_GRAY2RGB)
+        for label, image in (("color", frame), ("gray x3", gray_rgb), ("gray x1", gray)):
+            for codec in codecs:
+                repeats = 20
+                start_time = time.perf_counter()
+                for _ in range(repeats):
+                    data = codec.encode(image, 60)
+                us = (time.perf_counter() - start_time) / repeats * 1e6
+                print(f"{size[1]}x{size[0]} {label:8s} {codec.describe():14s} "
+                      f"{us:8.0f} µs/frame {len(data):7d} bytes/frame")
+                assert len(data) > 0
+
+@pytest.mark.parametrize("tile", [(320, 240), (160, 120), (960, 720)])
+def test_reduced_decode_matches_full_decode(tile):
+    """Decoding at DCT scale gives the tile size and the same picture as decode + resize"""
+    data = JpegCodec().encode(make_scene(), 80)
+    reduced = decode_for_tile(data, tile)
+    assert reduced.size == tile
+    difference = np.abs(np.asarray(reduced).astype(int) - np.asarray(decode_full_then_resize(data, tile)))
+    assert difference.mean() < 4
+
+def test_reduced_decode_keeps_gray_frames_rgb():
+    gray = cv2.cvtColor(make_scene(), cv2.COLOR_RGB2GRAY)
+    reduced = decode_for_tile(JpegCodec().encode(gray, 80), (320, 240))
+    assert reduced.mode == "RGB" and reduced.size == (320, 240)
+
+def test_reduced_decode_benchmark():
+    """Benchmark: 8 cameras' 640x480 frames into 320x240 grid tiles, full decode + resize vs DCT-scaled"""
+    data = JpegCodec().encode(make_scene(), 80)
+    results = {}
+    for label, path in (("full + resize", decode_full_then_resize), ("draft", decode_for_tile)):
+        repeats = 80
+        start_time = time.perf_counter()
+        for _ in range(repeats):
+            path(data, (320, 240))
+        results[label] = (time.perf_counter() - start_time) / repeats * 1e6
+    for label, us in results.items():
+        print(f"640x480 -> 320x240 {label:14s} {us:8.0f} µs/frame, {us * 8 * 4 / 1e4:5.1f}% of a core "
+              f"for 8 cameras at 4 fps")
+    assert results["draft"] < results["full + resize"]
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
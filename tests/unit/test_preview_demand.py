@@ -0,0 +1,119 @@
+import numpy as np
+import pytest
+import time
+import sys
+import os
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from shared.preview_demand import (
+    PreviewDemand,
+    format_demand_command,
+    parse_demand_command,
+    frame_budget
+)
+from shared.video_pipeline import VideoPipeline
+from shared.camera_backend import SyntheticBackend
+from shared.rate_control import JpegRateController
+
+def test_command_round_trip():
+    command = format_demand_command(4, (320, 240))
+    assert command == "SET_PREVIEW_DEMAND_4_320x240"
+    assert parse_demand_command(command) == (4.0, (320, 240))
+    assert parse_demand_command(format_demand_command(0.5, (320, 240)))[0] == 0.5
+
+@pytest.mark.parametrize("command", [
+    "SET_PREVIEW_DEMAND_", "SET_PREVIEW_DEMAND_4", "SET_PREVIEW_DEMAND_x_320x240",
+    "SET_PREVIEW_DEMAND_0_320x240", "SET_PREVIEW_DEMAND_4_320", "SET_QUALITY_50",
+])
+def test_invalid_commands_rejected(command):
+    assert parse_demand_command(command) is None
+
+def test_apply_command_reports_changes():
+    demand = PreviewDemand()
+    assert demand.apply_command("SET_PREVIEW_DEMAND_4_320x240")
+    assert not demand.apply_command("SET_PREVIEW_DEMAND_4_320x240")
+    assert demand.apply_command("SET_PREVIEW_DEMAND_15_960x720")
+    assert demand.describe() == "15 fps, 960x720"
+    with pytest.raises(ValueError):
+        demand.apply_command("SET_PREVIEW_DEMAND_fast")
+
+def test_fit_shrinks_keeping_aspect():
+    """Frames shrink into the demanded box; never upscaled"""
+    frame = np.zeros((480, 640, 3), dtype=np.uint8)
+    assert PreviewDemand(4, (320, 240)).fit(frame).shape == (240, 320, 3)
+    assert PreviewDemand(15, (960, 720)).fit(frame) is frame
+    assert PreviewDemand().fit(frame) is frame
+
+    rotated = np.zeros((640, 480, 3), dtype=np.uint8)
+    assert PreviewDemand(4, (320, 240)).fit(rotated).shape == (240, 180, 3)
+
+def test_frame_budget_scales_with_pixels():
+    assert frame_budget(16000, np.zeros((480, 640, 3), dtype=np.uint8)) == 16000
+    assert frame_budget(16000, np.zeros((240, 320, 3), dtype=np.uint8)) == 4000
+
+def test_pace_holds_demanded_rate():
+    """Capture is released at the demanded rate, and a new demand applies mid-wait"""
+    demand = PreviewDemand(20, None)
+    start = time.perf_counter()
+    for _ in range(11):
+        demand.pace()
+    elapsed = time.perf_counter() - start
+    assert 0.45 < elapsed < 0.8
+
+    demand.set(2, None)
+    demand.pace()
+    demand.set(None, None)  # Back to native rate - must not wait out the 0.5 s interval
+    start = time.perf_counter()
+    assert demand.pace()
+    assert time.perf_counter() - start < 0.1
+
+def test_pace_aborts_when_stopped():
+    demand = PreviewDemand(1, None)
+    demand.pace()
+    start = time.perf_counter()
+    assert demand.pace(lambda: False) is False
+    assert time.perf_counter() - start < 0.2
+
+def run_preview(demand, duration=1.5):
+    """Slave preview path on a 30 fps synthetic camera; returns (frames, bytes, cpu seconds)"""
+    camera = SyntheticBackend()
+    camera.configure(camera.create_video_configuration(
+        main={"size": (640, 480), "format": "RGB888"}, controls={"FrameRate": 30}))
+    camera.start()
+    controller = JpegRateController(16000)
+    sent = []
+    pipeline = None
+
+    def capture():
+        if not demand.pace(pipeline.is_running):
+            return None
+        return camera.capture_array()
+
+    def encode(frame):
+        frame = demand.fit(frame)
+        controller.target_bytes = frame_budget(16000, frame)
+        return controller.encode(frame)
+
+    pipeline = VideoPipeline(capture, encode, lambda data, capture_time: sent.append(len(data)))
+    start_cpu = time.process_time()
+    pipeline.start()
+    time.sleep(duration)
+    pipeline.stop()
+    cpu = time.process_time() - start_cpu
+    camera.close()
+    return len(sent), sum(sent), cpu
+
+def test_grid_demand_benchmark():
+    """Benchmark native 640x480@30 vs the grid demand (4 fps, 320x240)"""
+    native_frames, native_bytes, native_cpu = run_preview(PreviewDemand())
+    grid_frames, grid_bytes, grid_cpu = run_preview(PreviewDemand(4, (320, 240)))
+
+    print(f"Native: {native_frames} frames, {native_bytes / 1.5 / 1024:.0f} KB/s, {native_cpu:.2f}s CPU")
+    print(f"Grid:   {grid_frames} frames, {grid_bytes / 1.5 / 1024:.0f} KB/s, {grid_cpu:.2f}s CPU")
+    assert 4 <= grid_frames <= 9
+    assert grid_bytes * 4 < native_bytes
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
@@ -0,0 +1,114 @@
+import numpy as np
+import pytest
+import cv2
+import time
+import sys
+import os
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from shared.rate_control import JpegRateController, frame_complexity, curve_log, quality_for_log
+
+def make_scene(detail, seed=0, size=(480, 640)):
+    """Textured test scene; lower detail = blurrier = smaller JPEGs"""
+    rng = np.random.default_rng(seed)
+    image = rng.integers(0, 256, size + (3,), dtype=np.uint8)
+    image = cv2.GaussianBlur(image, (0, 0), detail)
+    image = cv2.normalize(image, None, 0, 255, cv2.NORM_MINMAX)
+    cv2.putText(image, "GERTIE", (40, 300), cv2.FONT_HERSHEY_SIMPLEX, 3, (255, 255, 255), 5)
+    return image
+
+def scene_frames(detail, count, seed=0):
+    """A static scene with a bar moving across it"""
+    base = make_scene(detail, seed)
+    for i in range(count):
+        frame = base.copy()
+        x = (i * 16) % frame.shape[1]
+        frame[:, x:x + 20] = 255
+        yield frame
+
+def test_curve_inverse_round_trip():
+    for quality in (10, 35, 50, 72, 90):
+        assert quality_for_log(curve_log(quality)) == pytest.approx(quality, abs=0.5)
+
+def test_complexity_tracks_detail():
+    """Sharper scenes report higher complexity"""
+    assert frame_complexity(make_scene(1.5)) > frame_complexity(make_scene(12))
+
+def test_converges_to_target():
+    """Encoded size settles near the budget within a few frames"""
+    controller = JpegRateController(target_bytes=16000, min_quality=5, max_quality=95)
+    sizes = [len(controller.encode(frame)) for frame in scene_frames(6, 12)]
+    for size in sizes[4:]:
+        assert abs(size - 16000) / 16000 < 0.25, sizes
+
+def test_reconverges_after_scene_change():
+    """A jump in scene detail is followed within a few frames"""
+    controller = JpegRateController(target_bytes=16000, min_quality=5, max_quality=95)
+    for frame in scene_frames(12, 8):
+        controller.encode(frame)
+    quality_before = controller.last_quality
+
+    sizes = [len(controller.encode(frame)) for frame in scene_frames(3, 8, seed=1)]
+    assert controller.last_quality < quality_before
+    for size in sizes[3:]:
+        assert abs(size - 16000) / 16000 < 0.25, sizes
+
+def test_quality_respects_limits():
+    """Quality never leaves [min_quality, max_quality]"""
+    controller = JpegRateController(target_bytes=10**7, min_quality=20, max_quality=60)
+    for frame in scene_frames(6, 4):
+        controller.encode(frame)
+    assert controller.last_quality == 60
+
+    controller = JpegRateController(target_bytes=10, min_quality=20, max_quality=60)
+    for frame in scene_frames(6, 4):
+        controller.encode(frame)
+    assert controller.last_quality == 20
+
+def test_encodes_once_per_frame(monkeypatch):
+    """The controller never re-encodes a frame"""
+    calls = []
+    original = cv2.imencode
+
+    def counting_imencode(*args, **kwargs):
+        calls.append(1)
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(cv2, "imencode", counting_imencode)
+    controller = JpegRateController(target_bytes=16000)
+    for frame in scene_frames(3, 10):
+        controller.encode(frame)
+    assert len(calls) == 10
+
+def encode_twice(frame):
+    """Previous rep8 approach: quality 70, re-encode at 50 if over 60000 bytes"""
+    success, encoded = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 70])
+    data = encoded.tobytes()
+    if len(data) > 60000:
+        success, encoded = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 50])
+        data = encoded.tobytes()
+    return data
+
+def test_rate_control_cpu_benchmark():
+    """Benchmark CPU time per delivered frame: encode-twice vs rate controller"""
+    frames = list(scene_frames(1.0, 20)) + list(scene_frames(6, 20, seed=1))
+
+    start_cpu = time.process_time()
+    twice_sizes = [len(encode_twice(frame)) for frame in frames]
+    twice_ms = (time.process_time() - start_cpu) / len(frames) * 1000
+
+    controller = JpegRateController(target_bytes=60000, min_quality=20, max_quality=70)
+    start_cpu = time.process_time()
+    controlled_sizes = [len(controller.encode(frame)) for frame in frames]
+    controlled_ms = (time.process_time() - start_cpu) / len(frames) * 1000
+
+    print(f"Encode-twice: {twice_ms:.2f}ms CPU/frame, avg {np.mean(twice_sizes):.0f} bytes, "
+          f"max {max(twice_sizes)} bytes")
+    print(f"Rate control: {controlled_ms:.2f}ms CPU/frame, avg {np.mean(controlled_sizes):.0f} bytes, "
+          f"max {max(controlled_sizes)} bytes")
+    assert controlled_ms < twice_ms * 1.5
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
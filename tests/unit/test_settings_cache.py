@@ -0,0 +1,176 @@
+import numpy as np
+import pytest
+import json
+import time
+import sys
+import os
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from shared.settings_cache import SettingsCache, file_signature
+from shared import transforms
+from shared.transforms import (
+    apply_unified_transforms,
+    load_device_settings,
+    save_device_settings,
+    invalidate_device_settings,
+    DEFAULT_SETTINGS
+)
+
+def write_settings(path, settings):
+    """Write a settings file the same way the slaves do (temp file + rename)"""
+    temp_file = f"{path}.tmp"
+    with open(temp_file, 'w') as f:
+        json.dump(settings, f)
+    os.rename(temp_file, path)
+
+def test_cache_hit_returns_stored_settings(tmp_path):
+    """A fresh entry is served without touching the file"""
+    path = str(tmp_path / "cam_settings.json")
+    write_settings(path, DEFAULT_SETTINGS)
+
+    cache = SettingsCache(check_interval=60)
+    assert cache.get("cam") is None
+    cache.put("cam", path, DEFAULT_SETTINGS)
+
+    os.remove(path)  # Would force a reload if the file were checked
+    assert cache.get("cam") == DEFAULT_SETTINGS
+    assert cache.hits == 1
+    assert cache.misses == 1
+
+def test_cache_detects_rewritten_file(tmp_path):
+    """Replacing the file (new inode) invalidates the entry"""
+    path = str(tmp_path / "cam_settings.json")
+    write_settings(path, DEFAULT_SETTINGS)
+
+    cache = SettingsCache(check_interval=0)
+    cache.put("cam", path, DEFAULT_SETTINGS)
+    assert cache.get("cam") is not None
+
+    changed = DEFAULT_SETTINGS.copy()
+    changed['flip_horizontal'] = True
+    write_settings(path, changed)
+
+    assert cache.get("cam") is None
+    assert cache.reloads == 1
+
+def test_cache_detects_deleted_file(tmp_path):
+    """A missing file is treated as stale"""
+    path = str(tmp_path / "cam_settings.json")
+    write_settings(path, DEFAULT_SETTINGS)
+
+    cache = SettingsCache(check_interval=0)
+    cache.put("cam", path, DEFAULT_SETTINGS)
+    os.remove(path)
+    assert cache.get("cam") is None
+
+def test_cache_put_ignores_missing_file(tmp_path):
+    """Nothing is cached for a file that cannot be stat'ed"""
+    cache = SettingsCache()
+    cache.put("cam", str(tmp_path / "missing.json"), DEFAULT_SETTINGS)
+    assert cache.get("cam") is None
+
+def test_cache_invalidate(tmp_path):
+    """Explicit invalidation drops one or all devices"""
+    path = str(tmp_path / "cam_settings.json")
+    write_settings(path, DEFAULT_SETTINGS)
+
+    cache = SettingsCache(check_interval=60)
+    cache.put("a", path, DEFAULT_SETTINGS)
+    cache.put("b", path, DEFAULT_SETTINGS)
+
+    cache.invalidate("a")
+    assert cache.get("a") is None
+    assert cache.get("b") is not None
+
+    cache.invalidate()
+    assert cache.get("b") is None
+
+def test_file_signature_missing(tmp_path):
+    """file_signature() returns None instead of raising"""
+    assert file_signature(str(tmp_path / "nope.json")) is None
+
+def test_load_returns_independent_copies():
+    """Mutating a loaded dict must not leak into the cache"""
+    settings = load_device_settings("cache_copy_test")
+    settings['rotation'] = 270
+    assert load_device_settings("cache_copy_test")['rotation'] == DEFAULT_SETTINGS['rotation']
+
+def test_save_invalidates_cached_settings():
+    """Settings saved in-process are visible on the very next load"""
+    device = "cache_save_test"
+    load_device_settings(device)
+
+    updated = DEFAULT_SETTINGS.copy()
+    updated['flip_vertical'] = True
+    assert save_device_settings(device, updated)
+
+    try:
+        assert load_device_settings(device)['flip_vertical'] is True
+    finally:
+        save_device_settings(device, DEFAULT_SETTINGS.copy())
+
+def test_external_write_picked_up_after_invalidate():
+    """A write by another process is seen once the entry is invalidated"""
+    device = "cache_external_test"
+    load_device_settings(device)
+    settings_file = transforms._settings_cache._entries[device]['path']
+
+    updated = DEFAULT_SETTINGS.copy()
+    updated['grayscale'] = True
+    write_settings(settings_file, updated)
+
+    try:
+        invalidate_device_settings(device)
+        assert load_device_settings(device)['grayscale'] is True
+    finally:
+        save_device_settings(device, DEFAULT_SETTINGS.copy())
+
+def test_settings_lookup_overhead_benchmark():
+    """Benchmark per-frame settings lookup: disk read every frame vs cached"""
+    device = "cache_benchmark_device"
+    frames = 300  # 10 seconds of preview at 30 fps
+    load_device_settings(device)
+
+    # Before: every frame re-opens and re-parses the JSON file
+    start_time = time.perf_counter()
+    for _ in range(frames):
+        invalidate_device_settings(device)
+        load_device_settings(device)
+    uncached_us = (time.perf_counter() - start_time) / frames * 1e6
+
+    # After: every frame is served from memory
+    load_device_settings(device)
+    start_time = time.perf_counter()
+    for _ in range(frames):
+        load_device_settings(device)
+    cached_us = (time.perf_counter() - start_time) / frames * 1e6
+
+    print(f"Settings lookup per frame: uncached={uncached_us:.1f}us cached={cached_us:.1f}us "
+          f"({uncached_us / max(cached_us, 1e-3):.0f}x faster)")
+    assert cached_us < uncached_us
+
+def test_transform_with_cached_settings_benchmark():
+    """Benchmark full preview transform per frame with and without cached settings"""
+    device = "cache_transform_benchmark"
+    image = np.random.randint(0, 256, (480, 640, 3), dtype=np.uint8)
+    frames = 100
+    apply_unified_transforms(image, device)
+
+    start_time = time.perf_counter()
+    for _ in range(frames):
+        invalidate_device_settings(device)
+        apply_unified_transforms(image, device)
+    uncached_ms = (time.perf_counter() - start_time) / frames * 1e3
+
+    start_time = time.perf_counter()
+    for _ in range(frames):
+        apply_unified_transforms(image, device)
+    cached_ms = (time.perf_counter() - start_time) / frames * 1e3
+
+    print(f"Preview transform per frame: uncached={uncached_ms:.3f}ms cached={cached_ms:.3f}ms")
+    assert cached_ms < 100
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
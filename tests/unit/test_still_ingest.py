@@ -0,0 +1,127 @@
+import numpy as np
+import pytest
+import cv2
+import time
+import sys
+import os
+import socket
+import threading
+import zlib
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import shared.still_ingest as still_ingest
+from shared.still_ingest import StillIngestServer, format_upload
+from shared.still_protocol import StillWriter, build_header, send_still
+
+def start_server(tmp_path, **kwargs):
+    saved = []
+    def destination(ip, header):
+        name = (header or {}).get('device') or "legacy"
+        return str(tmp_path / f"{name}.jpg"), name
+    server = StillIngestServer(0, destination, saved.append, **kwargs)
+    server.start()
+    return server, saved
+
+def upload(port, data, device, **metadata):
+    with socket.create_connection(("127.0.0.1", port), timeout=10) as sock:
+        send_still(sock, data, device, **metadata)
+
+def wait_for(condition, timeout=10.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline and not condition():
+        time.sleep(0.01)
+    return condition()
+
+def test_concurrent_uploads_are_bounded_and_saved(tmp_path):
+    server, saved = start_server(tmp_path, max_uploads=2)
+    payloads = {f"rep{i}": os.urandom(1024 * 1024 + i) for i in range(1, 9)}
+    try:
+        threads = [threading.Thread(target=upload, args=(server.port, data, device), kwargs={'capture_id': "7"})
+                   for device, data in payloads.items()]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert wait_for(lambda: len(saved) == 8)
+    finally:
+        server.stop()
+
+    print(server.format_stats())
+    assert server.completed == 8 and server.failed == 0
+    assert server.peak_active <= 2
+    for upload_info in saved:
+        device = upload_info['context']
+        assert upload_info['header']['capture_id'] == "7"
+        with open(upload_info['path'], "rb") as f:
+            assert f.read() == payloads[device]
+    assert "MB/s" in format_upload(saved[0])
+
+def test_corrupted_upload_rejected(tmp_path):
+    server, saved = start_server(tmp_path)
+    data = os.urandom(300000)
+    try:
+        with socket.create_connection(("127.0.0.1", server.port), timeout=10) as sock:
+            sock.sendall(build_header(len(data), zlib.crc32(data) ^ 1, "rep4"))
+            sock.sendall(data)
+        assert wait_for(lambda: server.failed == 1)
+    finally:
+        server.stop()
+    assert saved == []
+    assert not os.path.exists(tmp_path / "rep4.jpg")
+    assert not os.path.exists(tmp_path / "rep4.jpg.part")
+
+def test_legacy_upload_accepted(tmp_path):
+    server, saved = start_server(tmp_path)
+    jpeg = cv2.imencode(".jpg", np.zeros((120, 160, 3), dtype=np.uint8))[1].tobytes()
+    try:
+        with socket.create_connection(("127.0.0.1", server.port), timeout=10) as sock:
+            sock.sendall(jpeg)
+        assert wait_for(lambda: len(saved) == 1)
+    finally:
+        server.stop()
+    assert saved[0]['header'] is None
+    with open(saved[0]['path'], "rb") as f:
+        assert f.read() == jpeg
+
+def test_slow_disk_applies_backpressure(tmp_path, monkeypatch):
+    """A disk slower than the network holds at most queue_chunks writes; the rest waits in TCP"""
+    class SlowWriter(StillWriter):
+        def write(self, chunk):
+            time.sleep(0.005)
+            super().write(chunk)
+    monkeypatch.setattr(still_ingest, "StillWriter", SlowWriter)
+    server, saved = start_server(tmp_path, queue_chunks=2, chunk_size=16 * 1024)
+    data = os.urandom(2 * 1024 * 1024)
+    try:
+        upload(server.port, data, "rep6")
+        assert wait_for(lambda: len(saved) == 1)
+    finally:
+        server.stop()
+    print(format_upload(saved[0]))
+    assert saved[0]['disk_wait'] > 0
+    with open(saved[0]['path'], "rb") as f:
+        assert f.read() == data
+
+def test_ingest_benchmark(tmp_path):
+    """Benchmark: eight cameras uploading 4 MB stills at once"""
+    server, saved = start_server(tmp_path)
+    payloads = {f"rep{i}": os.urandom(4 * 1024 * 1024) for i in range(1, 9)}
+    try:
+        start = time.time()
+        threads = [threading.Thread(target=upload, args=(server.port, data, device))
+                   for device, data in payloads.items()]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert wait_for(lambda: len(saved) == 8)
+        elapsed = time.time() - start
+    finally:
+        server.stop()
+    print(f"8 x 4MB uploads in {elapsed * 1000:.0f}ms ({32 / elapsed:.0f}MB/s aggregate); {server.format_stats()}")
+    assert server.completed == 8
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
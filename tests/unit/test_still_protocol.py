@@ -0,0 +1,240 @@
+import numpy as np
+import pytest
+import cv2
+import time
+import sys
+import os
+import socket
+import threading
+import tracemalloc
+import zlib
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from shared.capture_sync import capture_info_parts, embed_capture_info, read_capture_info
+from shared.still_protocol import (
+    StillTransferError,
+    build_header,
+    metadata_from_info,
+    read_header,
+    receive_to_file,
+    save_parts,
+    send_still,
+    send_still_file,
+    send_still_parts,
+    settings_hash,
+    still_metadata
+)
+
+def make_jpeg(width=640, height=480):
+    image = np.random.default_rng(0).integers(0, 255, (height, width, 3), dtype=np.uint8)
+    return cv2.imencode(".jpg", image)[1].tobytes()
+
+def send_in_thread(sender):
+    """Run sender(sock) on one end of a socketpair; returns the other end"""
+    ours, theirs = socket.socketpair()
+    def run():
+        try:
+            sender(theirs)
+        finally:
+            theirs.close()
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return ours, thread
+
+def test_framed_round_trip(tmp_path):
+    jpeg = embed_capture_info(make_jpeg(), {'device': 'rep3', 'capture_id': '42', 'sensor_time': 100.004,
+                                            'settings_hash': 'abcd1234'})
+    metadata = still_metadata(jpeg, 'rep1', {'crop_enabled': False})
+    assert metadata == {'device': 'rep3', 'capture_id': '42', 'sensor_time': 100.004, 'settings_hash': 'abcd1234'}
+
+    conn, thread = send_in_thread(lambda sock: send_still(sock, jpeg, **metadata))
+    header, initial = read_header(conn)
+    path = str(tmp_path / "still.jpg")
+    assert receive_to_file(conn, path, header, initial) == len(jpeg)
+    thread.join()
+    conn.close()
+
+    assert header['device'] == 'rep3' and header['capture_id'] == '42'
+    assert header['crc32'] == zlib.crc32(jpeg)
+    with open(path, "rb") as f:
+        assert f.read() == jpeg
+    assert not os.path.exists(path + ".part")
+
+def test_corrupted_upload_is_rejected(tmp_path):
+    jpeg = make_jpeg()
+    corrupted = bytearray(jpeg)
+    corrupted[1000] ^= 0xFF
+    def sender(sock):
+        sock.sendall(build_header(len(jpeg), zlib.crc32(jpeg), 'rep2'))
+        sock.sendall(corrupted)
+    conn, thread = send_in_thread(sender)
+    header, initial = read_header(conn)
+    path = str(tmp_path / "still.jpg")
+    with pytest.raises(StillTransferError, match="CRC"):
+        receive_to_file(conn, path, header, initial)
+    thread.join()
+    conn.close()
+    assert not os.path.exists(path) and not os.path.exists(path + ".part")
+
+def test_truncated_upload_is_rejected(tmp_path):
+    jpeg = make_jpeg()
+    def sender(sock):
+        sock.sendall(build_header(len(jpeg), zlib.crc32(jpeg), 'rep2'))
+        sock.sendall(jpeg[:len(jpeg) // 2])
+    conn, thread = send_in_thread(sender)
+    header, initial = read_header(conn)
+    with pytest.raises(StillTransferError, match="truncated"):
+        receive_to_file(conn, str(tmp_path / "still.jpg"), header, initial)
+    thread.join()
+    conn.close()
+
+def test_legacy_bare_jpeg_still_accepted(tmp_path):
+    jpeg = make_jpeg()
+    conn, thread = send_in_thread(lambda sock: sock.sendall(jpeg))
+    header, initial = read_header(conn)
+    assert header is None
+    path = str(tmp_path / "still.jpg")
+    assert receive_to_file(conn, path, header, initial) == len(jpeg)
+    thread.join()
+    conn.close()
+    with open(path, "rb") as f:
+        assert f.read() == jpeg
+
+def test_settings_hash_is_order_independent():
+    assert settings_hash({'a': 1, 'b': 2}) == settings_hash({'b': 2, 'a': 1})
+    assert settings_hash({'a': 1}) != settings_hash({'a': 2})
+    assert settings_hash({}) is None
+
+def test_receive_memory_is_flat_benchmark(tmp_path):
+    """Benchmark: 8 MB upload, old bytes-concatenation receiver vs streamed recv_into"""
+    payload = os.urandom(8 * 1024 * 1024)
+
+    def concatenating_receiver(conn):
+        data = b""
+        while True:
+            chunk = conn.recv(8192)
+            if not chunk:
+                break
+            data += chunk
+        return data
+
+    conn, thread = send_in_thread(lambda sock: sock.sendall(payload))
+    tracemalloc.start()
+    start = time.time()
+    data = concatenating_receiver(conn)
+    old_time = time.time() - start
+    old_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    thread.join()
+    conn.close()
+    assert data == payload
+
+    conn, thread = send_in_thread(lambda sock: send_still(sock, payload, 'rep1'))
+    tracemalloc.start()
+    start = time.time()
+    header, initial = read_header(conn)
+    receive_to_file(conn, str(tmp_path / "still.jpg"), header, initial)
+    new_time = time.time() - start
+    new_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    thread.join()
+    conn.close()
+
+    print(f"8MB upload: concatenation {old_time * 1000:.0f}ms peak {old_peak / 1e6:.1f}MB, "
+          f"streamed {new_time * 1000:.0f}ms peak {new_peak / 1e6:.2f}MB")
+    assert new_peak < 1024 * 1024
+    assert new_peak < old_peak
+
+def receive(conn, path):
+    header, initial = read_header(conn)
+    receive_to_file(conn, path, header, initial)
+    return header
+
+def test_parts_upload_matches_embedded_jpeg(tmp_path):
+    """Sending [SOI, COM, rest] straight from the encode buffer equals sending the joined JPEG"""
+    encoded = cv2.imencode(".jpg", np.full((480, 640, 3), 90, dtype=np.uint8))[1]
+    info = {'device': 'rep8', 'capture_id': '9', 'sensor_time': 50.0, 'settings_hash': None}
+    parts = capture_info_parts(encoded, info)
+    conn, thread = send_in_thread(lambda sock: send_still_parts(sock, parts, **metadata_from_info(info, 'rep8')))
+    path = str(tmp_path / "still.jpg")
+    header = receive(conn, path)
+    thread.join()
+    conn.close()
+    with open(path, "rb") as f:
+        data = f.read()
+    assert data == embed_capture_info(encoded.tobytes(), info)
+    assert read_capture_info(data) == info
+    assert header['capture_id'] == '9' and header['size'] == len(data)
+
+def test_sendfile_upload(tmp_path):
+    source = str(tmp_path / "source.jpg")
+    jpeg = embed_capture_info(make_jpeg(), {'device': 'rep2', 'capture_id': '11', 'sensor_time': 1.5})
+    with open(source, "wb") as f:
+        f.write(jpeg)
+    conn, thread = send_in_thread(lambda sock: send_still_file(sock, source, 'rep2'))
+    path = str(tmp_path / "received.jpg")
+    header = receive(conn, path)
+    thread.join()
+    conn.close()
+    assert header['capture_id'] == '11' and header['filename'] == "source.jpg"
+    with open(path, "rb") as f:
+        assert f.read() == jpeg
+
+def test_sendfile_upload_uses_crc_from_save(tmp_path):
+    """save_parts() checksums while writing; send_still_file() then doesn't read the file a second time"""
+    source = str(tmp_path / "source.jpg")
+    encoded = cv2.imencode(".jpg", np.zeros((48, 64, 3), dtype=np.uint8))[1]
+    parts = capture_info_parts(encoded, {'device': 'rep3', 'capture_id': '12', 'sensor_time': 2.5})
+    crc = save_parts(source, parts)
+    with open(source, "rb") as f:
+        assert crc == zlib.crc32(f.read())
+
+    conn, thread = send_in_thread(lambda sock: send_still_file(sock, source, 'rep3', crc32=crc ^ 1))
+    with pytest.raises(StillTransferError):
+        receive(conn, str(tmp_path / "received.jpg"))  # The passed CRC is the one in the header
+    thread.join()
+    conn.close()
+
+def test_upload_paths_benchmark(tmp_path):
+    """Benchmark capture-to-delivered time (encode, save/send, master has it on disk) for each upload path"""
+    image = np.random.default_rng(1).integers(0, 255, (1296, 2304, 3), dtype=np.uint8)
+    info = {'device': 'rep1', 'capture_id': '1', 'sensor_time': 1.0}
+    source = str(tmp_path / "source.jpg")
+
+    def legacy(sock):
+        # Old path: encode, write, read the file back into memory, send
+        data = embed_capture_info(cv2.imencode(".jpg", image)[1].tobytes(), info)
+        with open(source, "wb") as f:
+            f.write(data)
+        with open(source, "rb") as f:
+            data = f.read()
+        send_still(sock, data, **still_metadata(data, 'rep1'))
+
+    def sendfile(sock):
+        crc = save_parts(source, capture_info_parts(cv2.imencode(".jpg", image)[1], info))
+        send_still_file(sock, source, 'rep1', crc32=crc)
+
+    def memory(sock):
+        send_still_parts(sock, capture_info_parts(cv2.imencode(".jpg", image)[1], info),
+                         **metadata_from_info(info, 'rep1'))
+
+    results = {}
+    for name, sender in (("read+sendall", legacy), ("sendfile", sendfile), ("memoryview", memory)):
+        timings = []
+        for _ in range(3):
+            start = time.time()
+            conn, thread = send_in_thread(sender)
+            receive(conn, str(tmp_path / f"{name}.jpg"))
+            timings.append(time.time() - start)
+            thread.join()
+            conn.close()
+        results[name] = min(timings)
+    print("Capture-to-delivered (2304x1296): " +
+          ", ".join(f"{name} {seconds * 1000:.1f}ms" for name, seconds in results.items()))
+    with open(str(tmp_path / "memoryview.jpg"), "rb") as a, open(str(tmp_path / "read+sendall.jpg"), "rb") as b:
+        assert a.read() == b.read()
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
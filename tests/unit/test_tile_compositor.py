@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+import time
+import sys
+import os
+from PIL import Image
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from shared.tile_compositor import TileCompositor, fit_tile
+
+CAMERAS = [f"rep{i}" for i in range(1, 9)]
+
+def solid(color, size=(320, 240)):
+    return Image.new("RGB", size, color)
+
+def test_layout_rows_and_header():
+    compositor = TileCompositor((320, 240), columns=4, header=58, gap=6)
+    compositor.layout(CAMERAS)
+    assert compositor.size == (4 * 326, 2 * (240 + 58 + 6))
+    assert compositor.positions["rep1"] == (3, 61)
+    assert compositor.positions["rep6"] == (326 + 3, 304 + 61)
+
+def test_only_updated_tiles_are_handed_over():
+    compositor = TileCompositor((32, 24), columns=4)
+    compositor.layout(CAMERAS)
+    assert compositor.compose() == {}  # Nothing new: nothing to push to Tk
+    compositor.update("rep2", solid((255, 0, 0), (32, 24)))
+    compositor.update("rep2", solid((0, 255, 0), (32, 24)))  # Newest frame wins
+    assert compositor.update("rep9", solid((0, 0, 255), (32, 24))) is False  # Not laid out
+    tiles = compositor.compose()
+    assert list(tiles) == ["rep2"]
+    assert tiles["rep2"].getpixel((5, 5)) == (0, 255, 0)
+    assert compositor.compose() == {}  # Handed over once
+    assert compositor.blits == 1 and compositor.unchanged == 7
+    assert compositor.pixels == 32 * 24
+
+def test_tiles_fit_the_tile_size():
+    """Arrays and off-size frames come out as RGB images of exactly the tile size"""
+    assert fit_tile(np.full((72, 96, 3), 200, dtype=np.uint8), (96, 72)).getpixel((0, 0)) == (200, 200, 200)
+    assert fit_tile(solid((1, 2, 3), (640, 480)), (320, 240)).size == (320, 240)
+    assert fit_tile(Image.new("L", (32, 24), 9), (32, 24)).mode == "RGB"
+
+def test_exclusive_layout():
+    compositor = TileCompositor((32, 24), columns=4)
+    compositor.layout(["rep3"], tile_size=(96, 72), columns=1)
+    assert compositor.size == (96 + 6, 72 + 6)
+    compositor.update("rep3", np.full((72, 96, 3), 200, dtype=np.uint8))
+    assert compositor.compose()["rep3"].size == (96, 72)
+
+def test_composite_benchmark():
+    """Benchmark: pixels sent to Tk and compose time per tick, whole 8/16-camera canvas vs changed tiles only"""
+    for count in (8, 16):
+        cameras = [f"cam{i}" for i in range(count)]
+        compositor = TileCompositor((320, 240), columns=4, header=58)
+        compositor.layout(cameras)
+        tiles = [Image.fromarray(np.random.default_rng(i).integers(0, 256, (240, 320, 3), dtype=np.uint8))
+                 for i in range(count)]
+        whole_canvas = compositor.size[0] * compositor.size[1]
+        ticks = 20
+        results = {}
+        for label, changed in (("all tiles", count), ("2 changed", 2)):
+            pixels_before = compositor.pixels
+            start = time.perf_counter()
+            for tick in range(ticks):
+                for i in range(changed):
+                    compositor.update(cameras[(tick + i) % count], tiles[i])
+                compositor.compose()
+            results[label] = ((time.perf_counter() - start) / ticks * 1000,
+                              (compositor.pixels - pixels_before) / ticks)
+        print(f"{count} cameras, whole canvas {whole_canvas / 1e6:.2f}M px/tick; "
+              + ", ".join(f"{label}: {px / 1e6:.2f}M px/tick to Tk, compose {ms:.2f}ms"
+                          for label, (ms, px) in results.items()))
+        assert results["all tiles"][1] < whole_canvas  # Header strips and gaps never go to Tk
+        assert results["2 changed"][1] == 2 * 320 * 240
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
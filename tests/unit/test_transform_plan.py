@@ -0,0 +1,164 @@
+import numpy as np
+import pytest
+import cv2
+import time
+import sys
+import os
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from shared import transforms
+from shared.transforms import (
+    TransformPlan,
+    get_transform_plan,
+    invalidate_transform_plans,
+    apply_unified_transforms,
+    apply_unified_transforms_for_still,
+    DEFAULT_SETTINGS
+)
+
+def legacy_pipeline(image, settings, bgr=False):
+    """Step-by-step reference pipeline (copy, crop, rotate, flips, grayscale)"""
+    image = image.copy()
+    if bgr:
+        image = cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
+    if settings.get('crop_enabled', False):
+        image = transforms.apply_crop_rgb(image, settings)
+    rotation = settings.get('rotation', 0)
+    if rotation != 0:
+        image = transforms.apply_rotation_rgb(image, rotation)
+    if settings.get('flip_horizontal', False):
+        image = cv2.flip(image, 1)
+    if settings.get('flip_vertical', False):
+        image = cv2.flip(image, 0)
+    if settings.get('grayscale', False):
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY if bgr else cv2.COLOR_RGB2GRAY)
+        image = cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR if bgr else cv2.COLOR_GRAY2RGB)
+    return image
+
+def make_settings(**overrides):
+    settings = DEFAULT_SETTINGS.copy()
+    settings.update(overrides)
+    return settings
+
+def all_orientations():
+    for rotation in (0, 90, 180, 270):
+        for flip_h in (False, True):
+            for flip_v in (False, True):
+                yield rotation, flip_h, flip_v
+
+@pytest.mark.parametrize("rotation,flip_h,flip_v", list(all_orientations()))
+def test_plan_matches_legacy_orientation(rotation, flip_h, flip_v):
+    """Folding rotation + flips into one op gives identical pixels"""
+    image = np.random.randint(0, 256, (48, 64, 3), dtype=np.uint8)
+    settings = make_settings(rotation=rotation, flip_horizontal=flip_h, flip_vertical=flip_v)
+
+    plan = TransformPlan(settings, image.shape)
+    np.testing.assert_array_equal(plan.apply(image), legacy_pipeline(image, settings))
+    np.testing.assert_array_equal(plan.apply(image, reuse_buffers=True), legacy_pipeline(image, settings))
+
+@pytest.mark.parametrize("rotation,flip_h,flip_v", list(all_orientations()))
+def test_plan_matches_legacy_crop_grayscale_bgr(rotation, flip_h, flip_v):
+    """Crop + orientation + grayscale match for both preview (RGB) and still (BGR) output"""
+    image = np.random.randint(0, 256, (60, 80, 3), dtype=np.uint8)
+    settings = make_settings(rotation=rotation, flip_horizontal=flip_h, flip_vertical=flip_v,
+                             crop_enabled=True, crop_x=7, crop_y=5, crop_width=50, crop_height=30)
+
+    for grayscale in (False, True):
+        settings['grayscale'] = grayscale
+        for output_format, bgr in (('RGB', False), ('BGR', True)):
+            plan = TransformPlan(settings, image.shape, output_format)
+            np.testing.assert_array_equal(plan.apply(image, reuse_buffers=True),
+                                          legacy_pipeline(image, settings, bgr=bgr))
+
+def test_identity_plan_copies_unless_reusing():
+    """Default callers own their result; reuse callers get a zero-copy passthrough"""
+    image = np.random.randint(0, 256, (48, 64, 3), dtype=np.uint8)
+    plan = TransformPlan(make_settings(), image.shape)
+    assert plan.is_identity
+
+    result = plan.apply(image)
+    assert not np.shares_memory(result, image)
+    assert plan.apply(image, reuse_buffers=True) is image
+
+def test_crop_is_a_view_when_reusing():
+    """Crop-only plans do not copy pixels"""
+    image = np.random.randint(0, 256, (48, 64, 3), dtype=np.uint8)
+    settings = make_settings(crop_enabled=True, crop_x=4, crop_y=4, crop_width=20, crop_height=20)
+    result = TransformPlan(settings, image.shape).apply(image, reuse_buffers=True)
+    assert result.shape == (20, 20, 3)
+    assert np.shares_memory(result, image)
+
+def test_reused_buffers_are_stable():
+    """Consecutive frames are written into the same output array"""
+    image = np.random.randint(0, 256, (48, 64, 3), dtype=np.uint8)
+    plan = TransformPlan(make_settings(rotation=90, grayscale=True), image.shape)
+    first = plan.apply(image, reuse_buffers=True)
+    second = plan.apply(image, reuse_buffers=True)
+    assert first is second
+
+def test_invalid_rotation_is_ignored():
+    """Non-right-angle rotations are a no-op, as before"""
+    image = np.random.randint(0, 256, (48, 64, 3), dtype=np.uint8)
+    plan = TransformPlan(make_settings(rotation=45), image.shape)
+    np.testing.assert_array_equal(plan.apply(image), image)
+
+def test_bad_crop_values_skip_crop():
+    """Non-integer crop values leave the frame uncropped instead of failing"""
+    image = np.random.randint(0, 256, (48, 64, 3), dtype=np.uint8)
+    plan = TransformPlan(make_settings(crop_enabled=True, crop_x="not_integer"), image.shape)
+    assert plan.crop is None
+    assert plan.apply(image).shape == image.shape
+
+def test_plan_recompiled_on_settings_change():
+    """get_transform_plan() reuses a plan until its inputs change"""
+    shape = (48, 64, 3)
+    invalidate_transform_plans("plan_cache_test")
+    settings = make_settings()
+    plan = get_transform_plan("plan_cache_test", settings, shape)
+    assert get_transform_plan("plan_cache_test", dict(settings), shape) is plan
+
+    settings['flip_vertical'] = True
+    assert get_transform_plan("plan_cache_test", settings, shape) is not plan
+    assert get_transform_plan("plan_cache_test", settings, (96, 128, 3)).shape == (96, 128, 3)
+
+def test_public_functions_use_plan():
+    """apply_unified_transforms*() honour the same settings through the plan"""
+    image = np.random.randint(0, 256, (48, 64, 3), dtype=np.uint8)
+    settings = make_settings(rotation=270, flip_horizontal=True)
+    original_load = transforms.load_device_settings
+    transforms.load_device_settings = lambda device_name: settings
+    try:
+        np.testing.assert_array_equal(apply_unified_transforms(image, "plan_public_test"),
+                                      legacy_pipeline(image, settings))
+        np.testing.assert_array_equal(apply_unified_transforms_for_still(image, "plan_public_test"),
+                                      legacy_pipeline(image, settings, bgr=True))
+    finally:
+        transforms.load_device_settings = original_load
+
+def test_transform_plan_benchmark():
+    """Benchmark per-frame transforms: step-by-step pipeline vs compiled plan"""
+    image = np.random.randint(0, 256, (480, 640, 3), dtype=np.uint8)
+    settings = make_settings(rotation=90, flip_horizontal=True, flip_vertical=True,
+                             crop_enabled=True, crop_x=20, crop_y=20, crop_width=600, crop_height=440)
+    frames = 100
+
+    start_time = time.perf_counter()
+    for _ in range(frames):
+        legacy_pipeline(image, settings)
+    legacy_ms = (time.perf_counter() - start_time) / frames * 1e3
+
+    plan = TransformPlan(settings, image.shape)
+    plan.apply(image, reuse_buffers=True)
+    start_time = time.perf_counter()
+    for _ in range(frames):
+        plan.apply(image, reuse_buffers=True)
+    plan_ms = (time.perf_counter() - start_time) / frames * 1e3
+
+    print(f"Transform per frame (640x480, crop+rot90+flipH+flipV): "
+          f"legacy={legacy_ms:.3f}ms plan={plan_ms:.3f}ms")
+    assert plan_ms < 100
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
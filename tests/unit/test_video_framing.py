@@ -0,0 +1,176 @@
+import numpy as np
+import pytest
+import cv2
+import time
+import socket
+import random
+import sys
+import os
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from shared.video_framing import (
+    fragment_frame,
+    camera_id_from_name,
+    FrameSender,
+    FrameReassembler,
+    HEADER_SIZE
+)
+
+def make_jpeg(quality=90, size=(480, 640)):
+    image = np.random.randint(0, 256, size + (3,), dtype=np.uint8)
+    success, encoded = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return encoded.tobytes()
+
+def test_camera_id_from_name():
+    assert camera_id_from_name("rep1") == 1
+    assert camera_id_from_name("rep8") == 8
+    assert camera_id_from_name("unknown") == 0
+
+def test_fragments_reassemble_to_original():
+    """A frame larger than one datagram survives fragmentation intact"""
+    frame = make_jpeg()
+    assert len(frame) > 65000  # Would not fit the old single-datagram path
+    datagrams = fragment_frame(frame, 3, 1, 123.5, payload_size=1400)
+    assert all(len(d) <= 1400 + HEADER_SIZE for d in datagrams)
+
+    reassembler = FrameReassembler()
+    results = [reassembler.add("cam", bytes(d)) for d in datagrams]
+    assert all(r is None for r in results[:-1])
+    header, data = results[-1]
+    assert data == frame
+    assert header['camera_id'] == 3
+    assert header['capture_time'] == 123.5
+
+def test_out_of_order_fragments():
+    """Fragments may arrive in any order"""
+    frame = make_jpeg(quality=50)
+    datagrams = [bytes(d) for d in fragment_frame(frame, 1, 1, time.time(), payload_size=1000)]
+    random.Random(4).shuffle(datagrams)
+
+    reassembler = FrameReassembler()
+    results = [r for r in (reassembler.add("cam", d) for d in datagrams) if r is not None]
+    assert len(results) == 1
+    assert results[0][1] == frame
+
+def test_sequence_gap_counts_lost_frames():
+    """Frames that never complete are reported as lost per camera"""
+    reassembler = FrameReassembler()
+    for sequence in (1, 2, 5):
+        for d in fragment_frame(b"x" * 3000, 1, sequence, time.time(), payload_size=1000):
+            reassembler.add("cam", bytes(d))
+
+    stats = reassembler.stats("cam")
+    assert stats['frames'] == 3
+    assert stats['lost'] == 2
+    assert stats['loss_rate'] == pytest.approx(40.0)
+
+def test_latency_uses_sender_clock_offset():
+    """A sender whose clock runs 2 s ahead still reports the true latency"""
+    reassembler = FrameReassembler(clock_offset=lambda source: 2.0)
+    now = time.time()
+    for d in fragment_frame(b"x" * 3000, 1, 1, now + 2.0 - 0.030, payload_size=1000):
+        reassembler.add("cam", bytes(d), now=now)
+    assert reassembler.stats("cam")['latency_ms'] == pytest.approx(30.0, abs=0.5)
+
+def test_partial_frame_superseded_by_newer_frame():
+    """A frame missing a fragment is discarded once a newer one completes"""
+    reassembler = FrameReassembler()
+    first = fragment_frame(b"a" * 3000, 1, 1, time.time(), payload_size=1000)
+    second = fragment_frame(b"b" * 3000, 1, 2, time.time(), payload_size=1000)
+
+    reassembler.add("cam", bytes(first[0]))
+    completed = [reassembler.add("cam", bytes(d)) for d in second]
+    assert completed[-1][1] == b"b" * 3000
+
+    # The missing fragment of frame 1 arrives too late to be shown
+    assert reassembler.add("cam", bytes(first[1])) is None
+    assert reassembler.stats("cam")['late'] == 1
+
+def test_incomplete_frames_expire():
+    """Pending fragments are evicted after the reassembly timeout"""
+    reassembler = FrameReassembler(timeout=0.1)
+    datagrams = fragment_frame(b"z" * 3000, 1, 1, 0.0, payload_size=1000)
+    reassembler.add("cam", bytes(datagrams[0]), now=100.0)
+    reassembler.add("cam", bytes(fragment_frame(b"y", 1, 2, 0.0)[0]), now=100.5)
+    assert reassembler.stats("cam")['expired'] + reassembler.stats("cam")['lost'] >= 1
+    assert reassembler._sources["cam"]['pending'] == {}
+
+def test_duplicates_and_legacy_frames():
+    """Duplicate fragments are ignored; raw JPEG datagrams still work"""
+    reassembler = FrameReassembler()
+    datagrams = fragment_frame(b"q" * 2500, 1, 1, time.time(), payload_size=1000)
+    reassembler.add("cam", bytes(datagrams[0]))
+    assert reassembler.add("cam", bytes(datagrams[0])) is None
+    assert reassembler.stats("cam")['duplicates'] == 1
+
+    legacy = make_jpeg(quality=20, size=(48, 64))
+    header, data = reassembler.add("old", legacy)
+    assert header is None
+    assert data == legacy
+
+def test_stream_restart_resets_sequence():
+    """A slave restarting its stream (sequence back to 1) is not treated as late"""
+    reassembler = FrameReassembler()
+    reassembler.add("cam", bytes(fragment_frame(b"a", 1, 500, time.time())[0]))
+    result = reassembler.add("cam", bytes(fragment_frame(b"b", 1, 1, time.time())[0]))
+    assert result is not None
+    assert reassembler.stats("cam")['restarts'] == 1
+
+def test_restart_with_new_stream_id_delivers_first_frame():
+    """A new FrameSender (START_STREAM / settings restart) is shown from its first frame, not after catching up"""
+    reassembler = FrameReassembler()
+    for sequence in range(1, 41):
+        for d in fragment_frame(b"a" * 3000, 1, sequence, time.time(), payload_size=1000, stream_id=7):
+            reassembler.add("cam", bytes(d))
+    straggler = bytes(fragment_frame(b"a" * 3000, 1, 40, time.time(), payload_size=1000, stream_id=7)[0])
+
+    results = [reassembler.add("cam", bytes(d))
+               for d in fragment_frame(b"b" * 3000, 1, 1, time.time(), payload_size=1000, stream_id=8)]
+    assert results[-1] is not None and results[-1][0]['sequence'] == 1
+    assert reassembler.add("cam", straggler) is None  # The old stream doesn't take over again
+    stats = reassembler.stats("cam")
+    assert stats['restarts'] == 1 and stats['late'] == 1 and stats['lost'] == 0
+
+def test_sender_over_udp():
+    """FrameSender output reassembles on a real socket"""
+    receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    receiver.bind(("127.0.0.1", 0))
+    receiver.settimeout(2.0)
+    sender_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    frame = make_jpeg(quality=30)
+    sender = FrameSender(sender_sock, receiver.getsockname(), camera_id_from_name("rep2"))
+    count = sender.send(frame)
+
+    reassembler = FrameReassembler()
+    result = None
+    for _ in range(count):
+        data, addr = receiver.recvfrom(65536)
+        result = reassembler.add(addr[0], data) or result
+    receiver.close()
+    sender_sock.close()
+
+    assert result[1] == frame
+    assert result[0]['sequence'] == 1
+
+def test_framing_overhead_benchmark():
+    """Benchmark fragment + reassemble cost per 640x480 preview frame"""
+    frame = make_jpeg(quality=70)
+    frames = 200
+    reassembler = FrameReassembler()
+
+    start_time = time.perf_counter()
+    for sequence in range(1, frames + 1):
+        for d in fragment_frame(frame, 1, sequence, time.time()):
+            reassembler.add("cam", d)
+    per_frame_ms = (time.perf_counter() - start_time) / frames * 1000
+
+    print(f"Framing {len(frame)} byte frame: {per_frame_ms:.3f}ms per frame "
+          f"({len(fragment_frame(frame, 1, 1, 0.0))} datagrams)")
+    assert reassembler.stats("cam")['frames'] == frames
+    assert per_frame_ms < 50
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
@@ -0,0 +1,215 @@
+import numpy as np
+import pytest
+import cv2
+import time
+import threading
+import sys
+import os
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from shared.video_pipeline import LatestSlot, StageTimer, VideoPipeline
+from shared.camera_backend import SyntheticBackend
+from shared.transforms import TransformPlan, DEFAULT_SETTINGS
+
+def collect(sent):
+    """send_fn that records the payloads it is given"""
+    return lambda data, capture_time: sent.append(data)
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.005)
+    return False
+
+def test_latest_slot_keeps_newest_item():
+    """An unread item is replaced (and counted as dropped) by a newer one"""
+    slot = LatestSlot()
+    slot.put(1)
+    slot.put(2)
+    assert slot.get(timeout=0) == 2
+    assert slot.dropped == 1
+    assert slot.get(timeout=0) is None
+
+def test_latest_slot_close_wakes_reader():
+    """close() releases a blocked get()"""
+    slot = LatestSlot()
+    result = []
+    reader = threading.Thread(target=lambda: result.append(slot.get(timeout=5)))
+    reader.start()
+    slot.close()
+    reader.join(1.0)
+    assert not reader.is_alive()
+    assert result == [None]
+
+def test_stage_timer_stats():
+    """Timers report count, average and max in milliseconds"""
+    timer = StageTimer("encode")
+    timer.record(0.010)
+    timer.record(0.030)
+    stats = timer.stats()
+    assert stats['count'] == 2
+    assert stats['avg_ms'] == pytest.approx(20.0)
+    assert stats['max_ms'] == pytest.approx(30.0)
+
+@pytest.mark.parametrize("threaded", [True, False])
+def test_pipeline_delivers_frames_in_order(threaded):
+    """Frames go capture -> process -> send, never out of order"""
+    counter = iter(range(10**6))
+    sent = []
+
+    def capture():
+        time.sleep(0.002)
+        return next(counter)
+
+    pipeline = VideoPipeline(capture, lambda n: str(n).encode(), collect(sent), threaded=threaded)
+    pipeline.start()
+    assert wait_for(lambda: len(sent) >= 20)
+    pipeline.stop()
+
+    numbers = [int(data) for data in sent]
+    assert numbers == sorted(numbers)
+    stats = pipeline.stats()
+    assert stats['send']['count'] == len(sent)
+    assert stats['capture']['count'] >= len(sent)
+
+def test_pipeline_drops_stale_frames():
+    """A slow encoder skips to the newest frame instead of queueing"""
+    counter = iter(range(10**6))
+    sent = []
+
+    def capture():
+        time.sleep(0.001)
+        return next(counter)
+
+    def slow_process(n):
+        time.sleep(0.02)
+        return n
+
+    pipeline = VideoPipeline(capture, slow_process, collect(sent))
+    pipeline.start()
+    assert wait_for(lambda: len(sent) >= 5)
+    pipeline.stop()
+
+    assert pipeline.capture_slot.dropped > 0
+    assert sent[-1] - sent[-2] > 1  # Intermediate frames were skipped
+
+def test_pipeline_stops_on_stage_error():
+    """A failing stage ends the stream and records the error"""
+    def broken_send(data, capture_time):
+        raise IOError("network down")
+
+    pipeline = VideoPipeline(lambda: 1, lambda n: b"x", broken_send)
+    pipeline.start()
+    assert wait_for(lambda: not pipeline.is_running())
+    pipeline.stop()
+    assert isinstance(pipeline.error, IOError)
+
+def test_encoder_pool_sends_in_capture_order():
+    """Frames finishing out of order are dropped, never sent late"""
+    counter = iter(range(10**6))
+    sent = []
+    delays = [0.015, 0.001, 0.008, 0.003]
+
+    def capture():
+        time.sleep(0.002)
+        return next(counter)
+
+    def jittery_process(n):
+        time.sleep(delays[n % len(delays)])
+        return n
+
+    pipeline = VideoPipeline(capture, jittery_process, collect(sent), encoder_workers=3)
+    pipeline.start()
+    assert wait_for(lambda: len(sent) >= 30)
+    pipeline.stop()
+
+    assert sent == sorted(sent)
+    assert len(set(sent)) == len(sent)
+    stats = pipeline.stats()
+    assert stats['encoder_workers'] == 3
+    assert all(count > 0 for count in stats['worker_frames'])
+
+def test_max_frame_age_drops_late_frames():
+    """Frames older than max_frame_age after encoding are discarded"""
+    counter = iter(range(10**6))
+    sent = []
+
+    def slow_process(n):
+        time.sleep(0.03)
+        return n
+
+    pipeline = VideoPipeline(lambda: next(counter), slow_process, collect(sent), max_frame_age=0.01)
+    pipeline.start()
+    assert wait_for(lambda: pipeline.stale >= 3)
+    pipeline.stop()
+    assert sent == []
+
+def test_plan_buffers_are_per_thread():
+    """Encoder workers reusing plan buffers never write into each other's output"""
+    image = np.random.randint(0, 256, (48, 64, 3), dtype=np.uint8)
+    settings = DEFAULT_SETTINGS.copy()
+    settings['rotation'] = 90
+    plan = TransformPlan(settings, image.shape)
+
+    results = []
+    worker = threading.Thread(target=lambda: results.append(plan.apply(image, reuse_buffers=True)))
+    worker.start()
+    worker.join()
+    main_result = plan.apply(image, reuse_buffers=True)
+    assert results[0] is not main_result
+    np.testing.assert_array_equal(results[0], main_result)
+
+def test_pipeline_throughput_benchmark():
+    """Benchmark serial vs threaded preview loop at 640x480 with a 30 fps source"""
+    results = {}
+    for threaded in (False, True):
+        camera = SyntheticBackend()
+        camera.configure(camera.create_video_configuration(
+            main={"size": (640, 480), "format": "RGB888"}, controls={"FrameRate": 30}))
+        camera.start()
+
+        def encode(frame):
+            success, encoded = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 35])
+            return encoded.tobytes()
+
+        sent = []
+        pipeline = VideoPipeline(camera.capture_array, encode, collect(sent), threaded=threaded)
+        pipeline.start()
+        wait_for(lambda: len(sent) >= 30)
+        pipeline.stop()
+        results['threaded' if threaded else 'serial'] = pipeline.stats()
+
+    for mode, stats in results.items():
+        print(f"{mode}: {stats['fps']:.1f} fps, process={stats['process']['avg_ms']:.2f}ms, "
+              f"latency={stats['latency']['avg_ms']:.2f}ms")
+    assert results['threaded']['send']['count'] >= 30
+
+def test_encoder_pool_benchmark():
+    """Benchmark achieved fps per encoder worker count with an unpaced 1280x960 source"""
+    frame = np.random.randint(0, 256, (960, 1280, 3), dtype=np.uint8)
+
+    def encode(image):
+        success, encoded = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, 80])
+        return encoded.tobytes()
+
+    def capture():
+        time.sleep(0.001)
+        return frame
+
+    for workers in (1, 2, 4):
+        sent = []
+        pipeline = VideoPipeline(capture, encode, collect(sent), encoder_workers=workers)
+        pipeline.start()
+        time.sleep(0.5)
+        pipeline.stop()
+        stats = pipeline.stats()
+        print(f"encoder_workers={workers}: {stats['fps']:.1f} fps, "
+              f"stale={stats['stale']}, per worker={stats['worker_frames']}")
+        assert len(sent) > 0
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])